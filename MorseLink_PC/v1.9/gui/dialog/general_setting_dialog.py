@@ -30,13 +30,14 @@ class GeneralSettingDialog(QDialog):
         "receive_buzz_status": True,
         "translation_visibility": True,
         "visualizer_visibility": True,
+        "visualizer_fft_mode": False,
         "buzz_freq": 800,
     }
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle(self.tr("一般设置"))
-        self.resize(500, 470)
+        self.resize(500, 500)
 
         if parent is not None and hasattr(parent, "config_manager"):
             self.config_manager = parent.config_manager
@@ -70,6 +71,7 @@ class GeneralSettingDialog(QDialog):
             "receive_buzz_status": bool(self.config_manager.get_receive_buzz_status()),
             "translation_visibility": bool(self.config_manager.get_translation_visibility()),
             "visualizer_visibility": bool(self.config_manager.get_visualizer_visibility()),
+            "visualizer_fft_mode": bool(self.config_manager.get_visualizer_fft_mode()),
             "buzz_freq": int(self.config_manager.get_buzz_freq()),
         }
         self.draft = dict(self.initial)
@@ -183,6 +185,13 @@ class GeneralSettingDialog(QDialog):
         visual_row.addWidget(self.btn_visual)
         self.main_vbox.addLayout(visual_row)
 
+        fft_row = QHBoxLayout()
+        self.label_fft = QLabel("")
+        self.btn_fft = PushButton(self.tr("切换"))
+        fft_row.addWidget(self.label_fft)
+        fft_row.addWidget(self.btn_fft)
+        self.main_vbox.addLayout(fft_row)
+
         self.label_capture_hint = QLabel("")
         self.label_capture_hint.setStyleSheet("color:#c56a00;")
         self.main_vbox.addWidget(self.label_capture_hint)
@@ -209,6 +218,7 @@ class GeneralSettingDialog(QDialog):
         self.btn_recv_audio.clicked.connect(self._toggle_receive_audio)
         self.btn_translation.clicked.connect(self._toggle_translation)
         self.btn_visual.clicked.connect(self._toggle_visualizer)
+        self.btn_fft.clicked.connect(self._toggle_fft_mode)
         self.btn_restore.clicked.connect(self._restore_factory_defaults)
         self.btn_cancel.clicked.connect(self.cancel)
         self.btn_save.clicked.connect(self.save)
@@ -217,7 +227,13 @@ class GeneralSettingDialog(QDialog):
         if self._loading:
             return
         self.draft[key] = value
-        if key in ("send_buzz_status", "receive_buzz_status", "translation_visibility", "visualizer_visibility"):
+        if key in (
+            "send_buzz_status",
+            "receive_buzz_status",
+            "translation_visibility",
+            "visualizer_visibility",
+            "visualizer_fft_mode",
+        ):
             self._refresh_switch_labels()
 
     def _parse_key_pair(self, raw_text):
@@ -253,6 +269,9 @@ class GeneralSettingDialog(QDialog):
         self.label_visual.setText(
             self.tr("摩尔斯电码动画: ") + (self.tr("已启用") if self.draft["visualizer_visibility"] else self.tr("已禁用"))
         )
+        self.label_fft.setText(
+            self.tr("瀑布图频谱: ") + (self.tr("真实音频 FFT") if self.draft["visualizer_fft_mode"] else self.tr("合成"))
+        )
         self.label_freq.setText(self.tr("蜂鸣器频率: {0} Hz").format(int(self.draft["buzz_freq"])))
 
     def _apply_draft_to_ui(self):
@@ -309,6 +328,9 @@ class GeneralSettingDialog(QDialog):
     def _toggle_visualizer(self):
         self._set_draft("visualizer_visibility", not bool(self.draft["visualizer_visibility"]))
 
+    def _toggle_fft_mode(self):
+        self._set_draft("visualizer_fft_mode", not bool(self.draft["visualizer_fft_mode"]))
+
     def _factory_defaults_snapshot(self):
         return dict(self.FACTORY_DEFAULTS)
 
@@ -411,6 +433,7 @@ class GeneralSettingDialog(QDialog):
         self.config_manager.set_receive_buzz_status(bool(snapshot["receive_buzz_status"]))
         self.config_manager.set_translation_visibility(bool(snapshot["translation_visibility"]))
         self.config_manager.set_visualizer_visibility(bool(snapshot["visualizer_visibility"]))
+        self.config_manager.set_visualizer_fft_mode(bool(snapshot["visualizer_fft_mode"]))
         self.config_manager.set_buzz_freq(snapshot["buzz_freq"])
         if self._pending_data_reset:
             try:
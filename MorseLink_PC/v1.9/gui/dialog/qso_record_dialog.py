@@ -6,10 +6,10 @@ from __future__ import annotations
 import csv
 import math
 from datetime import datetime
-from typing import Any, Dict, List, Sequence, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from PySide6.QtCore import Qt, QDate
-from PySide6.QtGui import QGuiApplication
+from PySide6.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex, QRect, QRectF, Signal
+from PySide6.QtGui import QColor, QGuiApplication, QPainter
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QCheckBox,
@@ -18,9 +18,6 @@ from PySide6.QtWidgets import (
     QDialog,
     QFileDialog,
     QFrame,
-    QGraphicsRectItem,
-    QGraphicsScene,
-    QGraphicsView,
     QGridLayout,
     QHBoxLayout,
     QLabel,
@@ -28,19 +25,121 @@ from PySide6.QtWidgets import (
     QMessageBox,
     QPlainTextEdit,
     QPushButton,
+    QScrollBar,
     QSplitter,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QHeaderView,
+    QWidget,
 )
 
 from utils.database_tool import DatabaseTool
+from utils.timeline_lod import TimelineLod
 from utils.translator import MorseCodeTranslator
 
 
+class QsoRecordTableModel(QAbstractTableModel):
+    """
+    Lazily fetched QSO list backed by keyset chunks from DatabaseTool.
+
+    Only metadata rows are held; display strings are formatted on first
+    request, so only rows the view actually paints are materialized.
+    """
+
+    CENTERED_COLUMNS = (1, 2, 5)
+
+    def __init__(
+        self,
+        db_tool: DatabaseTool,
+        headers: Sequence[str],
+        formatter: Callable[[Dict[str, Any]], List[str]],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.db_tool = db_tool
+        self.headers = list(headers)
+        self.formatter = formatter
+        self.batch_size = 200
+        self.total_count = 0
+        self.ignored_count = 0
+        self._filters: Dict[str, Any] = {}
+        self._records: List[Dict[str, Any]] = []
+        self._display: Dict[int, List[str]] = {}
+        self._cursor: Optional[Tuple[str, int]] = None
+        self._exhausted = True
+
+    def reset_query(self, filters: Dict[str, Any], batch_size: int) -> None:
+        self.beginResetModel()
+        self._filters = dict(filters)
+        self.batch_size = max(1, int(batch_size))
+        self._records = []
+        self._display = {}
+        self._cursor = None
+        self._exhausted = False
+        self.total_count, self.ignored_count = self.db_tool.count_qso_records(**self._filters)
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def record(self, row: int) -> Optional[Dict[str, Any]]:
+        if 0 <= row < len(self._records):
+            return self._records[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._records)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        record = self.record(row)
+        if record is None:
+            return None
+        if role == Qt.DisplayRole:
+            values = self._display.get(row)
+            if values is None:
+                values = self._display[row] = self.formatter(record)
+            return values[index.column()]
+        if role == Qt.TextAlignmentRole and index.column() in self.CENTERED_COLUMNS:
+            return int(Qt.AlignCenter)
+        if role == Qt.UserRole:
+            return int(record.get("id") or 0)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid() or self._exhausted:
+            return
+        chunk = self.db_tool.fetch_qso_record_chunk(
+            after=self._cursor,
+            limit=self.batch_size,
+            sort_desc=True,
+            **self._filters,
+        )
+        if len(chunk) < self.batch_size:
+            self._exhausted = True
+        if not chunk:
+            return
+        start = len(self._records)
+        self.beginInsertRows(QModelIndex(), start, start + len(chunk) - 1)
+        self._records.extend(chunk)
+        self.endInsertRows()
+        last = chunk[-1]
+        self._cursor = (str(last.get("created_at") or ""), int(last.get("id") or 0))
+
+
 class QsoRecordDialog(QDialog):
-    """QSO records page with filtering, pagination, details and batch actions."""
+    """QSO records page with filtering, lazy scrolling list, details and batch actions."""
 
     EXPORT_FIELDS = [
         "id",
@@ -61,11 +160,9 @@ class QsoRecordDialog(QDialog):
         self.db_tool = DatabaseTool()
         self.translator = MorseCodeTranslator()
 
-        self.current_page = 1
         self.page_size = 50
-        self.total_count = 0
-        self.page_records: List[Dict[str, Any]] = []
         self.last_deleted_batch: List[Dict[str, Any]] = []
+        self._detail_cache: Optional[Dict[str, Any]] = None
 
         self._setup_ui()
         self._bind_signals()
@@ -142,15 +239,15 @@ class QsoRecordDialog(QDialog):
         filter_layout.addWidget(self.date_from, 1, 1)
         filter_layout.addWidget(QLabel(self.tr("结束日期")), 1, 2)
         filter_layout.addWidget(self.date_to, 1, 3)
-        filter_layout.addWidget(QLabel(self.tr("每页条数")), 1, 4)
+        filter_layout.addWidget(QLabel(self.tr("每批加载")), 1, 4)
         filter_layout.addWidget(self.combo_page_size, 1, 5)
 
         filter_layout.addWidget(self.btn_reset_filters, 2, 4)
         filter_layout.addWidget(self.btn_refresh, 2, 5)
         layout.addLayout(filter_layout)
 
-        self.table = QTableWidget(0, 6, self)
-        self.table.setHorizontalHeaderLabels(
+        self.model = QsoRecordTableModel(
+            self.db_tool,
             [
                 self.tr("时间"),
                 self.tr("时长"),
@@ -158,20 +255,24 @@ class QsoRecordDialog(QDialog):
                 self.tr("呼号"),
                 self.tr("译文预览"),
                 self.tr("原码长度"),
-            ]
+            ],
+            self._format_row,
+            self,
         )
+        self.table = QTableView(self)
+        self.table.setModel(self.model)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setAlternatingRowColors(True)
         self.table.verticalHeader().setVisible(False)
+        # Fixed row height lets the view skip measuring rows it never shows.
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        # ResizeToContents would format every loaded row; size once per reload instead.
+        for column in (0, 1, 2, 3, 5):
+            header.setSectionResizeMode(column, QHeaderView.Interactive)
         header.setSectionResizeMode(4, QHeaderView.Stretch)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
         layout.addWidget(self.table, 1)
 
         batch_layout = QHBoxLayout()
@@ -186,11 +287,7 @@ class QsoRecordDialog(QDialog):
         layout.addLayout(batch_layout)
 
         pagination_layout = QHBoxLayout()
-        self.btn_prev_page = QPushButton(self.tr("上一页"), self)
-        self.btn_next_page = QPushButton(self.tr("下一页"), self)
         self.label_pagination = QLabel("", self)
-        pagination_layout.addWidget(self.btn_prev_page)
-        pagination_layout.addWidget(self.btn_next_page)
         pagination_layout.addStretch(1)
         pagination_layout.addWidget(self.label_pagination)
         layout.addLayout(pagination_layout)
@@ -254,9 +351,8 @@ class QsoRecordDialog(QDialog):
         self.date_to.dateChanged.connect(lambda _d: self._reload_records(reset_page=True))
         self.btn_refresh.clicked.connect(lambda: self._reload_records(reset_page=False))
         self.btn_reset_filters.clicked.connect(self._reset_filters)
-        self.table.itemSelectionChanged.connect(self._refresh_detail_from_selection)
-        self.btn_prev_page.clicked.connect(self._go_prev_page)
-        self.btn_next_page.clicked.connect(self._go_next_page)
+        self.table.selectionModel().selectionChanged.connect(lambda *_: self._refresh_detail_from_selection())
+        self.model.rowsInserted.connect(lambda *_: self._update_pagination())
         self.btn_delete_selected.clicked.connect(self._delete_selected_rows)
         self.btn_undo_delete.clicked.connect(self._undo_last_delete)
         self.btn_export_csv.clicked.connect(self._export_csv)
@@ -271,7 +367,6 @@ class QsoRecordDialog(QDialog):
         self.date_to.setDate(QDate.currentDate())
         self.check_use_date_range.setChecked(False)
         self.combo_page_size.setCurrentIndex(0)
-        self.current_page = 1
         self._reload_records(reset_page=True)
 
     def _on_date_range_toggled(self, enabled: bool) -> None:
@@ -282,7 +377,6 @@ class QsoRecordDialog(QDialog):
     def _on_page_size_changed(self) -> None:
         value = self.combo_page_size.currentData()
         self.page_size = int(value) if value else 50
-        self.current_page = 1
         self._reload_records(reset_page=True)
 
     def _current_filters(self) -> Dict[str, Any]:
@@ -324,81 +418,45 @@ class QsoRecordDialog(QDialog):
         except Exception:
             return ""
 
-    def _reload_records(self, reset_page: bool) -> None:
-        if reset_page:
-            self.current_page = 1
+    def _format_row(self, record: Dict[str, Any]) -> List[str]:
+        time_text = record.get("created_at") or "--"
+        duration_text = self._format_duration(record.get("duration_sec"))
+        direction_text = self._direction_to_label(str(record.get("direction") or ""))
+        sender = str(record.get("sender") or "").strip() or "--"
 
-        filters = self._current_filters()
-        records, total_count, ignored_count = self.db_tool.query_qso_records(
-            keyword=filters["keyword"],
-            direction=filters["direction"],
-            date_from=filters["date_from"],
-            date_to=filters["date_to"],
-            page=self.current_page,
-            page_size=self.page_size,
-            sort_desc=True,
-        )
+        message_text = str(record.get("message_text") or "").strip()
+        if not message_text:
+            message_text = self._safe_translate(str(record.get("message_morse") or ""))
+        preview = message_text.replace("\n", " ").strip()
+        if len(preview) > 120:
+            preview = preview[:117] + "..."
 
-        max_page = max(1, math.ceil(total_count / self.page_size)) if total_count else 1
-        if self.current_page > max_page:
-            self.current_page = max_page
-            records, total_count, ignored_count = self.db_tool.query_qso_records(
-                keyword=filters["keyword"],
-                direction=filters["direction"],
-                date_from=filters["date_from"],
-                date_to=filters["date_to"],
-                page=self.current_page,
-                page_size=self.page_size,
-                sort_desc=True,
-            )
+        morse_value = str(record.get("message_morse") or "")
+        return [time_text, duration_text, direction_text, sender, preview, str(len(morse_value))]
 
-        self.total_count = total_count
-        self.page_records = records
-        self._populate_table(records)
-        self._update_pagination()
-        self._update_ignored_hint(ignored_count)
-
-    def _populate_table(self, records: Sequence[Dict[str, Any]]) -> None:
-        self.table.clearContents()
-        self.table.setRowCount(len(records))
-
-        for row_index, record in enumerate(records):
-            time_text = record.get("created_at") or "--"
-            duration_text = self._format_duration(record.get("duration_sec"))
-            direction_text = self._direction_to_label(str(record.get("direction") or ""))
-            sender = str(record.get("sender") or "").strip() or "--"
-
-            message_text = str(record.get("message_text") or "").strip()
-            if not message_text:
-                message_text = self._safe_translate(str(record.get("message_morse") or ""))
-            preview = message_text.replace("\n", " ").strip()
-            if len(preview) > 120:
-                preview = preview[:117] + "..."
-
-            morse_value = str(record.get("message_morse") or "")
-            morse_len = str(len(morse_value))
-
-            values = [time_text, duration_text, direction_text, sender, preview, morse_len]
-            for col, value in enumerate(values):
-                item = QTableWidgetItem(value)
-                if col in (1, 2, 5):
-                    item.setTextAlignment(Qt.AlignCenter)
-                if col == 0:
-                    item.setData(Qt.UserRole, int(record.get("id") or 0))
-                self.table.setItem(row_index, col, item)
-
-        if records:
-            self.table.selectRow(0)
+    def _reload_records(self, reset_page: bool) -> None:
+        """Re-run the query; keeps the scroll position when refreshing in place."""
+        scroll = None if reset_page else self.table.verticalScrollBar().value()
+        self._detail_cache = None
+        self.model.reset_query(self._current_filters(), self.page_size)
+        if scroll is not None:
+            # Pull chunks until the previous position is reachable again.
+            while self.model.canFetchMore() and self.table.verticalScrollBar().maximum() < scroll:
+                self.model.fetchMore()
+            self.table.verticalScrollBar().setValue(scroll)
+
+        if self.model.rowCount() > 0:
+            self.table.resizeColumnsToContents()
+            self.table.selectRow(0 if scroll is None else max(0, self.table.rowAt(0)))
         else:
             self._clear_detail()
+        self._update_pagination()
+        self._update_ignored_hint(self.model.ignored_count)
 
     def _update_pagination(self) -> None:
-        total_pages = max(1, math.ceil(self.total_count / self.page_size)) if self.total_count else 1
         self.label_pagination.setText(
-            self.tr("第 {0}/{1} 页，共 {2} 条").format(self.current_page, total_pages, self.total_count)
+            self.tr("已加载 {0}/{1} 条").format(self.model.rowCount(), self.model.total_count)
         )
-        self.btn_prev_page.setEnabled(self.current_page > 1)
-        self.btn_next_page.setEnabled(self.current_page < total_pages)
 
     def _update_ignored_hint(self, ignored_count: int) -> None:
         if ignored_count > 0:
@@ -408,32 +466,23 @@ class QsoRecordDialog(QDialog):
             self.label_top_hint.clear()
             self.label_top_hint.setVisible(False)
 
-    def _go_prev_page(self) -> None:
-        if self.current_page <= 1:
-            return
-        self.current_page -= 1
-        self._reload_records(reset_page=False)
-
-    def _go_next_page(self) -> None:
-        total_pages = max(1, math.ceil(self.total_count / self.page_size)) if self.total_count else 1
-        if self.current_page >= total_pages:
-            return
-        self.current_page += 1
-        self._reload_records(reset_page=False)
-
     def _selected_row_indexes(self) -> List[int]:
         indexes = self.table.selectionModel().selectedRows()
         unique_rows = sorted({index.row() for index in indexes})
-        return [row for row in unique_rows if 0 <= row < len(self.page_records)]
+        return [row for row in unique_rows if 0 <= row < self.model.rowCount()]
 
     def _selected_records(self) -> List[Dict[str, Any]]:
-        return [self.page_records[row] for row in self._selected_row_indexes()]
+        return [self.model.record(row) for row in self._selected_row_indexes()]
 
     def _current_detail_record(self) -> Dict[str, Any] | None:
+        """Full record (with payload) for the first selected row, loaded on demand."""
         records = self._selected_records()
         if not records:
             return None
-        return records[0]
+        record_id = int(records[0].get("id") or 0)
+        if self._detail_cache is None or int(self._detail_cache.get("id") or 0) != record_id:
+            self._detail_cache = self.db_tool.get_qso_record(record_id)
+        return self._detail_cache
 
     def _clear_detail(self) -> None:
         self.value_time.setText("--")
@@ -654,8 +703,154 @@ class QsoRecordDialog(QDialog):
         QMessageBox.information(self, self.tr("导出完成"), msg)
 
 
+class TimelineCanvas(QWidget):
+    """Zoomable, pannable view over a TimelineLod; paints only the dirty columns."""
+
+    viewChanged = Signal()
+
+    MIN_ZOOM_FLOOR = 1e-4
+    MAX_ZOOM = 16.0
+    BAND_HEIGHT = 28
+
+    def __init__(self, lod: TimelineLod, parent=None):
+        super().__init__(parent)
+        self.lod = lod
+        self.zoom = 1.0
+        self.offset = 0.0
+        self._drag_x = None
+        self._drag_offset = 0.0
+        self.ink = QColor(Qt.black)
+        self.mixed_ink = QColor(110, 110, 110)
+        self.setMinimumHeight(self.BAND_HEIGHT + 24)
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.setCursor(Qt.OpenHandCursor)
+
+    def min_zoom(self) -> float:
+        if self.lod.total <= 0:
+            return 1.0
+        return max(self.MIN_ZOOM_FLOOR, min(1.0, self.width() / self.lod.total))
+
+    def max_offset(self) -> float:
+        return max(0.0, self.lod.total - self.width() / self.zoom)
+
+    def _origin_px(self, offset: float) -> int:
+        return int(round(offset * self.zoom))
+
+    def _view_offset(self) -> float:
+        """The offset snapped to whole pixels; everything on screen is drawn against it."""
+        return self._origin_px(self.offset) / self.zoom
+
+    def set_offset(self, offset: float) -> None:
+        offset = min(max(0.0, float(offset)), self.max_offset())
+        if offset == self.offset:
+            return
+        # Scroll by the change of the snapped origin, not of the exact offset, so
+        # sub-pixel steps accumulate in offset instead of drifting from the screen.
+        dx = self._origin_px(self.offset) - self._origin_px(offset)
+        self.offset = offset
+        if dx and abs(dx) < self.width():
+            # Shift what is already on screen and repaint only the exposed strip.
+            self.scroll(dx, 0)
+        elif dx:
+            self.update()
+        self.viewChanged.emit()
+
+    def set_zoom(self, zoom: float, anchor_px: float | None = None) -> None:
+        zoom = min(max(float(zoom), self.min_zoom()), self.MAX_ZOOM)
+        if anchor_px is None:
+            anchor_px = self.width() / 2.0
+        anchor_unit = self.offset + anchor_px / self.zoom
+        self.zoom = zoom
+        self.offset = min(max(0.0, anchor_unit - anchor_px / zoom), self.max_offset())
+        self.update()
+        self.viewChanged.emit()
+
+    def fit(self) -> None:
+        self.offset = 0.0
+        self.set_zoom(self.min_zoom(), 0.0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.zoom < self.min_zoom():
+            self.zoom = self.min_zoom()
+        self.offset = min(self.offset, self.max_offset())
+        self.viewChanged.emit()
+
+    def wheelEvent(self, event):
+        delta = event.angleDelta()
+        if delta.x() or event.modifiers() & Qt.ShiftModifier:
+            steps = (delta.x() or delta.y()) / 120.0
+            self.set_offset(self.offset - steps * self.width() * 0.1 / self.zoom)
+        elif delta.y():
+            self.set_zoom(self.zoom * (1.25 ** (delta.y() / 120.0)), event.position().x())
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = event.position().x()
+            self._drag_offset = self.offset
+            self.setCursor(Qt.ClosedHandCursor)
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is not None:
+            self.set_offset(self._drag_offset - (event.position().x() - self._drag_x) / self.zoom)
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = None
+            self.setCursor(Qt.OpenHandCursor)
+        super().mouseReleaseEvent(event)
+
+    def paintEvent(self, event):
+        dirty = event.rect()
+        painter = QPainter(self)
+        painter.fillRect(dirty, self.palette().base())
+        lod = self.lod
+        view = self._view_offset()
+        top = max(0, (self.height() - self.BAND_HEIGHT) // 2)
+        left_px, right_px = dirty.left(), dirty.right() + 1
+        u0 = view + left_px / self.zoom
+        u1 = view + right_px / self.zoom
+        first, last = lod.visible_range(u0, u1)
+
+        if last - first <= right_px - left_px:
+            # Few enough elements to draw each one exactly.
+            for i in range(first, last):
+                x = (lod.starts[i] - view) * self.zoom
+                width = max(1.0, (lod.ends[i] - lod.starts[i]) * self.zoom)
+                painter.fillRect(QRectF(x, top, width, self.BAND_HEIGHT), self.ink)
+            painter.end()
+            return
+
+        # Denser than one element per pixel: sample the pyramid per column and
+        # merge equal neighbours into runs. 2 = fully keyed, 1 = partially keyed.
+        level = lod.level_for(1.0 / self.zoom)
+        mins, maxs = lod.levels[level]
+        bucket_units = float(1 << level)
+        run_start = left_px
+        run_state = 0
+        for px in range(left_px, right_px + 1):
+            if px < right_px:
+                bucket = int((view + px / self.zoom) / bucket_units)
+                if bucket >= len(maxs) or not maxs[bucket]:
+                    state = 0
+                else:
+                    state = 2 if mins[bucket] else 1
+            else:
+                state = -1
+            if state != run_state:
+                if run_state > 0:
+                    color = self.ink if run_state == 2 else self.mixed_ink
+                    painter.fillRect(QRect(run_start, top, px - run_start, self.BAND_HEIGHT), color)
+                run_start = px
+                run_state = state
+        painter.end()
+
+
 class WaterfallGraph(QDialog):
-    """Timeline visualizer for one QSO record."""
+    """Timeline visualizer for one QSO record, with zoom and pan for long QSOs."""
 
     def __init__(self, lengths: Sequence[float], gaps: Sequence[float], parent=None):
         super().__init__(parent)
@@ -663,38 +858,45 @@ class WaterfallGraph(QDialog):
         self.resize(820, 320)
 
         main_layout = QVBoxLayout(self)
-        self.scene = QGraphicsScene(self)
-        self.view = QGraphicsView(self.scene, self)
-        self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        main_layout.addWidget(self.view)
-
-        self._draw_waveform(list(lengths), list(gaps))
-
-    def _draw_waveform(self, lengths: List[float], gaps: List[float]) -> None:
         if not lengths:
-            self.scene.addText(self.tr("该记录无可用时序数据"))
+            main_layout.addWidget(QLabel(self.tr("该记录无可用时序数据"), self))
             return
 
-        # Prevent huge durations from creating an unusable scene.
-        tone_scale = 0.12
-        gap_scale = 0.08
-        x = 10.0
-        y = 24.0
-        h = 28.0
-
-        if len(gaps) < len(lengths):
-            gaps = gaps + [80.0] * (len(lengths) - len(gaps))
-
-        for idx, length in enumerate(lengths):
-            if idx > 0:
-                gap = max(0.0, float(gaps[idx]))
-                x += max(2.0, min(gap * gap_scale, 220.0))
-
-            width = max(1.0, min(float(length) * tone_scale, 420.0))
-            item = QGraphicsRectItem(x, y, width, h)
-            item.setBrush(Qt.black)
-            item.setPen(Qt.NoPen)
-            self.scene.addItem(item)
-            x += width
-
-        self.scene.setSceneRect(0, 0, x + 20.0, 90.0)
+        self.canvas = TimelineCanvas(TimelineLod(list(lengths), list(gaps)), self)
+        self.scrollbar = QScrollBar(Qt.Horizontal, self)
+        main_layout.addWidget(self.canvas, 1)
+        main_layout.addWidget(self.scrollbar)
+
+        controls = QHBoxLayout()
+        self.btn_zoom_in = QPushButton(self.tr("放大"), self)
+        self.btn_zoom_out = QPushButton(self.tr("缩小"), self)
+        self.btn_fit = QPushButton(self.tr("适应窗口"), self)
+        self.label_zoom = QLabel("", self)
+        controls.addWidget(self.btn_zoom_in)
+        controls.addWidget(self.btn_zoom_out)
+        controls.addWidget(self.btn_fit)
+        controls.addStretch(1)
+        controls.addWidget(self.label_zoom)
+        main_layout.addLayout(controls)
+
+        self.btn_zoom_in.clicked.connect(lambda: self.canvas.set_zoom(self.canvas.zoom * 2.0))
+        self.btn_zoom_out.clicked.connect(lambda: self.canvas.set_zoom(self.canvas.zoom / 2.0))
+        self.btn_fit.clicked.connect(self.canvas.fit)
+        self.scrollbar.valueChanged.connect(self._on_scrollbar_moved)
+        self.canvas.viewChanged.connect(self._sync_controls)
+        self._sync_controls()
+
+    def _on_scrollbar_moved(self, value: int) -> None:
+        self.canvas.set_offset(value / self.canvas.zoom)
+
+    def _sync_controls(self) -> None:
+        canvas = self.canvas
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setRange(0, int(math.ceil(canvas.max_offset() * canvas.zoom)))
+        self.scrollbar.setPageStep(max(1, canvas.width()))
+        self.scrollbar.setSingleStep(max(1, canvas.width() // 10))
+        self.scrollbar.setValue(int(round(canvas.offset * canvas.zoom)))
+        self.scrollbar.blockSignals(False)
+        self.label_zoom.setText(
+            self.tr("缩放 {0}% · {1} 个码元").format(round(canvas.zoom * 100), len(canvas.lod.starts))
+        )
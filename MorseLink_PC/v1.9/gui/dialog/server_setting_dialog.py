@@ -50,6 +50,7 @@ class ServerSettingDialog(QDialog):
         self.initial_port = int(self.config_manager.get_server_active_port())
         self.initial_tls_ca_certs = str(self.config_manager.get_server_tls_ca_certs() or "").strip()
         self.initial_tls_use_cert = bool(self.config_manager.get_server_tls_use_cert())
+        self.initial_mqtt_protocol = str(self.config_manager.get_mqtt_protocol())
         endpoints_text = self.config_manager.get_server_customized_endpoints()
         self.initial_endpoints = self._parse_endpoints_text(endpoints_text, self.initial_scheme)
         current_endpoint = self._compose_endpoint(self.initial_scheme, self.initial_host, self.initial_port)
@@ -120,6 +121,17 @@ class ServerSettingDialog(QDialog):
         self.check_tls_use_cert.toggled.connect(self._on_tls_use_cert_toggled)
         self.main_vbox.addWidget(self.check_tls_use_cert)
 
+        mqtt_protocol_layout = QHBoxLayout()
+        mqtt_protocol_layout.addWidget(QLabel(self.tr("MQTT 协议版本:")))
+        self.mqtt_protocol_combo = QComboBox(self)
+        self.mqtt_protocol_combo.addItem(self.tr("3.1.1（默认）"), "3.1.1")
+        self.mqtt_protocol_combo.addItem(self.tr("5（主题别名与消息过期）"), "5")
+        self.mqtt_protocol_combo.addItem(self.tr("自动（优先 5，不支持时回退 3.1.1）"), "auto")
+        index = self.mqtt_protocol_combo.findData(self.initial_mqtt_protocol)
+        self.mqtt_protocol_combo.setCurrentIndex(max(0, index))
+        mqtt_protocol_layout.addWidget(self.mqtt_protocol_combo, 1)
+        self.main_vbox.addLayout(mqtt_protocol_layout)
+
         self.btn_layout = QHBoxLayout()
         spacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
         self.btn_layout.addItem(spacer)
@@ -369,6 +381,9 @@ class ServerSettingDialog(QDialog):
         if str(self.selected_endpoint or "") != str(initial_selected or ""):
             return True
 
+        if str(self.mqtt_protocol_combo.currentData()) != self.initial_mqtt_protocol:
+            return True
+
         current_ca = str(self.input_tls_ca_certs.text() or "").strip()
         if current_ca != self.initial_tls_ca_certs:
             return True
@@ -416,6 +431,7 @@ class ServerSettingDialog(QDialog):
         self.config_manager.set_server_customized_endpoints(endpoints_text)
         self.config_manager.set_server_tls_ca_certs(tls_ca_certs)
         self.config_manager.set_server_tls_use_cert(tls_use_cert)
+        self.config_manager.set_mqtt_protocol(self.mqtt_protocol_combo.currentData())
         self.config_manager.sync()
         self.accept()
 
@@ -210,6 +210,9 @@ class MainUI(QMainWindow):
         if isinstance(channels, dict):
             for channel in channels.values():
                 channel.buzz = online_new
+        attach_tap = getattr(self.page_morsechat, "_attach_spectrum_tap", None)
+        if callable(attach_tap):
+            attach_tap()
         if online_old is not online_new:
             self._safe_close_buzzer(online_old)
 
@@ -333,6 +336,10 @@ class MainUI(QMainWindow):
         if callable(stop_training):
             stop_training()
 
+        release_tap = getattr(self.page_morsechat, "release_spectrum_tap", None)
+        if callable(release_tap):
+            release_tap()
+
         unique_buzzers = []
         seen_ids = set()
         for buzzer in (
@@ -0,0 +1,70 @@
+import time
+
+from PySide6.QtWidgets import QFrame, QLabel, QVBoxLayout
+from PySide6.QtGui import QFontDatabase
+from PySide6.QtCore import Qt, QTimer
+
+
+class LinkQualityPanel(QFrame):
+    """接收链路质量卡片：按发送方显示丢包、乱序、重复、去抖丢弃、抖动与延迟分位数"""
+
+    def __init__(self, telemetry, max_rows=6, interval_ms=1000, rate_limiter=None, parent=None):
+        """
+        Args:
+            telemetry: RxTelemetry 实例
+            rate_limiter: 可选 SenderRateLimiter，显示被限流/静音的发送方
+            max_rows (int): 最多显示的发送方行数（按最近活跃排序）
+            interval_ms (int): 刷新周期，仅在可见时刷新
+        """
+        super().__init__(parent)
+        self.setObjectName("card")
+        self.telemetry = telemetry
+        self.rate_limiter = rate_limiter
+        self.max_rows = max(1, int(max_rows))
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(6)
+
+        caption = QLabel(self.tr("链路质量"))
+        caption.setObjectName("cardCaption")
+        caption.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+
+        self.label_rows = QLabel(self.tr("暂无接收数据"))
+        self.label_rows.setObjectName("metaText")
+        self.label_rows.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.label_rows.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        layout.addWidget(caption)
+        layout.addWidget(self.label_rows)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(max(100, int(interval_ms)))
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        snapshots = sorted(
+            self.telemetry.sender_stats(),
+            key=lambda s: s.last_seen_ms,
+            reverse=True,
+        )[: self.max_rows]
+        throttled = []
+        if self.rate_limiter is not None:
+            throttled = self.rate_limiter.stats(time.monotonic() * 1000)
+        if not snapshots and not throttled:
+            self.label_rows.setText(self.tr("暂无接收数据"))
+            return
+
+        lines = ["CALL       CH   LOSS  RO DUP DEB  JIT  P50  P95"]
+        for s in snapshots:
+            lines.append(
+                f"{s.sender_call[:9]:<9} {s.channel:>4} {s.loss_ratio * 100:>4.1f}% "
+                f"{s.reordered:>3} {s.duplicates:>3} {s.debounce_drops:>3} "
+                f"{s.jitter_ms:>4.0f} {s.latency_p50_ms:>4.0f} {s.latency_p95_ms:>4.0f}"
+            )
+        for t in throttled:
+            state = self.tr("静音") if t.muted else self.tr("限流")
+            lines.append(f"{t.sender[:9]:<9} {state} {t.throttled}")
+        self.label_rows.setText("\n".join(lines))
@@ -1,9 +1,14 @@
-import math
+import time
+from collections import deque
+
 import numpy as np
 
-from PySide6.QtCore import QTimer, QRect
-from PySide6.QtGui import QPainter, QImage, QColor, QPen
+from PySide6.QtCore import Qt, QTimer, QRect
+from PySide6.QtGui import QPainter, QImage, QColor, QPen, QPixmap, QPolygonF
 from PySide6.QtWidgets import QWidget
+from shiboken6 import VoidPtr
+
+from utils.key_timeline import KeyTimeline
 
 
 # ==========================================================
@@ -95,6 +100,21 @@ class MorseCodeVisualizer(QWidget):
         self.fps_ms_fast = 16   # ~60 FPS
         self.fps_ms = self.fps_ms_slow
 
+        # ==================================================
+        # 空闲降频：包络衰减到底噪且无排队脉冲，连续 idle_after_frames 帧后
+        # 降到 idle_fps_ms；隐藏时完全停止。start_generating/generate_blocks 唤醒。
+        # ==================================================
+        self.idle_fps_ms = 250
+        self.idle_after_frames = 30
+        self._idle = False
+        self._idle_frames = 0
+
+        # 帧耗时统计（tick + paint，毫秒）与帧间隔
+        self._frame_times = deque(maxlen=120)
+        self._frame_intervals = deque(maxlen=120)
+        self._frame_t0 = 0.0
+        self._last_frame_at = 0.0
+
         # ==================================================
         # 是否用“按键包络”驱动瀑布（强烈建议 True）
         # True：短按短、长按长（更像键控）
@@ -117,8 +137,19 @@ class MorseCodeVisualizer(QWidget):
         # ==================================================
         # 通道状态
         # ==================================================
-        self.channel_generating = [False] * self.num_channels
-        self.channel_pulses = [[] for _ in range(self.num_channels)]
+        self.channel_generating = np.zeros(self.num_channels, dtype=bool)
+        # 按键时间线：(t_on_ms, t_off_ms)，共享呈现时钟毫秒；渲染时按帧时间窗采样，
+        # 显示长度与帧率无关。可由 set_key_timeline() 换成与音频、信号灯共用的实例
+        self.key_timeline = None
+        # 时间线区间的扁平副本（通道、按下、抬起）：监听器追加，tick 中对全部通道一次向量化采样
+        self._key_ch = np.zeros(0, dtype=np.intp)
+        self._key_on = np.zeros(0, dtype=np.float64)
+        self._key_off = np.zeros(0, dtype=np.float64)
+        self._key_new = []
+        self._key_generation = None
+        self.set_key_timeline(KeyTimeline())
+        self._last_sample_ms = None
+        self._flutter_offsets = np.arange(self.num_channels, dtype=np.float32) * 0.6
 
         self._level = np.zeros(self.num_channels, dtype=np.float32)      # 频谱AGC
         self._wf_level = np.zeros(self.num_channels, dtype=np.float32)   # 瀑布记忆（若不用包络）
@@ -132,6 +163,22 @@ class MorseCodeVisualizer(QWidget):
         self._wf_width = 0
         self._wf_height = 0
         self.wf = None
+        # 环形行缓冲：_wf_head 为下一行写入位置，其后（含回绕）依次是最旧到最新的行
+        self._wf_head = 0
+
+        # 真实频谱模式：由 SpectrumAnalyzer 提供现成的电平行与 RGB 行
+        self.spectrum_source = None
+        self._fft_level = None
+        self._fft_rgb = None
+
+        # 布局与静态图层缓存（resizeEvent 时重建）
+        self._spec_rect = QRect()
+        self._wf_rect = QRect()
+        # 谱线折线：QPolygonF 只分配一次，_spec_pts 是其点数组的 numpy 视图，每帧只改 y
+        self._spec_poly = QPolygonF()
+        self._spec_pts = np.zeros((0, 2), dtype=np.float64)
+        self._static_bg = None
+        self._static_ticks = None
 
         self._phase = 0.0
 
@@ -143,11 +190,16 @@ class MorseCodeVisualizer(QWidget):
         self._if_half = len(self._if_kernel) // 2
 
         self._smooth_kernel = np.array([0.20, 0.60, 0.20], dtype=np.float32)
+        self._spec_kernel = np.array([0.12, 0.35, 1.00, 0.35, 0.12], dtype=np.float32)
+        # (用途, 宽度) -> 通道×像素的核矩阵，盖章变为一次矩阵向量乘
+        self._stamp_cache = {}
 
-        # timer
+        # 每次重绘都会覆盖整个脏区域；不透明时 scroll() 可以直接平移后备缓冲，不必重绘整个瀑布
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+
+        # timer：只在 showEvent 中启动，从未显示过的控件不会空转
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.tick)
-        self.timer.start(self.fps_ms)
 
     # ==================================================
     # 对外接口
@@ -155,28 +207,121 @@ class MorseCodeVisualizer(QWidget):
     def start_generating(self, channel):
         if 0 <= channel < self.num_channels:
             self.channel_generating[channel] = True
+            self._wake()
 
     def stop_generating(self, channel):
         if 0 <= channel < self.num_channels:
             self.channel_generating[channel] = False
 
-    def generate_blocks(self, channel_idx=5, count=1, height=3, radius=0, gap_ms=90):
+    now_ms = staticmethod(KeyTimeline.now_ms)
+
+    def set_key_timeline(self, timeline):
+        """改为采样给定的（通常是共享的）按键时间线。"""
+        if timeline is self.key_timeline:
+            return
+        if self.key_timeline is not None:
+            self.key_timeline.remove_listener(self._on_key_interval)
+        self.key_timeline = timeline
+        self._key_generation = None
+        timeline.add_listener(self._on_key_interval)
+        self._wake()
+
+    def _on_key_interval(self, channel, t_on_ms, t_off_ms):
+        if 0 <= channel < self.num_channels:
+            self._key_new.append((channel, t_on_ms, t_off_ms))
+            self._wake()
+
+    def add_key_interval(self, channel, t_on_ms, t_off_ms):
         """
-        channel_idx: 通道
+        在通道时间线上登记一次按键 [t_on_ms, t_off_ms)（呈现时钟毫秒，可在未来）。
+        与上一段重叠时合并。
+        """
+        if 0 <= channel < self.num_channels:
+            self.key_timeline.add(channel, t_on_ms, t_off_ms)
+
+    def generate_blocks(self, channel_idx=None, count=1, height=3, radius=0, gap_ms=90, duration_ms=None):
+        """
+        channel_idx: 通道（默认中央主通道）
         count: 连续块数
-        height: on 段持续“帧数”（如果你想也用ms，可以再封一层）
-        gap_ms: 最小间隔（毫秒），✅ 与帧率解耦
+        height: on 段持续“帧数”，按当前帧间隔换算为毫秒（兼容旧调用）
+        duration_ms: on 段时长（毫秒），给出时优先于 height
+        gap_ms: 块与块之间的最小间隔（毫秒）
         """
+        if channel_idx is None:
+            channel_idx = self.num_channels // 2
         if 0 <= channel_idx < self.num_channels:
-            dur = max(1, int(height))
-            gap_frames = max(1, int(round(float(gap_ms) / float(self.fps_ms))))
-
-            q = self.channel_pulses[channel_idx]
+            if duration_ms is None:
+                duration_ms = max(1, int(height)) * float(self.fps_ms)
+            dur = max(0.5, float(duration_ms))
+            gap = max(0.0, float(gap_ms))
+
+            start = self.now_ms()
+            last_off = self.key_timeline.last_off(channel_idx)
+            if last_off is not None:
+                start = max(start, last_off + gap)
             for _ in range(count):
-                if q and q[-1] > 0:
-                    q.append(-gap_frames)
-                q.append(dur)
-                q.append(-gap_frames)
+                self.add_key_interval(channel_idx, start, start + dur)
+                start += dur + gap
+
+    def set_spectrum_source(self, source):
+        """
+        切换到真实频谱模式（source 为 SpectrumAnalyzer），传 None 恢复合成显示。
+        频谱线与瀑布行改用音频分析结果，按键时间线仍用于唤醒与自适应。
+        """
+        self.spectrum_source = source
+        self._fft_level = None
+        self._fft_rgb = None
+        if source is not None:
+            if source.colormap is None:
+                source.colormap = intensity_to_rgb_ic7300
+            source.set_width(self._wf_width)
+
+    def frame_stats(self):
+        """最近约 120 帧的帧耗时（tick + paint）与实际帧率。"""
+        times = sorted(self._frame_times)
+        intervals = list(self._frame_intervals)
+        if not times:
+            return {"fps": 0.0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "idle": self._idle}
+        avg_interval = sum(intervals) / len(intervals) if intervals else 0.0
+        return {
+            "fps": 1000.0 / avg_interval if avg_interval > 0 else 0.0,
+            "avg_ms": sum(times) / len(times),
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "max_ms": times[-1],
+            "idle": self._idle,
+        }
+
+    # ==================================================
+    # 内部：空闲降频 / 唤醒
+    # ==================================================
+    def _wake(self):
+        self._idle_frames = 0
+        if not self._idle:
+            return
+        self._idle = False
+        if self.isVisible():
+            self.timer.start(self.fps_ms)
+
+    def _govern(self, active):
+        if active:
+            self._idle_frames = 0
+            self._wake()
+            return
+        self._idle_frames += 1
+        if not self._idle and self._idle_frames >= self.idle_after_frames:
+            self._idle = True
+            self.timer.start(self.idle_fps_ms)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.timer.start(self.idle_fps_ms if self._idle else self.fps_ms)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+        # 隐藏期间的脉冲不再有意义：重新显示时从当前时刻采样，不回放过期内容。
+        # 时间线可能与信号灯共用，因此不清空
+        self._last_sample_ms = None
 
     # ==================================================
     # 内部：根据 speed_score(0..1) 插值参数
@@ -195,44 +340,33 @@ class MorseCodeVisualizer(QWidget):
             new_ms = int(np.clip(new_ms, min(self.fps_ms_slow, self.fps_ms_fast), max(self.fps_ms_slow, self.fps_ms_fast)))
             if new_ms != self.fps_ms:
                 self.fps_ms = new_ms
-                # 重新启动timer（动态流速）
-                self.timer.start(self.fps_ms)
+                # 重新启动timer（动态流速）；空闲降频时由 _wake 恢复
+                if not self._idle and self.isVisible():
+                    self.timer.start(self.fps_ms)
 
     # ==================================================
     # 核心更新
     # ==================================================
     def tick(self):
+        self._frame_t0 = time.perf_counter()
         n = self.num_channels
 
         # 连续底噪
         self._noise_state = 0.96 * self._noise_state + 0.04 * np.random.rand(n).astype(np.float32) * self.noise_floor
         level = self._noise_state.copy()
 
+        # 按帧时间窗 [prev, now) 采样时间线：与窗口有重叠即视为本帧在发，
+        # 因此短于一帧的按键也至少显示一帧
+        now = self.now_ms()
+        prev = self._last_sample_ms if self._last_sample_ms is not None else now - self.fps_ms
+        self._last_sample_ms = now
+        keyed = self._sample_keys(prev, now)
+
         # 本帧是否在发（用于包络、瀑布门控）
-        on_mask = np.zeros(n, dtype=bool)
-
-        # 更新脉冲队列 + 计算本帧 on/off
-        for ch in range(n):
-            pulse_on = False
-
-            if self.channel_pulses[ch]:
-                seg = self.channel_pulses[ch][0]
-                if seg > 0:
-                    pulse_on = True
-                    seg -= 1
-                else:
-                    pulse_on = False
-                    seg += 1
-
-                if seg == 0:
-                    self.channel_pulses[ch].pop(0)
-                else:
-                    self.channel_pulses[ch][0] = seg
-
-            if self.channel_generating[ch] or pulse_on:
-                on_mask[ch] = True
-                flutter = 0.04 * math.sin(self._phase + ch * 0.6)
-                level[ch] += self.tx_strength + flutter
+        on_mask = np.logical_or(self.channel_generating, keyed)
+
+        flutter = 0.04 * np.sin(self._phase + self._flutter_offsets)
+        level += np.where(on_mask, self.tx_strength + flutter, 0.0).astype(np.float32)
 
         self._phase += 0.10
 
@@ -255,34 +389,73 @@ class MorseCodeVisualizer(QWidget):
         self._apply_adaptive_params()
 
         # ========== 频谱AGC（用于上面的频谱图）==========
-        for i in range(n):
-            if level[i] > self._level[i]:
-                self._level[i] += (level[i] - self._level[i]) * self.attack
-            else:
-                self._level[i] *= self.decay
+        self._level = np.where(
+            level > self._level,
+            self._level + (level - self._level) * self.attack,
+            self._level * self.decay,
+        ).astype(np.float32)
 
         # ========== 按键包络（用于瀑布“短按不被拉长”）==========
         # 目标：on_mask -> env 变成平滑的 0..1
-        for i in range(n):
-            target = 1.0 if on_mask[i] else 0.0
-            if target > self._env[i]:
-                self._env[i] += (target - self._env[i]) * self.env_attack
-            else:
-                self._env[i] += (target - self._env[i]) * self.env_decay
+        target = on_mask.astype(np.float32)
+        coeff = np.where(target > self._env, self.env_attack, self.env_decay)
+        self._env = (self._env + (target - self._env) * coeff).astype(np.float32)
 
         # ========== 瀑布短记忆（当你不用包络时才用）==========
         if not self.waterfall_use_key_envelope:
-            for i in range(n):
-                if on_mask[i]:
-                    if self._level[i] > self._wf_level[i]:
-                        self._wf_level[i] += (self._level[i] - self._wf_level[i]) * self.wf_attack
-                    else:
-                        self._wf_level[i] *= self.wf_decay
-                else:
-                    # off：强制快速熄灭（避免糊成直线）
-                    self._wf_level[i] *= self.wf_off_fast_decay
-
-        self.update()
+            wf = self._wf_level
+            rising = np.where(
+                self._level > wf,
+                wf + (self._level - wf) * self.wf_attack,
+                wf * self.wf_decay,
+            )
+            # off：强制快速熄灭（避免糊成直线）
+            self._wf_level = np.where(on_mask, rising, wf * self.wf_off_fast_decay).astype(np.float32)
+
+        fresh = None
+        if self.spectrum_source is not None:
+            fresh = self.spectrum_source.take_row()
+            if fresh is not None:
+                self._fft_level, self._fft_rgb = fresh
+
+        active = (
+            bool(on_mask.any())
+            or (self._fft_level is not None and float(self._fft_level.max()) > 0.05)
+            or bool((self._key_off > now).any())
+            or float(self._env.max()) > 0.01
+            or float(self._level.max()) > self.noise_floor * 1.5
+            or (not self.waterfall_use_key_envelope and float(self._wf_level.max()) > 0.01)
+        )
+        pushed = self._push_waterfall_row(fft_fresh=fresh is not None)
+        self._govern(active)
+
+        self._request_paint(scroll=pushed)
+
+    def _sample_keys(self, t0, t1):
+        """[t0, t1) 内各通道是否有按键，返回布尔掩码；已结束的区间随之丢弃。"""
+        timeline = self.key_timeline
+        if timeline.generation != self._key_generation:
+            # 时间线被清空或更换：按其现有区间重新同步
+            self._key_generation = timeline.generation
+            self._key_new = [iv for iv in timeline.intervals() if 0 <= iv[0] < self.num_channels]
+            self._key_ch = self._key_ch[:0]
+            self._key_on = self._key_on[:0]
+            self._key_off = self._key_off[:0]
+        if self._key_new:
+            new, self._key_new = self._key_new, []
+            arr = np.asarray(new, dtype=np.float64)
+            self._key_ch = np.concatenate((self._key_ch, arr[:, 0].astype(np.intp)))
+            self._key_on = np.concatenate((self._key_on, arr[:, 1]))
+            self._key_off = np.concatenate((self._key_off, arr[:, 2]))
+
+        keyed = np.zeros(self.num_channels, dtype=bool)
+        keyed[self._key_ch[(self._key_on < t1) & (self._key_off > t0)]] = True
+        live = self._key_off > t0
+        if not live.all():
+            self._key_ch = self._key_ch[live]
+            self._key_on = self._key_on[live]
+            self._key_off = self._key_off[live]
+        return keyed
 
     # ==================================================
     # IC-7300 风格瀑布强度映射
@@ -309,96 +482,136 @@ class MorseCodeVisualizer(QWidget):
             )
         return x
 
+    # ==================================================
+    # 通道×像素核矩阵：各通道中心处放置 kernel（可再做一次平滑卷积）
+    # ==================================================
+    def _stamp_matrix(self, name, width, kernel, smooth=None):
+        key = (name, width)
+        m = self._stamp_cache.get(key)
+        if m is not None:
+            return m
+
+        n = self.num_channels
+        half = len(kernel) // 2
+        centers = np.linspace(0, width - 1, n).astype(np.int32)
+        cols = centers[:, None] + np.arange(len(kernel), dtype=np.int32)[None, :] - half
+        rows = np.broadcast_to(np.arange(n)[:, None], cols.shape)
+        weights = np.broadcast_to(kernel, cols.shape)
+        valid = (cols >= 0) & (cols < width)
+
+        m = np.zeros((n, width), dtype=np.float32)
+        np.add.at(m, (rows[valid], cols[valid]), weights[valid])
+        if smooth is not None and width >= 3:
+            # 平滑是线性的，可预先作用在每一行上
+            m = np.stack([np.convolve(row, smooth, mode="same") for row in m]).astype(np.float32)
+
+        if len(self._stamp_cache) >= 8:
+            self._stamp_cache.clear()
+        self._stamp_cache[key] = m
+        return m
+
     # ==================================================
     # 绘制
     # ==================================================
-    def paintEvent(self, event):
-        p = QPainter(self)
+    # ==================================================
+    # 布局与静态图层（背景、网格、通道刻度）：仅在尺寸变化时重建
+    # ==================================================
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_layout()
 
+    def _update_layout(self):
         w, h = self.width(), self.height()
         margin = 8
 
         spec_h = int(h * 0.25)
-        spec_rect = QRect(margin, margin, w - 2 * margin, spec_h)
-        wf_rect = QRect(
+        self._spec_rect = QRect(margin, margin, w - 2 * margin, spec_h)
+        self._wf_rect = QRect(
             margin,
-            spec_rect.bottom() + margin,
+            self._spec_rect.bottom() + margin,
             w - 2 * margin,
             h - spec_h - 2 * margin
         )
 
         # 初始化瀑布缓冲
-        target_w = max(1, wf_rect.width())
-        target_h = max(1, wf_rect.height())
+        target_w = max(1, self._wf_rect.width())
+        target_h = max(1, self._wf_rect.height())
 
         if (self._wf_width != target_w) or (self._wf_height != target_h) or (self.wf is None):
             self._wf_width = target_w
             self._wf_height = target_h
             self.wf = np.zeros((self._wf_height, self._wf_width, 3), dtype=np.uint8)
-
-        # 背景
-        p.fillRect(spec_rect, QColor(8, 12, 22))
-
-        # ==================================================
-        # 频谱图（用 _level）
-        # ==================================================
-        spec_disp = np.log1p(self._level * self.display_gain * 4.0)
-        spec_disp /= np.log1p(4.0 * self.display_gain)
-        spec_disp = np.clip(spec_disp, 0.0, 1.0).astype(np.float32)
-
-        spec_w = max(1, spec_rect.width())
-        spec_h_px = max(1, spec_rect.height())
-
-        spec_spectrum = np.zeros(spec_w, dtype=np.float32)
-        spec_centers = np.linspace(0, spec_w - 1, self.num_channels)
-
-        for i, amp in enumerate(spec_disp):
-            if amp < 0.01:
-                continue
-            cx = int(spec_centers[i])
-            for dx, wgt in [(-2, 0.12), (-1, 0.35), (0, 1.00), (1, 0.35), (2, 0.12)]:
-                x = cx + dx
-                if 0 <= x < spec_w:
-                    spec_spectrum[x] += amp * wgt
-
-        spec_spectrum = np.clip(spec_spectrum, 0.0, 1.0)
-        if spec_w >= 3:
-            spec_spectrum = np.convolve(spec_spectrum, np.array([0.2, 0.6, 0.2], dtype=np.float32), mode="same")
-
-        # 网格
+            self._wf_head = 0
+
+        spec_w = max(1, self._spec_rect.width())
+        self._spec_poly = QPolygonF()
+        self._spec_poly.resize(spec_w)
+        self._spec_pts = np.frombuffer(
+            VoidPtr(self._spec_poly.data(), spec_w * 2 * 8, True), dtype=np.float64
+        ).reshape(spec_w, 2)
+        self._spec_pts[:, 0] = self._spec_rect.left() + np.arange(spec_w)
+        if self.spectrum_source is not None:
+            self.spectrum_source.set_width(self._wf_width)
+        self._render_static_layers()
+
+    def _render_static_layers(self):
+        rect = self._spec_rect
+        spec_w = max(1, rect.width())
+        spec_h_px = max(1, rect.height())
+        dpr = self.devicePixelRatioF()
+
+        def _layer(fill):
+            pm = QPixmap(max(1, int(round(spec_w * dpr))), max(1, int(round(spec_h_px * dpr))))
+            pm.setDevicePixelRatio(dpr)
+            pm.fill(fill)
+            return pm
+
+        # 背景 + 网格（在谱线之下）
+        self._static_bg = _layer(QColor(8, 12, 22))
+        p = QPainter(self._static_bg)
         p.setPen(QPen(QColor(20, 40, 60), 1))
         for k in range(1, 4):
-            y = spec_rect.top() + int(spec_h_px * k / 4)
-            p.drawLine(spec_rect.left(), y, spec_rect.right(), y)
+            y = int(spec_h_px * k / 4)
+            p.drawLine(0, y, spec_w - 1, y)
+        p.end()
 
-        # 谱线
-        p.setPen(QPen(QColor(120, 220, 160), 2))
-        last_x = spec_rect.left()
-        last_y = spec_rect.bottom()
-
-        for x in range(spec_w):
-            amp = float(spec_spectrum[x])
-            y = spec_rect.bottom() - int(amp * (spec_h_px - 2)) - 1
-            px = spec_rect.left() + x
-            if x > 0:
-                p.drawLine(last_x, last_y, px, y)
-            last_x, last_y = px, y
-
-        # 通道中心刻度
+        # 通道中心刻度（在谱线之上）
+        self._static_ticks = _layer(Qt.transparent)
+        p = QPainter(self._static_ticks)
         p.setPen(QPen(QColor(30, 80, 90), 1))
-        for cx in spec_centers:
-            px = spec_rect.left() + int(cx)
-            p.drawLine(px, spec_rect.bottom() - 8, px, spec_rect.bottom())
+        for cx in np.linspace(0, spec_w - 1, self.num_channels):
+            px = int(cx)
+            p.drawLine(px, spec_h_px - 9, px, spec_h_px - 1)
+        p.end()
 
-        # ==================================================
-        # 瀑布（关键：选择用包络 or 用 _wf_level）
-        # ==================================================
+    def _request_paint(self, scroll=True):
+        """只重绘变化区域：频谱区整块更新，瀑布区有新行时向上滚动一行，仅露出的最新行需要重绘。"""
+        if self.wf is None:
+            self.update()
+            return
+        self.update(self._spec_rect)
+        if scroll:
+            self.scroll(0, -1, self._wf_rect)
+
+    # ==================================================
+    # 瀑布新行（关键：选择用包络 or 用 _wf_level）
+    # ==================================================
+    def _push_waterfall_row(self, fft_fresh=False):
+        """写入一行瀑布，返回是否写入。FFT 模式下只有分析线程给出新结果时才写，避免按帧率重复同一行。"""
+        if self.wf is None:
+            return False
+        if self._fft_rgb is not None and len(self._fft_rgb) == self._wf_width:
+            if not fft_fresh:
+                return False
+            self.wf[self._wf_head] = self._fft_rgb
+            self._wf_head = (self._wf_head + 1) % self._wf_height
+            return True
         if self.waterfall_use_key_envelope:
             # 用“按键包络”驱动瀑布：短按不会被AGC/记忆拉长
             # 同时保留一点 flutter 观感（可选）
             base = self._env.copy()
             # 让亮度略带动态（像电台）
-            base = np.clip(base * (0.85 + 0.15 * (np.sin(self._phase + np.arange(self.num_channels) * 0.6) * 0.5 + 0.5)), 0.0, 1.0)
+            base = np.clip(base * (0.85 + 0.15 * (np.sin(self._phase + self._flutter_offsets) * 0.5 + 0.5)), 0.0, 1.0)
             disp = base.astype(np.float32)
         else:
             # 用 _wf_level（更像电台，但短按更可能拉长）
@@ -406,34 +619,95 @@ class MorseCodeVisualizer(QWidget):
             disp /= np.log1p(4.0 * self.display_gain)
             disp = np.clip(disp, 0.0, 1.0).astype(np.float32)
 
-        spectrum = np.zeros(self._wf_width, dtype=np.float32)
-        centers = np.linspace(0, self._wf_width - 1, self.num_channels)
-
-        for i, amp in enumerate(disp):
-            if amp < 0.02:
-                continue
-            cx = int(centers[i])
-            left = cx - self._if_half
-
-            k = self._if_kernel * amp
-            for j in range(len(k)):
-                x = left + j
-                if 0 <= x < self._wf_width:
-                    spectrum[x] += k[j]
-
-        if self._wf_width >= 3:
-            spectrum = np.convolve(spectrum, self._smooth_kernel, mode="same")
+        wf_amp = np.where(disp >= 0.02, disp, 0.0).astype(np.float32)
+        spectrum = wf_amp @ self._stamp_matrix("wf", self._wf_width, self._if_kernel, self._smooth_kernel)
 
         spectrum = np.clip(spectrum, 0.0, 1.2)
 
         x = self._wf_map(spectrum)
-        row_rgb = intensity_to_rgb_ic7300(x)
 
-        # 瀑布滚动：上旧下新
-        self.wf[:-1] = self.wf[1:]
-        self.wf[-1] = row_rgb
+        # 瀑布滚动：只写入一行，不搬移整个缓冲
+        self.wf[self._wf_head] = intensity_to_rgb_ic7300(x)
+        self._wf_head = (self._wf_head + 1) % self._wf_height
+        return True
 
-        img = QImage(self.wf.data, self._wf_width, self._wf_height, self._wf_width * 3, QImage.Format_RGB888)
-        p.drawImage(wf_rect, img)
+    # ==================================================
+    # 绘制
+    # ==================================================
+    def paintEvent(self, event):
+        if self.wf is None:
+            self._update_layout()
+        elif self._static_bg.devicePixelRatio() != self.devicePixelRatioF():
+            self._render_static_layers()
 
+        # 按区域中的各个矩形分别绘制：event.rect() 是外接矩形，
+        # 频谱区 + 瀑布最新一行的外接矩形会覆盖整个控件
+        p = QPainter(self)
+        spectrum_done = False
+        for dirty in event.region():
+            if not (self._spec_rect.contains(dirty) or self._wf_rect.contains(dirty)):
+                # 不透明绘制：边距部分需要自己填充背景
+                p.fillRect(dirty, self.palette().window())
+            if not spectrum_done and dirty.intersects(self._spec_rect):
+                self._draw_spectrum(p)
+                spectrum_done = True
+            if dirty.intersects(self._wf_rect):
+                self._draw_waterfall(p, dirty.intersected(self._wf_rect))
         p.end()
+
+        now = time.perf_counter()
+        if self._frame_t0:
+            self._frame_times.append((now - self._frame_t0) * 1000.0)
+            self._frame_t0 = 0.0
+        if self._last_frame_at:
+            self._frame_intervals.append((now - self._last_frame_at) * 1000.0)
+        self._last_frame_at = now
+
+    def _draw_spectrum(self, p):
+        """频谱图（用 _level）：缓存背景 -> 谱线 -> 缓存刻度。"""
+        spec_rect = self._spec_rect
+        p.drawPixmap(spec_rect.topLeft(), self._static_bg)
+
+        spec_disp = np.log1p(self._level * self.display_gain * 4.0)
+        spec_disp /= np.log1p(4.0 * self.display_gain)
+        spec_disp = np.clip(spec_disp, 0.0, 1.0).astype(np.float32)
+
+        spec_w = max(1, spec_rect.width())
+        spec_h_px = max(1, spec_rect.height())
+
+        if self._fft_level is not None and len(self._fft_level) == spec_w:
+            spec_spectrum = self._fft_level
+        else:
+            spec_amp = np.where(spec_disp >= 0.01, spec_disp, 0.0).astype(np.float32)
+            spec_spectrum = spec_amp @ self._stamp_matrix("spec", spec_w, self._spec_kernel)
+
+            spec_spectrum = np.clip(spec_spectrum, 0.0, 1.0)
+            if spec_w >= 3:
+                spec_spectrum = np.convolve(spec_spectrum, self._smooth_kernel, mode="same")
+
+        # 谱线：一次 drawPolyline
+        p.setPen(QPen(QColor(120, 220, 160), 2))
+        ys = spec_rect.bottom() - (spec_spectrum * (spec_h_px - 2)).astype(np.int32) - 1
+        self._spec_pts[:, 1] = ys
+        p.drawPolyline(self._spec_poly)
+
+        p.drawPixmap(spec_rect.topLeft(), self._static_ticks)
+
+    def _draw_waterfall(self, p, dirty):
+        """
+        按“上旧下新”绘制环形缓冲中与 dirty 相交的行：
+        显示第 i 行对应缓冲第 (head + i) % H 行，最多拆成两段连续切片。
+        """
+        head = self._wf_head
+        height = self._wf_height
+        wf_rect = self._wf_rect
+        r0 = max(0, dirty.top() - wf_rect.top())
+        r1 = min(height, dirty.bottom() - wf_rect.top() + 1)
+        for disp_start, buf_start, rows in ((0, head, height - head), (height - head, 0, head)):
+            a = max(r0, disp_start)
+            b = min(r1, disp_start + rows)
+            if b <= a:
+                continue
+            chunk = self.wf[buf_start + a - disp_start:buf_start + b - disp_start]
+            img = QImage(chunk.data, self._wf_width, b - a, self._wf_width * 3, QImage.Format_RGB888)
+            p.drawImage(QRect(wf_rect.left(), wf_rect.top() + a, self._wf_width, b - a), img)
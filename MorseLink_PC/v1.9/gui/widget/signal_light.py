@@ -23,6 +23,17 @@ class SignalLightWidget(QWidget):
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.switch_to_green)
 
+        # 按键时间线驱动：只用一个单次定时器对准下一个按下/抬起边沿
+        self.key_timeline = None
+        self.timeline_channel = None
+        self._timeline_red = False
+        self._rest_state = self.light_state
+        self._edge_due_ms = 0.0
+        self._edge_timer = QTimer(self)
+        self._edge_timer.setSingleShot(True)
+        self._edge_timer.setTimerType(Qt.PreciseTimer)
+        self._edge_timer.timeout.connect(self._sample_timeline)
+
     def set_state(self, state):
         """
         设置信号灯状态
@@ -32,7 +43,12 @@ class SignalLightWidget(QWidget):
                 1 - 红灯
                 2 - 绿灯
                 其他值 - 关闭状态
+
+        按键时间线亮红灯期间，其他状态先记下，抬键后再生效。
         """
+        if self._timeline_red and state != 1:
+            self._rest_state = state
+            return
         self.light_state = state
         self.update()
 
@@ -114,6 +130,51 @@ class SignalLightWidget(QWidget):
             (widget_height - 2 * self.padding) // 2
         )
 
+    def bind_key_timeline(self, timeline, channel=None):
+        """
+        按共享按键时间线亮灯：按下期间为红灯，抬起后恢复到按下前的状态。
+
+        Args:
+            timeline: KeyTimeline 实例
+            channel: 只跟随该通道；None 表示任一通道
+        """
+        if self.key_timeline is not None:
+            self.key_timeline.remove_listener(self._on_key_interval)
+        self.key_timeline = timeline
+        self.timeline_channel = channel
+        timeline.add_listener(self._on_key_interval)
+        self._sample_timeline()
+
+    def _on_key_interval(self, channel, t_on_ms, t_off_ms):
+        if self.timeline_channel is not None and channel != self.timeline_channel:
+            return
+        # 新区间早于已对准的边沿时才需要重新对准
+        if not self._edge_timer.isActive() or t_on_ms < self._edge_due_ms:
+            self._sample_timeline()
+
+    def _sample_timeline(self):
+        timeline = self.key_timeline
+        if timeline is None:
+            return
+        # 定时器可能提前约 1ms 触发，按略晚的时刻采样以免在边沿前空转
+        now = timeline.now_ms() + 1.0
+        down = timeline.is_down(now, self.timeline_channel)
+        if down and not self._timeline_red:
+            if self.light_state != 1:
+                self._rest_state = self.light_state
+                self._timeline_red = True
+                self.set_state(1)
+        elif not down and self._timeline_red:
+            self._timeline_red = False
+            self.set_state(self._rest_state)
+
+        edge = timeline.next_edge(now, self.timeline_channel)
+        if edge is None:
+            self._edge_timer.stop()
+            return
+        self._edge_due_ms = edge
+        self._edge_timer.start(max(0, int(round(edge - timeline.now_ms()))))
+
     def switch_to_green(self):
         """自动切换为绿灯状态并停止定时器"""
         self.set_state(2)
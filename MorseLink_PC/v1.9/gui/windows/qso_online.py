@@ -2,8 +2,7 @@ import re, string
 from datetime import datetime
 import math
 import time, json
-from collections import deque
-from PySide6.QtGui import  QFont
+from PySide6.QtGui import  QFont, QTextCursor
 from PySide6.QtWidgets import (
     QApplication,
     QWidget,
@@ -30,10 +29,14 @@ from utils.config_manager import ConfigManager
 from utils.database_tool import DatabaseTool
 from utils.multi_tablet_tool import MultiTableTool
 from utils.check_update import VersionChecker
-from utils.received_message_processor import MultiChannelProcessor
+from utils.received_message_processor import CatchUpPolicy, MultiChannelProcessor
+from utils.key_timeline import KeyTimeline
+from utils.spectrum_tap import AudioRing, SpectrumAnalyzer
+from utils.transcript_buffer import TranscriptBuffer
 
 from gui.widget.morsecode_visualizer import MorseCodeVisualizer
 from gui.widget.signal_light import SignalLightWidget
+from gui.widget.link_quality_panel import LinkQualityPanel
 from gui.dialog.general_setting_dialog import GeneralSettingDialog
 from gui.dialog.about_dialog import AboutDialog
 from gui.dialog.qso_record_dialog import QsoRecordDialog
@@ -42,7 +45,29 @@ from gui.dialog.transmitter_setting_dialog import TransmitterSettingDialog
 
 from service.signal.qt_signal import MySignal
 from service.mqtt_client import MQTTClient
+from service.connection_manager import Endpoint, EndpointLatencyTable, FailoverMQTTClient
+from service.mqtt_publisher import MQTTPublisher
+from service.channel_window import ChannelWindow
+from service.keyevent_protocol import (
+    PROTOCOL_NAME,
+    PROTOCOL_VERSION,
+    TOPIC_PREFIX,
+    build_key_event,
+    encode_key_event,
+    new_session_id,
+)
+from service.presence import (
+    PRESENCE_WILDCARD,
+    STATUS_OFFLINE,
+    PresenceRoster,
+    build_presence,
+    encode_presence,
+    presence_topic,
+)
 from service.keying_controller import AutoElementEvent
+from service.rx_session_state import RxSessionState, RxSessionTable
+from service.rx_telemetry import RxTelemetry
+from service.rx_rate_limiter import SenderRateLimiter, sender_key_of
 from service.tx_keying_runtime import TxKeyingRuntime
 from service.auth.credential_store import PlainConfigCredentialStore
 
@@ -86,10 +111,7 @@ class QSOOline(QWidget):
         self.config_manager = self.context.config_manager if self.context else ConfigManager()
 
 
-        self.morse_code = ""
         self.morse_code_received = ""
-        self.morse_code_translation = ""
-        self.received_translation = ""
         self.dot_duration = int(self.config_manager.get_dot_time())
         self.dash_duration = int(self.config_manager.get_dash_time())
         self.dot = "."
@@ -138,15 +160,16 @@ class QSOOline(QWidget):
         self._disconnect_requested = False
         self._last_connect_error = ""
         self.client = None
-        self._pending_send_msgs = deque()
-        self._send_flush_timer = QTimer(self)
-        self._send_flush_timer.setInterval(10)
-        self._send_flush_timer.timeout.connect(self._flush_send_queue)
+        self._publisher = None
         self._connect_spinner_frames = ("|", "/", "-", "\\")
         self._connect_spinner_index = 0
         self._connect_anim_timer = QTimer(self)
         self._connect_anim_timer.setInterval(120)
         self._connect_anim_timer.timeout.connect(self._tick_connecting_indicator)
+        self._endpoint_latency = EndpointLatencyTable()
+        self._persistent_session = self.config_manager.get_persistent_session()
+        self._rx_late_compress_ms = self.config_manager.get_late_compress_ms()
+        self._rx_late_skip_ms = self.config_manager.get_late_skip_ms()
         self._connect_timeout_timer = QTimer(self)
         self._connect_timeout_timer.setSingleShot(True)
         self._connect_timeout_timer.setInterval(10000)
@@ -156,19 +179,45 @@ class QSOOline(QWidget):
         self._topic_switch_timer.setInterval(250)
         self._topic_switch_timer.timeout.connect(self._apply_topic_window_update)
 
-
-        self._protocol_name = "morselink.keyevent"
-        self._protocol_version = 2
-        self._topic_prefix = "morselink/v2/keyevent"
-        self._side_channel_range = 5
+        self.presence_roster = PresenceRoster()
+        self._presence_timer = QTimer(self)
+        self._presence_timer.setSingleShot(True)
+        self._presence_timer.setInterval(500)
+        self._presence_timer.timeout.connect(self._publish_presence)
+
+
+        self._protocol_name = PROTOCOL_NAME
+        self._protocol_version = PROTOCOL_VERSION
+        self._topic_prefix = TOPIC_PREFIX
+        self._side_channel_range = self.config_manager.get_side_channel_range()
+        self._channel_window = ChannelWindow(
+            self._topic_prefix,
+            self.channel_name,
+            side_range=self._side_channel_range,
+            mode=self.config_manager.get_subscribe_mode(),
+        )
         self._desired_sub_topics = set()
         self._tx_clock_origin_ms = int(time.monotonic() * 1000)
-        self._tx_session_id = f"{str(self.config_manager.get_my_call() or 'UNKNOWN').upper()}-{int(time.time() * 1000)}"
+        self._tx_session_id = new_session_id(self.config_manager.get_my_call())
         self._tx_event_seq = 0
         self._tx_last_event_time_ms = -1
 
 
-        self._rx_event_states = {}
+        self._rx_session_ttl_ms = RxSessionTable.DEFAULT_TTL_MS
+        self._rx_session_max = RxSessionTable.DEFAULT_MAX_SESSIONS
+        self._rx_event_states = RxSessionTable(
+            ttl_ms=self._rx_session_ttl_ms,
+            max_sessions=self._rx_session_max,
+        )
+        self.rx_telemetry = RxTelemetry(
+            ttl_ms=self._rx_session_ttl_ms,
+            max_senders=self._rx_session_max,
+        )
+        self.rx_rate_limiter = SenderRateLimiter(
+            rate_per_s=self.config_manager.get_rx_rate_limit(),
+            burst=self.config_manager.get_rx_rate_burst(),
+            mute_ms=self.config_manager.get_rx_mute_ms(),
+        )
         self.call_of_sender = self.tr("未知台站")
         self._rx_active_same_key = None
 
@@ -184,10 +233,18 @@ class QSOOline(QWidget):
         self._rx_force_up_timer.setSingleShot(True)
         self._rx_force_up_timer.timeout.connect(self._force_finalize_stuck_keydown)
 
+        self._rx_reorder_max_events = self.config_manager.get_rx_reorder_max_events()
+        self._rx_reorder_hold_ms = self.config_manager.get_rx_reorder_hold_ms()
+        self._rx_reorder_keys = set()
+        self._rx_reorder_timer = QTimer(self)
+        self._rx_reorder_timer.setSingleShot(True)
+        self._rx_reorder_timer.timeout.connect(self._release_expired_rx_reorder)
+
 
 
         self.mysignal = MySignal()
         self.mysignal.process_received_signal.connect(self.process_messages)
+        self.mysignal.presence_changed_signal.connect(self._refresh_presence_label)
 
 
         self.translator = MorseCodeTranslator()
@@ -200,12 +257,21 @@ class QSOOline(QWidget):
         self._last_decode_text = None
         self._max_morse_buffer = 4096
         self._max_translation_buffer = 2048
+        # Bounded transcripts behind the four text panes; the panes only mirror them.
+        self._tx_morse_log = TranscriptBuffer(self._max_morse_buffer)
+        self._tx_text_log = TranscriptBuffer(self._max_translation_buffer)
+        self._rx_morse_log = TranscriptBuffer(self._max_morse_buffer)
+        self._rx_text_log = TranscriptBuffer(self._max_translation_buffer)
+        self._raw_view_source = None
+        self._raw_view_mark = None
 
 
         self.initUI()
 
 
         self.buzz = self.create_buzzer()
+        self.spectrum_analyzer = None
+        self._attach_spectrum_tap()
 
 
         self.last_sound_play_time = 0
@@ -236,11 +302,42 @@ class QSOOline(QWidget):
             return self.context.create_buzzer()
         return BuzzerSimulator()
 
+    def _attach_spectrum_tap(self):
+        """Feed the visualizer from the rendered audio (FFT mode) instead of synthetic kernels."""
+        if not self.config_manager.get_visualizer_fft_mode() or not hasattr(self.buzz, "set_audio_tap"):
+            self.release_spectrum_tap()
+            return
+        sample_rate = int(getattr(self.buzz, "sample_rate", 48000))
+        center_hz = float(self.config_manager.get_buzz_freq())
+        if self.spectrum_analyzer is None:
+            self.spectrum_analyzer = SpectrumAnalyzer(AudioRing(), sample_rate=sample_rate, center_hz=center_hz)
+            self.morsecode_visualizer.set_spectrum_source(self.spectrum_analyzer)
+            self.spectrum_analyzer.start()
+        else:
+            # The buzzer may have been recreated on another device or tone.
+            self.spectrum_analyzer.set_sample_rate(sample_rate)
+            self.spectrum_analyzer.center_hz = center_hz
+        self.buzz.set_audio_tap(self.spectrum_analyzer.ring)
+
+    def release_spectrum_tap(self):
+        """Detach the audio tap and stop the analyzer thread; safe to call repeatedly."""
+        if hasattr(self.buzz, "set_audio_tap"):
+            self.buzz.set_audio_tap(None)
+        if self.spectrum_analyzer is not None:
+            self.spectrum_analyzer.stop()
+            self.spectrum_analyzer = None
+            self.morsecode_visualizer.set_spectrum_source(None)
+
     def create_database_tool(self):
         if self.context and hasattr(self.context, "create_database_tool"):
             return self.context.create_database_tool()
         return DatabaseTool()
 
+    def create_mqtt_client(self, **kwargs):
+        if self.context and hasattr(self.context, "create_mqtt_client"):
+            return self.context.create_mqtt_client(**kwargs)
+        return MQTTClient(**kwargs)
+
     def center(self):
 
 
@@ -255,8 +352,10 @@ class QSOOline(QWidget):
 
     def focusOutEvent(self, event):
         self.buzz.stop()
+        # Tones already committed to the audio timeline would otherwise keep sounding.
+        self.buzz.clear_scheduled_tones()
 
-        self.morsecode_visualizer.stop_generating(5)
+        self.morsecode_visualizer.stop_generating(self._side_channel_range)
 
         self.signal_light.set_state(0)
 
@@ -422,10 +521,14 @@ class QSOOline(QWidget):
         self.vbox_message.addWidget(self.edit_morse_code)
 
 
-        self.morsecode_visualizer = MorseCodeVisualizer()
+        self.morsecode_visualizer = MorseCodeVisualizer(num_channels=2 * self._side_channel_range + 1)
         self.morsecode_visualizer.enable_adaptive_fps = False
         self.morsecode_visualizer.fps_ms = 16
-        self.morsecode_visualizer.timer.start(16)
+        # Single presentation timeline shared by the waterfall and the signal light;
+        # receive playback and generate_blocks() both write into it.
+        self.key_timeline = KeyTimeline()
+        self.morsecode_visualizer.set_key_timeline(self.key_timeline)
+        self.signal_light.bind_key_timeline(self.key_timeline)
 
         self.vbox_message.addWidget(self.morsecode_visualizer, stretch=3)
 
@@ -448,12 +551,6 @@ class QSOOline(QWidget):
         self._decoder_refresh_timer.setInterval(40)
         self._decoder_refresh_timer.timeout.connect(self._refresh_decoder_panel)
 
-        self.edit_received_translation.textChanged.connect(self._schedule_decoder_refresh)
-        self.edit_send_translation.textChanged.connect(self._schedule_decoder_refresh)
-        self.edit_morse_received.textChanged.connect(self._schedule_decoder_refresh)
-        self.edit_morse_code.textChanged.connect(self._schedule_decoder_refresh)
-
-
         self._refresh_decoder_panel()
 
 
@@ -464,25 +561,22 @@ class QSOOline(QWidget):
         if not self._decoder_refresh_timer.isActive():
             self._decoder_refresh_timer.start()
 
-    def _append_morse_out(self, text: str):
+    def _append_to_pane(self, log, edit, text):
+        """Append to a transcript; the pane is only reset when a whole block was trimmed."""
         if not text:
             return
-        self.morse_code += text
-        if len(self.morse_code) > self._max_morse_buffer:
-            self.morse_code = self.morse_code[-self._max_morse_buffer:]
-            self.edit_morse_code.setText(self.morse_code)
-            return
-        self.edit_morse_code.insert(text)
+        if log.append(text):
+            edit.setText(log.text())
+        else:
+            edit.end(False)
+            edit.insert(text)
+        self._schedule_decoder_refresh()
+
+    def _append_morse_out(self, text: str):
+        self._append_to_pane(self._tx_morse_log, self.edit_morse_code, text)
 
     def _append_send_translation_out(self, text: str):
-        if not text:
-            return
-        self.morse_code_translation += text
-        if len(self.morse_code_translation) > self._max_translation_buffer:
-            self.morse_code_translation = self.morse_code_translation[-self._max_translation_buffer:]
-            self.edit_send_translation.setText(self.morse_code_translation)
-            return
-        self.edit_send_translation.insert(text)
+        self._append_to_pane(self._tx_text_log, self.edit_send_translation, text)
 
     def _capture_scale_metrics(self):
         if self._scale_metrics_ready:
@@ -923,6 +1017,9 @@ class QSOOline(QWidget):
 
         v.addWidget(card_tx)
 
+        self.link_quality_panel = LinkQualityPanel(self.rx_telemetry, rate_limiter=self.rx_rate_limiter)
+        v.addWidget(self.link_quality_panel)
+
         v.addStretch(1)
         return right
 
@@ -1037,8 +1134,9 @@ class QSOOline(QWidget):
 
     def _refresh_decoder_panel(self):
 
-        recv_text = (self.edit_received_translation.text() or "").strip()
-        send_text = (self.edit_send_translation.text() or "").strip()
+        # Only bounded tails are read, so the cost does not grow with the session.
+        recv_text = self._rx_text_log.tail(128).strip()
+        send_text = self._tx_text_log.tail(128).strip()
 
 
         result = recv_text if recv_text else send_text
@@ -1057,37 +1155,59 @@ class QSOOline(QWidget):
             self._set_decision_blocks("", active_index=-1)
 
 
-        raw_recv = (self.edit_morse_received.text() or "")
-        raw_send = (self.edit_morse_code.text() or "")
-        raw = raw_recv if raw_recv else raw_send
+        self._refresh_raw_morse_view(self._rx_morse_log if self._rx_morse_log else self._tx_morse_log)
 
+    def _refresh_raw_morse_view(self, source, limit=600):
+        """Apply only the text appended since the last refresh, trimming the head by cursor."""
+        delta = None
+        if source is self._raw_view_source and self._last_raw_tail is not None:
+            delta = source.delta_since(self._raw_view_mark)
+        self._raw_view_source = source
+        self._raw_view_mark = source.mark()
 
-        raw_tail = raw[-600:] if len(raw) > 600 else raw
-        if raw_tail != self._last_raw_tail:
+        if delta is None:
+            raw_tail = source.tail(limit)
+            if raw_tail == self._last_raw_tail:
+                return
             self.lbl_raw_morse.setPlainText(raw_tail)
             self._last_raw_tail = raw_tail
-            sb = self.lbl_raw_morse.verticalScrollBar()
-            sb.setValue(sb.maximum())
+        elif delta:
+            cursor = QTextCursor(self.lbl_raw_morse.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(delta[-limit:])
+            overflow = self.lbl_raw_morse.document().characterCount() - 1 - limit
+            if overflow > 0:
+                cursor.movePosition(QTextCursor.Start)
+                cursor.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, overflow)
+                cursor.removeSelectedText()
+            self._last_raw_tail = source.tail(limit)
+        else:
+            return
+        sb = self.lbl_raw_morse.verticalScrollBar()
+        sb.setValue(sb.maximum())
 
 
     def _topic_for_channel(self, channel):
-        return f"{self._topic_prefix}/{int(channel)}"
+        return self._channel_window.topic_for_channel(channel)
 
     def _build_subscribe_topics(self, center_channel):
+        """Move the channel window to center_channel and return its topic set."""
         try:
             center = int(center_channel)
         except (TypeError, ValueError):
             center = int(self.channel_name)
 
-        min_channel = int(self.slider_frequency.minimum())
-        max_channel = int(self.slider_frequency.maximum())
-        lower = max(min_channel, center - int(self._side_channel_range))
-        upper = min(max_channel, center + int(self._side_channel_range))
-        return {self._topic_for_channel(ch) for ch in range(lower, upper + 1)}
+        window = self._channel_window
+        window.min_channel = int(self.slider_frequency.minimum())
+        window.max_channel = int(self.slider_frequency.maximum())
+        window.side_range = int(self._side_channel_range)
+        window.set_center(center)
+        return window.subscribe_topics()
 
     def _sync_topic_targets(self, apply_now=False):
         publish_topic = self._topic_for_channel(self.channel_name)
         subscribe_topics = self._build_subscribe_topics(self.channel_name)
+        topics_unchanged = subscribe_topics == self._desired_sub_topics
         self._desired_sub_topics = set(subscribe_topics)
 
         if not self.client:
@@ -1100,7 +1220,8 @@ class QSOOline(QWidget):
             self.client.replace_subscriptions(subscribe_topics)
             return
 
-        if apply_now:
+        # Wildcard mode keeps one subscription, so retuning only moves the local filter.
+        if apply_now or topics_unchanged:
             self._topic_switch_timer.stop()
             self._apply_topic_window_update()
             return
@@ -1123,6 +1244,9 @@ class QSOOline(QWidget):
         self.channel_name = frequency
         self.config_manager.set_server_channel_name(frequency)
         self._sync_topic_targets(apply_now=False)
+        if self.is_connected:
+            self._presence_timer.start()
+        self._refresh_presence_label()
 
     def initSetting(self):
 
@@ -1158,6 +1282,15 @@ class QSOOline(QWidget):
             self.buzz,
             self.morsecode_visualizer,
             self.signal_light,
+            max_pending=self.config_manager.get_rx_pending_limit(),
+            channel_count=2 * self._side_channel_range + 1,
+            catch_up=CatchUpPolicy(
+                compress_ms=self.config_manager.get_rx_catchup_compress_ms(),
+                gap_cap_ms=self.config_manager.get_rx_catchup_gap_cap_ms(),
+                speedup=self.config_manager.get_rx_catchup_speedup(),
+                skip_ms=self.config_manager.get_rx_catchup_skip_ms(),
+            ),
+            key_timeline=self.key_timeline,
         )
         self._sync_topic_targets(apply_now=False)
 
@@ -1207,6 +1340,7 @@ class QSOOline(QWidget):
                 self.client.close()
             except Exception:
                 pass
+        self._stop_publisher()
         QMessageBox.warning(self, self.tr("错误"), self.tr("连接超时，请检查网络或服务器配置"))
 
     def connectService(self):
@@ -1222,8 +1356,7 @@ class QSOOline(QWidget):
                 self._topic_switch_timer.stop()
                 if self.client:
                     self.client.close()
-                self._pending_send_msgs.clear()
-                self._send_flush_timer.stop()
+                self._stop_publisher()
                 self.btn_connect_and_disconnect.setText(self.tr("连接服务器"))
                 self.label_conn_state.setText(self.tr("状态：未连接"))
                 self.signal_light.set_state(0)
@@ -1275,32 +1408,112 @@ class QSOOline(QWidget):
 
         self._tx_clock_origin_ms = int(time.monotonic() * 1000)
         self._tx_event_seq = 0
-        self._tx_session_id = f"{str(user).upper()}-{int(time.time() * 1000)}"
+        self._tx_session_id = new_session_id(user)
         self._tx_last_event_time_ms = -1
         publish_topic = self._topic_for_channel(self.channel_name)
         subscribe_topics = self._build_subscribe_topics(self.channel_name)
         self._desired_sub_topics = set(subscribe_topics)
 
-        self.client = MQTTClient(
-            broker=host,
-            port=port,
-            username=str(user),
-            password=str(pwd),
-            client_id=self.my_call + str(time.time()),
-            use_tls=use_tls,
-            tls_ca_certs=(tls_ca_certs if use_tls and tls_use_cert else ""),
-            tls_insecure=(tls_insecure if use_tls else False),
-        )
+        self._persistent_session = self.config_manager.get_persistent_session()
+        if self._persistent_session:
+            # The broker finds the stored session by client id, so it must survive reconnects.
+            client_id = f"{self.my_call}-{self.config_manager.get_client_instance_id()}"
+        else:
+            client_id = self.my_call + str(time.time())
+        message_expiry_s = self.config_manager.get_key_event_expiry_s()
+        if self._persistent_session and message_expiry_s:
+            # Keep queued events long enough for the late-event catch-up to still decode them.
+            message_expiry_s = max(message_expiry_s, int(math.ceil(self._rx_late_skip_ms / 1000.0)))
+        session_kwargs = {
+            "persistent_session": self._persistent_session,
+            "protocol": self.config_manager.get_mqtt_protocol(),
+            "message_expiry_s": message_expiry_s,
+            "session_expiry_s": self.config_manager.get_session_expiry_s(),
+        }
+        endpoints = []
+        if self.config_manager.get_endpoint_racing():
+            endpoints = [Endpoint(*item) for item in self.config_manager.get_server_endpoint_list()]
+        if len(endpoints) > 1:
+            self.client = FailoverMQTTClient(
+                endpoints,
+                client_factory=self.create_mqtt_client,
+                client_kwargs={
+                    "username": str(user),
+                    "password": str(pwd),
+                    "tls_ca_certs": (tls_ca_certs if tls_use_cert else ""),
+                    "tls_insecure": (not tls_use_cert),
+                    **session_kwargs,
+                },
+                stagger_ms=self.config_manager.get_endpoint_stagger_ms(),
+                latency_table=self._endpoint_latency,
+                client_id=client_id,
+            )
+        else:
+            self.client = self.create_mqtt_client(
+                broker=host,
+                port=port,
+                username=str(user),
+                password=str(pwd),
+                client_id=client_id,
+                use_tls=use_tls,
+                tls_ca_certs=(tls_ca_certs if use_tls and tls_use_cert else ""),
+                tls_insecure=(tls_insecure if use_tls else False),
+                **session_kwargs,
+            )
 
         self.client.on_message_received = self.on_message_received
         self.client.on_connection_status_change = self.on_connection_status_change
+        self.client.topic_filter = self._channel_window.accepts_topic
+        self.client.add_route(PRESENCE_WILDCARD, self._on_presence_message)
+        self.client.set_will(
+            presence_topic(self.my_call),
+            encode_presence(build_presence(self.my_call, None, STATUS_OFFLINE, self._tx_session_id)),
+            retain=True,
+        )
+        self._start_publisher(self.client)
         ok = self.client.connect(publish_topic, subscribe_topics=subscribe_topics)
         if not ok:
             self._last_connect_error = getattr(self.client, "last_error", "") or self.tr("无法启动连接，请检查服务器地址/端口")
         return ok
 
-    def on_message_received(self, message):
+    def _on_presence_message(self, topic, text):
+        # Network thread: update the roster here, repaint on the GUI thread.
+        if self.presence_roster.apply(topic, text):
+            self.mysignal.presence_changed_signal.emit()
 
+    def _publish_presence(self):
+        if not self.client or not self.is_connected:
+            return
+        self.client.publish_to(
+            presence_topic(self.my_call),
+            encode_presence(build_presence(self.my_call, self.channel_name, session_id=self._tx_session_id)),
+            retain=True,
+        )
+
+    def _refresh_presence_label(self):
+        if not self.is_connected:
+            self.label_number_clients.setText(self.tr("当前人数: 未连接服务器"))
+            self.label_number_clients.setToolTip("")
+            self.label_number_clients.hide()
+            return
+
+        calls = self.presence_roster.calls_on(self.channel_name)
+        self.label_number_clients.setText(
+            self.tr("在线 {0} 人 · 本频道 {1} 人").format(self.presence_roster.total, len(calls))
+        )
+        window = self._channel_window
+        lines = []
+        for channel in range(window.lower, window.upper + 1):
+            on_channel = self.presence_roster.calls_on(channel)
+            if on_channel:
+                lines.append(f"{channel}: {', '.join(on_channel)}")
+        self.label_number_clients.setToolTip("\n".join(lines))
+        self.label_number_clients.show()
+
+    def on_message_received(self, message):
+        # Network thread: drop floods here so they never queue up on the GUI thread.
+        if not self.rx_rate_limiter.allow(sender_key_of(message), time.monotonic() * 1000):
+            return
         self.mysignal.process_received_signal.emit(message)
     def _first_non_empty(self, data, keys, default=None):
         if not isinstance(data, dict):
@@ -1374,43 +1587,49 @@ class QSOOline(QWidget):
         return payload
 
     def _rx_state_key(self, payload):
-        return (payload["myCall"].upper(), payload["session_id"], int(payload["myChannel"]))
-
-    def _drop_stale_session_states(self, payload):
-        sender = str(payload.get("myCall", "")).upper()
-        channel = int(payload.get("myChannel", self.channel_name))
-        session_id = str(payload.get("session_id", ""))
-        stale_keys = [
-            key for key in list(self._rx_event_states.keys())
-            if key[0] == sender and key[2] == channel and key[1] != session_id
-        ]
-        if not stale_keys:
-            return
-        if self._rx_active_same_key in stale_keys:
+        return RxSessionTable.key_for(payload)
+
+    def _forget_rx_state_keys(self, keys):
+        self._rx_reorder_keys.difference_update(keys)
+        if self._rx_active_same_key is not None and self._rx_active_same_key in keys:
             self._cancel_rx_finalize_timers()
             self._rx_active_same_key = None
-        for key in stale_keys:
-            self._rx_event_states.pop(key, None)
 
     def _new_rx_state(self, payload):
-        return {
-            "sender_call": payload["myCall"],
-            "session_id": payload["session_id"],
-            "channel": int(payload["myChannel"]),
-            "last_seq": -1,
-            "is_down": False,
-            "down_time_ms": None,
-            "last_up_time_ms": None,
-            "symbol_buffer": "",
-            "dot_ms_hint": payload["dot_ms_hint"],
-            "dash_ms_hint": payload["dash_ms_hint"],
-            "letter_gap_ms_hint": payload["letter_gap_ms_hint"],
-            "word_gap_ms_hint": payload["word_gap_ms_hint"],
-            "last_rx_wallclock_ms": int(time.monotonic() * 1000),
-            "max_hold_timeout_ms": max(1200, payload["dash_ms_hint"] * 4),
-            "last_event_time_ms": -1,
-            "last_event_type": "",
-        }
+        return RxSessionState.from_payload(
+            payload,
+            int(time.monotonic() * 1000),
+            reorder_max_events=self._rx_reorder_max_events,
+            reorder_hold_ms=self._rx_reorder_hold_ms,
+        )
+
+    def _clear_rx_reorder(self):
+        self._rx_reorder_keys.clear()
+        self._rx_reorder_timer.stop()
+
+    def _arm_rx_reorder_timer(self, now_ms):
+        deadline = None
+        for key in list(self._rx_reorder_keys):
+            state = self._rx_event_states.get(key)
+            if state is None or state.reorder.deadline_ms is None:
+                self._rx_reorder_keys.discard(key)
+                continue
+            if deadline is None or state.reorder.deadline_ms < deadline:
+                deadline = state.reorder.deadline_ms
+        if deadline is None:
+            self._rx_reorder_timer.stop()
+            return
+        self._rx_reorder_timer.start(max(0, int(deadline - now_ms)))
+
+    def _release_expired_rx_reorder(self):
+        now_ms = int(time.monotonic() * 1000)
+        for key in list(self._rx_reorder_keys):
+            state = self._rx_event_states.get(key)
+            if state is None:
+                continue
+            for payload in state.reorder.expire(now_ms):
+                self._apply_rx_event(key, state, payload, now_ms)
+        self._arm_rx_reorder_timer(now_ms)
 
     def _cancel_rx_finalize_timers(self):
         self._rx_letter_timer.stop()
@@ -1420,30 +1639,26 @@ class QSOOline(QWidget):
 
     def _arm_rx_finalize_timers(self, state_key, state):
         self._rx_active_same_key = state_key
-        letter_gap = max(50, int(state["letter_gap_ms_hint"]))
-        word_gap = max(letter_gap + 50, int(state["word_gap_ms_hint"]))
+        letter_gap = max(50, int(state.letter_gap_ms_hint))
+        word_gap = max(letter_gap + 50, int(state.word_gap_ms_hint))
         self._rx_word_tail_delay_ms = max(50, word_gap - letter_gap)
         self._rx_word_timer.stop()
         self._rx_letter_timer.start(letter_gap)
 
     def _arm_rx_force_up_timer(self, state_key, state):
         self._rx_active_same_key = state_key
-        self._rx_force_up_timer.start(max(200, int(state["max_hold_timeout_ms"])))
+        self._rx_force_up_timer.start(max(200, int(state.max_hold_timeout_ms)))
 
     def _append_received_morse(self, text):
-        if not text:
-            return
-        self.edit_morse_received.insert(text)
+        self._append_to_pane(self._rx_morse_log, self.edit_morse_received, text)
 
     def _append_received_translation(self, text):
-        if not text:
-            return
-        self.edit_received_translation.insert(text)
+        self._append_to_pane(self._rx_text_log, self.edit_received_translation, text)
 
     def _duration_to_symbol(self, duration_ms, state):
         duration_ms = max(1, int(duration_ms))
-        dot_ms = max(20, int(state.get("dot_ms_hint", self.dot_duration)))
-        dash_ms = max(dot_ms * 2, int(state.get("dash_ms_hint", self.dash_duration)))
+        dot_ms = max(20, int(state.dot_ms_hint or self.dot_duration))
+        dash_ms = max(dot_ms * 2, int(state.dash_ms_hint or self.dash_duration))
         threshold = int((dot_ms + dash_ms) / 2)
         return "." if duration_ms < threshold else "-"
 
@@ -1452,14 +1667,14 @@ class QSOOline(QWidget):
         if not state:
             return
 
-        symbol_buffer = str(state.get("symbol_buffer", ""))
+        symbol_buffer = state.symbol_buffer
         if not symbol_buffer and not append_word_space:
             return
 
         if symbol_buffer:
             translated = self.translator.letter_to_morse(symbol_buffer)
             self._append_received_translation(translated)
-            state["symbol_buffer"] = ""
+            state.symbol_buffer = ""
             self.morse_code_received = ""
 
         if append_word_space:
@@ -1472,8 +1687,8 @@ class QSOOline(QWidget):
         if gap_ms is None:
             return
 
-        letter_gap = int(state.get("letter_gap_ms_hint", self.letter_interval_duration))
-        word_gap = int(state.get("word_gap_ms_hint", self.word_interval_duration))
+        letter_gap = int(state.letter_gap_ms_hint or self.letter_interval_duration)
+        word_gap = int(state.word_gap_ms_hint or self.word_interval_duration)
         if gap_ms >= word_gap:
             self._flush_receive_symbol_buffer(state_key, append_word_space=True)
         elif gap_ms >= letter_gap:
@@ -1498,19 +1713,29 @@ class QSOOline(QWidget):
         gap_before_ms = max(0, int(gap_before_ms))
         symbol = self._duration_to_symbol(press_ms, state)
 
+        # Events replayed after a reconnect: compress gaps, or only decode when far behind.
+        late_ms = int(state.late_ms)
+        playback = not (self._rx_late_skip_ms and late_ms >= self._rx_late_skip_ms)
+        if playback and self._rx_late_compress_ms and late_ms >= self._rx_late_compress_ms:
+            gap_before_ms = min(gap_before_ms, max(1, int(state.dot_ms_hint or self.dot_duration)))
+
         if same_channel:
-            state["symbol_buffer"] = str(state.get("symbol_buffer", "")) + symbol
+            state.symbol_buffer += symbol
             self._append_received_morse(symbol)
             self.start_record_receive(symbol)
+            if arm_finalize_timers:
+                self._arm_rx_finalize_timers(state_key, state)
+            if not playback:
+                return
             self.receive_message_processor.receive_message(
-                5,
+                self.receive_message_processor.main_channel_id,
                 [press_ms, gap_before_ms],
                 play_audio=bool(self.receive_buzz_status),
             )
-            if arm_finalize_timers:
-                self._arm_rx_finalize_timers(state_key, state)
             return
 
+        if not playback:
+            return
         result = self.process_side_channel(self.channel_name, my_channel, range_limit=self._side_channel_range)
         if result["is_within_range"]:
             self.receive_message_processor.receive_message(
@@ -1525,7 +1750,7 @@ class QSOOline(QWidget):
         state = self._rx_event_states.get(self._rx_active_same_key)
         if not state:
             return
-        has_symbol = bool(str(state.get("symbol_buffer", "")))
+        has_symbol = bool(state.symbol_buffer)
         self._flush_receive_symbol_buffer(self._rx_active_same_key, append_word_space=False)
         if has_symbol:
             self._rx_word_timer.start(max(50, int(self._rx_word_tail_delay_ms)))
@@ -1542,18 +1767,18 @@ class QSOOline(QWidget):
         if state_key is None:
             return
         state = self._rx_event_states.get(state_key)
-        if not state or not state.get("is_down"):
+        if not state or not state.is_down:
             return
 
-        down_time_ms = int(state.get("down_time_ms") or 0)
-        prev_up = state.get("last_up_time_ms")
-        press_ms = int(state.get("max_hold_timeout_ms", max(self.dot_duration, self.dash_duration)))
+        down_time_ms = int(state.down_time_ms or 0)
+        prev_up = state.last_up_time_ms
+        press_ms = int(state.max_hold_timeout_ms or max(self.dot_duration, self.dash_duration))
         gap_before_ms = max(0, down_time_ms - int(prev_up)) if prev_up is not None else 0
-        same_channel = str(state.get("channel")) == str(self.channel_name)
-        my_channel = int(state.get("channel", self.channel_name))
-        state["is_down"] = False
-        state["down_time_ms"] = None
-        state["last_up_time_ms"] = down_time_ms + press_ms
+        same_channel = str(state.channel) == str(self.channel_name)
+        my_channel = int(state.channel)
+        state.is_down = False
+        state.down_time_ms = None
+        state.last_up_time_ms = down_time_ms + press_ms
         self._consume_received_press(
             state_key=state_key,
             state=state,
@@ -1577,39 +1802,62 @@ class QSOOline(QWidget):
         sender_call = payload["myCall"]
         if sender_call.lower() == str(self.my_call).strip().lower():
             return
+        if not self._channel_window.accepts_channel(payload["myChannel"]):
+            return
+
+        now_ms = int(time.monotonic() * 1000)
+        self._forget_rx_state_keys(self._rx_event_states.evict_idle(now_ms))
 
         state_key = self._rx_state_key(payload)
         state = self._rx_event_states.get(state_key)
         if state is None:
-            self._drop_stale_session_states(payload)
             state = self._new_rx_state(payload)
-            self._rx_event_states[state_key] = state
+            stale_key = self._rx_event_states.insert(state_key, state)
+            if stale_key is not None:
+                self._forget_rx_state_keys((stale_key,))
 
         seq = int(payload["seq"])
-        if seq <= int(state.get("last_seq", -1)):
+        event_time_ms = int(payload["event_time_ms"])
+        self.rx_telemetry.observe(
+            sender_call,
+            payload["myChannel"],
+            payload["session_id"],
+            seq,
+            event_time_ms,
+            now_ms,
+        )
+        released = state.reorder.push(seq, payload, now_ms)
+        for item in released:
+            self._apply_rx_event(state_key, state, item, now_ms)
+        if state.reorder.deadline_ms is not None:
+            self._rx_reorder_keys.add(state_key)
+            self._arm_rx_reorder_timer(now_ms)
+
+    def _apply_rx_event(self, state_key, state, payload, now_ms):
+        """Run one in-order key event of a sender through the receive state machine."""
+        sender_call = payload["myCall"]
+        seq = int(payload["seq"])
+        event_time_ms = int(payload["event_time_ms"])
+        if seq <= state.last_seq:
             return
 
-        event_time_ms = int(payload["event_time_ms"])
         event_type = payload["event"]
-        last_event_type = str(state.get("last_event_type", ""))
-        last_event_time = int(state.get("last_event_time_ms", -1))
+        last_event_type = state.last_event_type
+        last_event_time = state.last_event_time_ms
         if (
             event_type == last_event_type
             and last_event_time >= 0
             and 0 <= (event_time_ms - last_event_time) <= self._rx_debounce_window_ms
         ):
+            self.rx_telemetry.record_debounce_drop(sender_call, payload["myChannel"], now_ms)
             return
 
-        state["last_seq"] = seq
-        state["last_event_type"] = event_type
-        state["last_event_time_ms"] = event_time_ms
-        state["last_rx_wallclock_ms"] = int(time.monotonic() * 1000)
-
-        state["dot_ms_hint"] = payload["dot_ms_hint"]
-        state["dash_ms_hint"] = payload["dash_ms_hint"]
-        state["letter_gap_ms_hint"] = payload["letter_gap_ms_hint"]
-        state["word_gap_ms_hint"] = payload["word_gap_ms_hint"]
-        state["max_hold_timeout_ms"] = max(1200, payload["dash_ms_hint"] * 4)
+        state.last_seq = seq
+        state.last_event_type = event_type
+        state.last_event_time_ms = event_time_ms
+        self._rx_event_states.touch(state_key, now_ms)
+        state.observe_arrival(event_time_ms, now_ms)
+        state.apply_timing_hints(payload)
 
         my_channel = int(payload["myChannel"])
         same_channel = str(my_channel) == str(self.channel_name)
@@ -1625,18 +1873,18 @@ class QSOOline(QWidget):
                 self._cancel_rx_finalize_timers()
 
 
-            if state.get("is_down") and state.get("down_time_ms") is not None:
-                prev_down_ms = int(state["down_time_ms"])
-                prev_up = state.get("last_up_time_ms")
+            if state.is_down and state.down_time_ms is not None:
+                prev_down_ms = int(state.down_time_ms)
+                prev_up = state.last_up_time_ms
                 gap_before_ms = max(0, prev_down_ms - int(prev_up)) if prev_up is not None else 0
-                max_hold_ms = int(state.get("max_hold_timeout_ms", max(self.dot_duration, self.dash_duration)))
+                max_hold_ms = int(state.max_hold_timeout_ms or max(self.dot_duration, self.dash_duration))
                 if event_time_ms > prev_down_ms:
                     press_ms = min(max_hold_ms, max(1, event_time_ms - prev_down_ms))
                 else:
-                    press_ms = max(1, min(max_hold_ms, int(state.get("dash_ms_hint", self.dash_duration))))
-                state["is_down"] = False
-                state["down_time_ms"] = None
-                state["last_up_time_ms"] = prev_down_ms + press_ms
+                    press_ms = max(1, min(max_hold_ms, int(state.dash_ms_hint or self.dash_duration)))
+                state.is_down = False
+                state.down_time_ms = None
+                state.last_up_time_ms = prev_down_ms + press_ms
                 self._consume_received_press(
                     state_key=state_key,
                     state=state,
@@ -1649,28 +1897,28 @@ class QSOOline(QWidget):
 
             if same_channel:
                 gap_ms = None
-                if state.get("last_up_time_ms") is not None:
-                    gap_ms = max(0, event_time_ms - int(state["last_up_time_ms"]))
+                if state.last_up_time_ms is not None:
+                    gap_ms = max(0, event_time_ms - int(state.last_up_time_ms))
                 self._apply_receive_gap(state_key, state, gap_ms)
 
-            state["is_down"] = True
-            state["down_time_ms"] = event_time_ms
+            state.is_down = True
+            state.down_time_ms = event_time_ms
             if same_channel:
                 self._arm_rx_force_up_timer(state_key, state)
             return
 
 
-        if not state.get("is_down") or state.get("down_time_ms") is None:
+        if not state.is_down or state.down_time_ms is None:
             return
 
-        down_time_ms = int(state["down_time_ms"])
+        down_time_ms = int(state.down_time_ms)
         press_ms = max(1, event_time_ms - down_time_ms)
-        prev_up = state.get("last_up_time_ms")
+        prev_up = state.last_up_time_ms
         gap_before_ms = max(0, down_time_ms - int(prev_up)) if prev_up is not None else 0
 
-        state["is_down"] = False
-        state["down_time_ms"] = None
-        state["last_up_time_ms"] = event_time_ms
+        state.is_down = False
+        state.down_time_ms = None
+        state.last_up_time_ms = event_time_ms
         if same_channel:
             self._rx_force_up_timer.stop()
         self._consume_received_press(
@@ -1730,15 +1978,25 @@ class QSOOline(QWidget):
             self.signal_light.set_state(2)
             self.label_conn_state.setText(self.tr("状态：已连接"))
             self._sync_topic_targets(apply_now=True)
+            self._publish_presence()
         else:
 
             self.is_connected = is_connected
             self._topic_switch_timer.stop()
-            self._pending_send_msgs.clear()
-            self._send_flush_timer.stop()
-            self._rx_event_states.clear()
+            if self._publisher:
+                self._publisher.clear()
+            # A persistent session resumes after a drop, so keep receive state for the replay.
+            if not (self._persistent_session and not self._disconnect_requested):
+                self._rx_event_states.clear()
+                self._clear_rx_reorder()
+            self._presence_timer.stop()
+            self.presence_roster.clear()
+            self._refresh_presence_label()
             self._rx_active_same_key = None
             self._cancel_rx_finalize_timers()
+            # Only a user disconnect stops queued playback; a drop or failover lets it finish.
+            if self._disconnect_requested:
+                self.receive_message_processor.clear()
             self.label_conn_state.setText(self.tr("状态：未连接"))
 
             self.btn_connect_and_disconnect.setText(self.tr("连接服务器"))
@@ -1759,6 +2017,8 @@ class QSOOline(QWidget):
         self.rx_tx_lock_tail_ms = int(self.config_manager.get_rx_tx_lock_tail_ms())
         self.send_buzz_status = self.config_manager.get_send_buzz_status()
         self.receive_buzz_status = self.config_manager.get_receive_buzz_status()
+        if not self.receive_buzz_status:
+            self.buzz.clear_scheduled_tones()
         self.saved_key = self.config_manager.get_keyborad_key().split(',')
         if hasattr(self, "tx_runtime") and self.tx_runtime:
             self.tx_runtime.refresh_runtime(
@@ -1802,27 +2062,27 @@ class QSOOline(QWidget):
         self.send_key_event_to_server(event_type, event_time_ms)
 
     def _tx_runtime_on_manual_down(self):
-        self.morsecode_visualizer.start_generating(5)
+        self.morsecode_visualizer.start_generating(self._side_channel_range)
         self.signal_light.set_state(1)
 
     def _tx_runtime_on_manual_up_begin(self):
-        self.morsecode_visualizer.stop_generating(5)
+        self.morsecode_visualizer.stop_generating(self._side_channel_range)
         self.signal_light.set_state(2)
 
     def _tx_runtime_on_manual_symbol(self, morse_code, duration_ms, gap_ms, manual_duration_ms):
         self.update_sent_label(morse_code, duration_ms, gap_ms)
         fps_ms = max(1, int(getattr(self.morsecode_visualizer, "fps_ms", 40) or 40))
         if manual_duration_ms < float(fps_ms):
+            # The blip goes into the shared key timeline, which also drives the light.
             self.show_visualizer(
                 morse_code,
                 keydown_ms=max(0.5, manual_duration_ms),
                 gap_ms=gap_ms,
             )
-            self.signal_light.switch_to_red_for_duration(max(1, int(math.ceil(max(1.0, manual_duration_ms)))))
 
     def _tx_runtime_on_auto_symbol(self, event: AutoElementEvent):
+        # The light follows the shared key timeline written by show_visualizer().
         self.show_visualizer(event.symbol, event.keydown_ms, event.gap_ms)
-        self.signal_light.switch_to_red_for_duration(event.keydown_ms)
         self.update_sent_label(event.symbol, event.keydown_ms, event.gap_ms)
 
     def _tx_runtime_on_auto_stopped(self):
@@ -1882,48 +2142,80 @@ class QSOOline(QWidget):
         if event_type not in ("down", "up"):
             return
 
-        if not self.is_connected:
+        # Persistent sessions keep publishing through a drop; the client queues QoS 1 events.
+        if not self.is_connected and not (self._persistent_session and self.client):
             return
 
         normalized_time_ms = self._normalize_tx_event_time_ms(event_time_ms)
         self._tx_event_seq += 1
-        json_data = {
-            "protocol": self._protocol_name,
-            "version": self._protocol_version,
-            "session_id": self._tx_session_id,
-            "seq": self._tx_event_seq,
-            "myCall": self.my_call,
-            "myChannel": int(self.channel_name),
-            "event": event_type,
-            "event_time_ms": normalized_time_ms,
-            "keyer_mode": self.keyer_mode,
-            "dot_ms_hint": int(self.dot_duration),
-            "dash_ms_hint": int(self.dash_duration),
-            "letter_gap_ms_hint": int(self.letter_interval_duration),
-            "word_gap_ms_hint": int(self.word_interval_duration),
+        json_data = build_key_event(
+            session_id=self._tx_session_id,
+            seq=self._tx_event_seq,
+            call=self.my_call,
+            channel=self.channel_name,
+            event=event_type,
+            event_time_ms=normalized_time_ms,
+            keyer_mode=self.keyer_mode,
+            dot_ms=self.dot_duration,
+            dash_ms=self.dash_duration,
+            letter_gap_ms=self.letter_interval_duration,
+            word_gap_ms=self.word_interval_duration,
+        )
+
+        message = encode_key_event(json_data)
+        if self._publisher:
+            self._publisher.publish(message)
+
+    def _start_publisher(self, client):
+        self._stop_publisher()
+        self._publisher = MQTTPublisher(
+            send=client.send_message,
+            max_queue=self.config_manager.get_publish_queue_limit(),
+            overflow_policy=self.config_manager.get_publish_overflow_policy(),
+            on_drop=self._on_publisher_drop,
+        )
+        self._publisher.start()
+
+    def _stop_publisher(self):
+        if self._publisher:
+            self._publisher.stop()
+        self._publisher = None
+
+    def _on_publisher_drop(self, dropped_total):
+        self.label_tx_hint.setText(self.tr("发送队列拥塞，已丢弃 {0} 个按键事件").format(dropped_total))
+
+    def get_publisher_stats(self):
+        """Outbound queue depth, drop count and publish latency percentiles."""
+        return self._publisher.stats() if self._publisher else None
+
+    def get_endpoint_stats(self):
+        """Connect attempts, wins, drops and handshake latency per broker endpoint."""
+        return self._endpoint_latency.snapshot()
+
+    def get_rx_throttle_stats(self):
+        """Throttled/muted senders and playback queue overflow drops."""
+        processor = getattr(self, "receive_message_processor", None)
+        return {
+            "senders": self.rx_rate_limiter.stats(time.monotonic() * 1000),
+            "pending_dropped": processor.dropped_total() if processor else 0,
         }
 
-        message = json.dumps(json_data, ensure_ascii=False, separators=(",", ":"))
-        self._pending_send_msgs.append(message)
-        if len(self._pending_send_msgs) > 2000:
-            self._pending_send_msgs.popleft()
-        if not self._send_flush_timer.isActive():
-            self._send_flush_timer.start()
-
-    def _flush_send_queue(self):
-        if not self.is_connected or not hasattr(self, "client") or self.client is None:
-            self._pending_send_msgs.clear()
-            self._send_flush_timer.stop()
-            return
+    def get_rx_playback_lag(self):
+        """Playback lag behind real time per receive channel, plus catch-up skip count."""
+        processor = getattr(self, "receive_message_processor", None)
+        if processor is None:
+            return {"lag_ms": {}, "skipped": 0}
+        return {"lag_ms": processor.lag_by_channel(), "skipped": processor.skipped_total()}
 
-        budget = 40
-        while self._pending_send_msgs and budget > 0:
-            msg = self._pending_send_msgs.popleft()
-            self.client.send_message(msg)
-            budget -= 1
+    def get_visualizer_frame_stats(self):
+        """Visualizer frame time (tick + paint) percentiles, actual FPS and idle state."""
+        return self.morsecode_visualizer.frame_stats()
 
-        if not self._pending_send_msgs:
-            self._send_flush_timer.stop()
+    def get_rx_telemetry(self, per_channel=False):
+        """Receive link quality snapshots, per sender or aggregated per channel."""
+        if per_channel:
+            return self.rx_telemetry.channel_stats()
+        return self.rx_telemetry.sender_stats()
 
     def start_letter_timer(self):
 
@@ -1943,7 +2235,7 @@ class QSOOline(QWidget):
         self.start_word_timer()
 
 
-        extracted_mores_code = self.extract_cleaned_parts(self.morse_code)
+        extracted_mores_code = self.extract_cleaned_parts(self._tx_morse_log.tail(256))
         self.morse_code_translation_temp = self.translator.letter_to_morse(extracted_mores_code)
         self._append_send_translation_out(self.morse_code_translation_temp)
 
@@ -2112,8 +2404,10 @@ class QSOOline(QWidget):
         self.edit_morse_received.setText("")
         self.edit_send_translation.setText("")
         self.edit_received_translation.setText("")
-        self.morse_code_translation = ""
-        self.morse_code = ""
+        for log in (self._tx_morse_log, self._tx_text_log, self._rx_morse_log, self._rx_text_log):
+            log.clear()
+        self._raw_view_source = None
+        self._raw_view_mark = None
         self._last_raw_tail = None
         self._last_decode_text = None
         self._last_decision_tail = []
@@ -2161,6 +2455,7 @@ class QSOOline(QWidget):
             if isinstance(channels, dict):
                 for channel in channels.values():
                     channel.buzz = new_buzz
+            self._attach_spectrum_tap()
             if old_buzz is not new_buzz and old_buzz and hasattr(old_buzz, "close"):
                 try:
                     old_buzz.close()
@@ -2224,15 +2519,12 @@ class QSOOline(QWidget):
     def show_visualizer(self, Morsechar, keydown_ms=None, gap_ms=None):
 
         if keydown_ms is not None:
-            fps_ms = int(getattr(self.morsecode_visualizer, "fps_ms", 40))
-            fps_ms = max(1, fps_ms)
-            height_frames = max(1, int(math.ceil(float(keydown_ms) / float(fps_ms))))
             actual_gap = self.dot_duration if gap_ms is None else max(1, int(gap_ms))
             self.morsecode_visualizer.generate_blocks(
-                channel_idx=5,
+                channel_idx=self._side_channel_range,
                 count=1,
-                height=height_frames,
                 gap_ms=actual_gap,
+                duration_ms=keydown_ms,
             )
             return
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from threading import RLock
-from typing import Callable
+from typing import Any, Callable, Optional
 
 from utils.config_manager import ConfigManager
 from utils.database_tool import DatabaseTool
@@ -14,6 +14,8 @@ from .metadata import APP_NAME, APP_VERSION
 
 DatabaseFactory = Callable[[], DatabaseTool]
 BuzzerFactory = Callable[[], BuzzerSimulator]
+# Called with MQTTClient keyword arguments; returns an MQTTTransport.
+MQTTClientFactory = Callable[..., Any]
 
 
 @dataclass
@@ -25,12 +27,20 @@ class AppContext:
     config_manager: ConfigManager = field(default_factory=ConfigManager)
     database_factory: DatabaseFactory = field(default=DatabaseTool)
     buzzer_factory: BuzzerFactory = field(default=BuzzerSimulator)
+    mqtt_client_factory: Optional[MQTTClientFactory] = None
     _shared_buzzer: BuzzerSimulator | None = field(default=None, init=False, repr=False)
     _buzzer_lock: RLock = field(default_factory=RLock, init=False, repr=False)
 
     def create_database_tool(self) -> DatabaseTool:
         return self.database_factory()
 
+    def create_mqtt_client(self, **kwargs):
+        if self.mqtt_client_factory is not None:
+            return self.mqtt_client_factory(**kwargs)
+        from service.mqtt_client import MQTTClient
+
+        return MQTTClient(**kwargs)
+
     def create_buzzer(self) -> BuzzerSimulator:
         with self._buzzer_lock:
             if self._shared_buzzer is None:
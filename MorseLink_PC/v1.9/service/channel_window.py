@@ -0,0 +1,86 @@
+"""Channel window helpers for key-event topic subscriptions."""
+
+from __future__ import annotations
+
+SUBSCRIBE_MODE_WINDOW = "window"
+SUBSCRIBE_MODE_WILDCARD = "wildcard"
+SUBSCRIBE_MODES = (SUBSCRIBE_MODE_WINDOW, SUBSCRIBE_MODE_WILDCARD)
+
+
+def normalize_subscribe_mode(mode, default=SUBSCRIBE_MODE_WINDOW):
+    value = str(mode or "").strip().lower()
+    return value if value in SUBSCRIBE_MODES else default
+
+
+class ChannelWindow:
+    """
+    The ±N channel window around the tuned frequency.
+
+    In window mode one topic per channel is subscribed and every retune
+    diffs the topic set. In wildcard mode a single `<prefix>/+` filter is
+    subscribed once and incoming topics are checked locally with an O(1)
+    range test, so retuning never touches the broker.
+    """
+
+    __slots__ = ("topic_prefix", "center", "side_range", "min_channel", "max_channel", "mode", "_lower", "_upper")
+
+    def __init__(
+        self,
+        topic_prefix: str,
+        center: int,
+        side_range: int = 5,
+        min_channel: int = 7000,
+        max_channel: int = 7300,
+        mode: str = SUBSCRIBE_MODE_WINDOW,
+    ) -> None:
+        self.topic_prefix = str(topic_prefix).rstrip("/")
+        self.side_range = max(0, int(side_range))
+        self.min_channel = int(min_channel)
+        self.max_channel = int(max_channel)
+        self.mode = normalize_subscribe_mode(mode)
+        self.center = int(center)
+        self._lower = self.center
+        self._upper = self.center
+        self.set_center(center)
+
+    @property
+    def lower(self) -> int:
+        return self._lower
+
+    @property
+    def upper(self) -> int:
+        return self._upper
+
+    def set_center(self, center: int) -> None:
+        self.center = int(center)
+        # Assign both bounds at once so readers on other threads never see a half-updated window.
+        self._lower, self._upper = (
+            max(self.min_channel, self.center - self.side_range),
+            min(self.max_channel, self.center + self.side_range),
+        )
+
+    def topic_for_channel(self, channel: int) -> str:
+        return f"{self.topic_prefix}/{int(channel)}"
+
+    def wildcard_topic(self) -> str:
+        return f"{self.topic_prefix}/+"
+
+    def subscribe_topics(self) -> set[str]:
+        if self.mode == SUBSCRIBE_MODE_WILDCARD:
+            return {self.wildcard_topic()}
+        return {self.topic_for_channel(ch) for ch in range(self._lower, self._upper + 1)}
+
+    def accepts_channel(self, channel) -> bool:
+        try:
+            ch = int(channel)
+        except (TypeError, ValueError):
+            return False
+        return self._lower <= ch <= self._upper
+
+    def accepts_topic(self, topic) -> bool:
+        prefix, sep, tail = str(topic or "").rpartition("/")
+        if not sep or prefix != self.topic_prefix:
+            return False
+        if not tail.isdigit():
+            return False
+        return self._lower <= int(tail) <= self._upper
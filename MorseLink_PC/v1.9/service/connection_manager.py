@@ -0,0 +1,436 @@
+"""Endpoint racing and failover on top of the MQTT transports."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from service.transport import MQTTTransport
+
+logger = logging.getLogger(__name__)
+
+# RFC 8305 "Connection Attempt Delay".
+DEFAULT_STAGGER_MS = 250
+# How long attempts that lost the race may keep handshaking so their latency is learned.
+LOSER_GRACE_MS = 5000
+# Backoff between races once every endpoint has failed, like paho's reconnect_delay_set(1, 30).
+RETRY_MIN_MS = 1000
+RETRY_MAX_MS = 30000
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    scheme: str
+    host: str
+    port: int
+
+    @property
+    def use_tls(self) -> bool:
+        return self.scheme == "mqtts"
+
+    def __str__(self) -> str:
+        return f"{self.scheme}://{self.host}:{self.port}"
+
+
+@dataclass
+class EndpointStats:
+    attempts: int = 0
+    wins: int = 0
+    drops: int = 0
+    last_connect_ms: Optional[float] = None
+    best_connect_ms: Optional[float] = None
+    last_error: str = ""
+
+
+class EndpointLatencyTable:
+    """Per-endpoint connect latency history, shared across connections."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: dict[Endpoint, EndpointStats] = {}
+
+    def _get_locked(self, endpoint: Endpoint) -> EndpointStats:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = EndpointStats()
+        return stats
+
+    def record_attempt(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            self._get_locked(endpoint).attempts += 1
+
+    def record_connect(self, endpoint: Endpoint, latency_ms: float, won: bool) -> None:
+        with self._lock:
+            stats = self._get_locked(endpoint)
+            stats.last_connect_ms = float(latency_ms)
+            if stats.best_connect_ms is None or latency_ms < stats.best_connect_ms:
+                stats.best_connect_ms = float(latency_ms)
+            if won:
+                stats.wins += 1
+
+    def record_drop(self, endpoint: Endpoint, detail: str = "") -> None:
+        with self._lock:
+            stats = self._get_locked(endpoint)
+            stats.drops += 1
+            stats.last_error = str(detail or "")
+
+    def order(self, endpoints) -> list[Endpoint]:
+        """Fastest known endpoints first; untried ones keep configured order after them."""
+        with self._lock:
+            def _key(item):
+                index, endpoint = item
+                stats = self._stats.get(endpoint)
+                latency = stats.last_connect_ms if stats else None
+                return (latency is None, latency if latency is not None else 0.0, index)
+
+            return [ep for _, ep in sorted(enumerate(endpoints), key=_key)]
+
+    def snapshot(self) -> dict[str, EndpointStats]:
+        with self._lock:
+            return {str(ep): EndpointStats(**vars(stats)) for ep, stats in self._stats.items()}
+
+
+class FailoverMQTTClient(MQTTTransport):
+    """
+    MQTTTransport that races several brokers and fails over between them.
+
+    connect() starts one child transport per endpoint, happy-eyeballs style:
+    the fastest-known endpoint first, each following one stagger_ms later
+    while nobody has connected yet. The first child to complete the MQTT
+    handshake wins. Attempts still in flight may finish their handshake
+    for up to LOSER_GRACE_MS so their latency is recorded too; then they
+    are closed without announcing the will and with their broker sessions
+    discarded. Closing a loser is not counted as a drop. When the winner drops, the
+    page sees a normal disconnect and a new race starts immediately. When
+    every endpoint of a race fails, the page is told once and new races
+    follow with exponential backoff (retry_min_ms up to retry_max_ms) until
+    one endpoint connects or close() is called.
+    Connect latency per endpoint is kept in an EndpointLatencyTable.
+    """
+
+    def __init__(
+        self,
+        endpoints,
+        client_factory: Callable[..., MQTTTransport],
+        client_kwargs: Optional[dict] = None,
+        stagger_ms: int = DEFAULT_STAGGER_MS,
+        latency_table: Optional[EndpointLatencyTable] = None,
+        client_id="chat_client",
+        retry_min_ms: int = RETRY_MIN_MS,
+        retry_max_ms: int = RETRY_MAX_MS,
+    ):
+        super().__init__(client_id=client_id)
+        self.endpoints = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.client_factory = client_factory
+        self.client_kwargs = dict(client_kwargs or {})
+        self.stagger_ms = max(0, int(stagger_ms))
+        self.latency_table = latency_table or EndpointLatencyTable()
+        self.retry_min_ms = max(1, int(retry_min_ms))
+        self.retry_max_ms = max(self.retry_min_ms, int(retry_max_ms))
+
+        self.active_endpoint: Optional[Endpoint] = None
+        self._active: Optional[MQTTTransport] = None
+        self._race_id = 0
+        self._race_started = 0.0
+        self._race_remaining = 0
+        # Children by configured endpoint position, so duplicate endpoints stay distinct.
+        self._children: dict[int, MQTTTransport] = {}
+        self._timers: list[threading.Timer] = []
+        # When each child started connecting; latency excludes its stagger delay.
+        self._started_at: dict[MQTTTransport, float] = {}
+        # Losing attempts allowed to finish: child -> (endpoint, attempt start)
+        self._draining: dict[MQTTTransport, tuple[Endpoint, float]] = {}
+        # Delay before the next retry race; 0 until a race has been exhausted.
+        self._retry_ms = 0
+        # The page has already been told we are down; retries stay quiet until a win.
+        self._down_reported = False
+
+    # ----------------------------
+    # Race
+    # ----------------------------
+    def _child_kwargs(self, endpoint: Endpoint, index: int) -> dict:
+        kwargs = dict(self.client_kwargs)
+        kwargs["broker"] = endpoint.host
+        kwargs["port"] = endpoint.port
+        # Parallel attempts must not share a client id or the broker kicks one of them.
+        # The suffix is the configured position, not the race order, so each broker
+        # sees the same id on every connect and a persistent session can resume.
+        kwargs["client_id"] = f"{self.client_id}-{index}"
+        kwargs["use_tls"] = endpoint.use_tls
+        if not endpoint.use_tls:
+            kwargs["tls_ca_certs"] = ""
+            kwargs["tls_insecure"] = False
+        return kwargs
+
+    def _start_race_locked(self):
+        self._race_id += 1
+        self._race_started = time.monotonic()
+        self._race_remaining = len(self.endpoints)
+        race_id = self._race_id
+        rank = {endpoint: position for position, endpoint in enumerate(self.latency_table.order(self.endpoints))}
+        slots = sorted(enumerate(self.endpoints), key=lambda item: (rank[item[1]], item[0]))
+        for position, (index, endpoint) in enumerate(slots):
+            if position == 0:
+                threading.Thread(
+                    target=self._attempt,
+                    args=(race_id, index, endpoint),
+                    name="mqtt-race",
+                    daemon=True,
+                ).start()
+                continue
+            timer = threading.Timer(position * self.stagger_ms / 1000.0, self._attempt, args=(race_id, index, endpoint))
+            timer.daemon = True
+            self._timers.append(timer)
+            timer.start()
+
+    def _schedule_retry_locked(self):
+        delay_ms = self._retry_ms or self.retry_min_ms
+        self._retry_ms = min(self.retry_max_ms, delay_ms * 2)
+        timer = threading.Timer(delay_ms / 1000.0, self._retry_race, args=(self._race_id,))
+        timer.daemon = True
+        self._timers.append(timer)
+        timer.start()
+        return delay_ms
+
+    def _retry_race(self, race_id: int):
+        with self._lock:
+            if race_id != self._race_id or self._closing or self._active is not None:
+                return
+            self._timers = []
+            self._start_race_locked()
+
+    def _cancel_timers_locked(self):
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
+
+    def _attempt(self, race_id: int, index: int, endpoint: Endpoint):
+        with self._lock:
+            if race_id != self._race_id or self._closing or self._active is not None:
+                return
+            publish_topic = self.publish_topic
+            subscribe_topics = set(self.subscribe_topics)
+        try:
+            child = self.client_factory(**self._child_kwargs(endpoint, index))
+        except Exception as e:
+            logger.exception("Failed to create client for %s", endpoint)
+            self._attempt_failed(race_id, index, endpoint, None, f"Connection init failed: {e}")
+            return
+
+        child.topic_filter = self.topic_filter
+        child.will = self.will
+        for route_filter, callback in self._routes:
+            child.add_route(route_filter, lambda topic, text, c=child, cb=callback: self._on_child_route(c, cb, topic, text))
+        child.on_message_received = lambda text, c=child: self._on_child_message(c, text)
+        child.on_connection_status_change = (
+            lambda ok, detail=None, r=race_id, i=index, ep=endpoint, c=child: self._on_child_status(r, i, ep, c, ok, detail)
+        )
+        with self._lock:
+            if race_id != self._race_id or self._closing or self._active is not None:
+                stale = True
+            else:
+                stale = False
+                self._children[index] = child
+                self._started_at[child] = time.monotonic()
+        if stale:
+            return
+        self.latency_table.record_attempt(endpoint)
+        logger.info("Racing MQTT endpoint %s", endpoint)
+        if not child.connect(publish_topic, subscribe_topics=subscribe_topics):
+            self._attempt_failed(race_id, index, endpoint, child, getattr(child, "last_error", ""))
+
+    def _attempt_failed(self, race_id, index, endpoint, child, detail):
+        """An attempt was refused; report once every endpoint of the race has failed."""
+        with self._lock:
+            if race_id != self._race_id or self._closing or self._active is not None:
+                return
+            if child is not None and self._children.get(index) is not child:
+                return
+            self._started_at.pop(self._children.pop(index, None), None)
+            self.last_error = str(detail or "") or self.last_error
+            self._race_remaining -= 1
+            exhausted = self._race_remaining <= 0
+            report = False
+            if exhausted:
+                report = not self._down_reported
+                self._down_reported = True
+                retry_ms = self._schedule_retry_locked()
+        self.latency_table.record_drop(endpoint, detail)
+        if child is not None:
+            self._close_child(child)
+        if exhausted:
+            logger.warning("All MQTT endpoints failed (%s), retrying in %d ms", self.last_error, retry_ms)
+            if report:
+                self._safe_status_cb(False, self.last_error)
+
+    def _on_child_message(self, child, text):
+        if child is self._active:
+            self._safe_msg_cb(text)
+
+    def _on_child_route(self, child, callback, topic, text):
+        if child is self._active:
+            callback(topic, text)
+
+    def _on_child_status(self, race_id, index, endpoint, child, ok, detail=None):
+        if ok:
+            with self._lock:
+                drained = self._draining.pop(child, None)
+                if drained is not None:
+                    winner = False
+                    latency_ms = (time.monotonic() - drained[1]) * 1000.0
+                elif race_id != self._race_id or self._closing or self._active is not None:
+                    winner = False
+                    latency_ms = None
+                else:
+                    winner = True
+                    latency_ms = (time.monotonic() - self._started_at.get(child, self._race_started)) * 1000.0
+                    self._active = child
+                    self.active_endpoint = endpoint
+                    self._cancel_timers_locked()
+                    in_flight = [(i, c) for i, c in self._children.items() if c is not child]
+                    for i, c in in_flight:
+                        self._draining[c] = (self.endpoints[i], self._started_at.get(c, self._race_started))
+                    in_flight = [c for _, c in in_flight]
+                    self._children = {index: child}
+                    self._started_at = {}
+                    self.is_connected = True
+                    self._connected_evt.set()
+                    self.last_error = ""
+                    self._retry_ms = 0
+                    self._down_reported = False
+            if winner:
+                self.latency_table.record_connect(endpoint, latency_ms, won=True)
+                logger.info("MQTT endpoint %s won the race in %.0f ms", endpoint, latency_ms)
+                if in_flight:
+                    timer = threading.Timer(LOSER_GRACE_MS / 1000.0, self._expire_draining, args=(in_flight,))
+                    timer.daemon = True
+                    timer.start()
+                self._safe_status_cb(True, "")
+                return
+            if latency_ms is not None:
+                self.latency_table.record_connect(endpoint, latency_ms, won=False)
+                logger.info("MQTT endpoint %s lost the race, connected in %.0f ms", endpoint, latency_ms)
+            self._close_child(child, discard_session=True)
+            return
+
+        with self._lock:
+            if self._closing:
+                return
+            drained = self._draining.pop(child, None)
+        if drained is not None:
+            # A losing attempt that could not connect at all is a real failure.
+            self.latency_table.record_drop(endpoint, detail)
+            self._close_child(child, discard_session=True)
+            return
+
+        with self._lock:
+            if self._closing:
+                return
+            active = child is self._active
+        if not active:
+            self._attempt_failed(race_id, index, endpoint, child, detail)
+            return
+
+        with self._lock:
+            if child is not self._active or self._closing:
+                return
+            self._active = None
+            self.active_endpoint = None
+            self._children.pop(index, None)
+            self.is_connected = False
+            self._connected_evt.clear()
+            self.last_error = str(detail or "")
+            self._down_reported = True
+            self._start_race_locked()
+        self.latency_table.record_drop(endpoint, detail)
+        logger.warning("MQTT endpoint %s dropped (%s), failing over", endpoint, detail)
+        self._close_child(child)
+        self._safe_status_cb(False, detail)
+
+    def _expire_draining(self, children):
+        """Close losers still handshaking after the grace period; they are not counted as drops."""
+        with self._lock:
+            expired = [c for c in children if self._draining.pop(c, None) is not None]
+        for child in expired:
+            self._close_child(child, discard_session=True)
+
+    @staticmethod
+    def _close_child(child, discard_session=False):
+        child.on_connection_status_change = None
+        child.on_message_received = None
+        try:
+            if discard_session:
+                # A losing connection must not leave an orphaned session or announce our will.
+                child.close_discarding_session()
+            else:
+                child.close()
+        except Exception:
+            logger.exception("Error while closing raced MQTT client")
+
+    # ----------------------------
+    # MQTTTransport API
+    # ----------------------------
+    def connect(self, publish_topic, subscribe_topics=None):
+        if not self._bind_topics(publish_topic, subscribe_topics):
+            return False
+        with self._lock:
+            self._retry_ms = 0
+            self._down_reported = False
+            self._start_race_locked()
+        return True
+
+    def send_message(self, message):
+        child = self._active
+        if child is None:
+            return False
+        return child.send_message(message)
+
+    def publish_to(self, topic, payload, retain=False):
+        child = self._active
+        if child is None:
+            return False
+        return child.publish_to(topic, payload, retain=retain)
+
+    def replace_subscriptions(self, topics):
+        normalized = self._with_routes(self._normalize_topics(topics))
+        with self._lock:
+            self.subscribe_topics = set(normalized)
+            children = list(self._children.values())
+        for child in children:
+            child.replace_subscriptions(normalized)
+
+    def set_publish_topic(self, topic):
+        super().set_publish_topic(topic)
+        with self._lock:
+            children = list(self._children.values())
+        for child in children:
+            child.set_publish_topic(topic)
+
+    def endpoint_stats(self) -> dict[str, EndpointStats]:
+        return self.latency_table.snapshot()
+
+    def close(self):
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            self._cancel_timers_locked()
+            active = self._active
+            children = list(self._children.values()) + list(self._draining)
+            self._children = {}
+            self._draining = {}
+            self._started_at = {}
+            self._active = None
+            self.active_endpoint = None
+            self.is_connected = False
+            self._connected_evt.clear()
+            self.publish_topic = None
+            self.subscribe_topics = set()
+        for child in children:
+            self._close_child(child, discard_session=child is not active)
+        self._safe_status_cb(False, "Connection closed")
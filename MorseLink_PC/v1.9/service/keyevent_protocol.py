@@ -0,0 +1,60 @@
+"""Wire format of the v2 key-event protocol (`morselink.keyevent`)."""
+
+from __future__ import annotations
+
+import json
+import time
+
+PROTOCOL_NAME = "morselink.keyevent"
+PROTOCOL_VERSION = 2
+TOPIC_PREFIX = "morselink/v2/keyevent"
+
+EVENT_DOWN = "down"
+EVENT_UP = "up"
+EVENT_TYPES = (EVENT_DOWN, EVENT_UP)
+
+# Senders number the key events of a session from here on.
+FIRST_SEQ = 1
+
+
+def topic_for_channel(channel, prefix=TOPIC_PREFIX):
+    return f"{prefix}/{int(channel)}"
+
+
+def new_session_id(call):
+    return f"{str(call or 'UNKNOWN').upper()}-{int(time.time() * 1000)}"
+
+
+def build_key_event(
+    session_id,
+    seq,
+    call,
+    channel,
+    event,
+    event_time_ms,
+    keyer_mode,
+    dot_ms,
+    dash_ms,
+    letter_gap_ms,
+    word_gap_ms,
+):
+    """Return one key event as the dict that goes on the wire."""
+    return {
+        "protocol": PROTOCOL_NAME,
+        "version": PROTOCOL_VERSION,
+        "session_id": session_id,
+        "seq": int(seq),
+        "myCall": call,
+        "myChannel": int(channel),
+        "event": event,
+        "event_time_ms": int(event_time_ms),
+        "keyer_mode": keyer_mode,
+        "dot_ms_hint": int(dot_ms),
+        "dash_ms_hint": int(dash_ms),
+        "letter_gap_ms_hint": int(letter_gap_ms),
+        "word_gap_ms_hint": int(word_gap_ms),
+    }
+
+
+def encode_key_event(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,366 @@
+"""In-process loopback pub/sub transport for offline and deterministic runs."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from service.transport import MQTTTransport, topic_matches
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LinkProfile:
+    """Impairments applied to every delivery through a LoopbackBroker."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    loss: float = 0.0
+    reorder: float = 0.0
+    reorder_delay_ms: float = 40.0
+    connect_latency_ms: float = 0.0
+
+
+@dataclass(frozen=True)
+class LoopbackStats:
+    published: int
+    delivered: int
+    lost: int
+    reordered: int
+    in_flight: int
+
+
+class LoopbackBroker:
+    """
+    Minimal MQTT-like broker living inside the process.
+
+    Clients created with client() or client_factory() talk to each other
+    with MQTT topic filter semantics (`+`, `#`). Each delivery gets the
+    link profile's latency plus uniform jitter; `loss` drops a delivery and
+    `reorder` holds it back by reorder_delay_ms so later messages overtake
+    it. All randomness comes from one seeded RNG.
+
+    set_online(False) simulates a broker outage: attached clients are
+    dropped and new connects are refused until set_online(True).
+
+    realtime=True runs a delivery thread against time.monotonic(), like the
+    paho network thread. realtime=False uses a virtual clock that only
+    moves through advance()/run_until_idle(), which deliver on the calling
+    thread and make runs fully deterministic.
+    """
+
+    def __init__(self, profile: Optional[LinkProfile] = None, seed: int = 0, realtime: bool = True) -> None:
+        self.profile = profile or LinkProfile()
+        self.realtime = bool(realtime)
+        self._rng = random.Random(seed)
+        self._cond = threading.Condition()
+        self._clients: list["LoopbackMQTTClient"] = []
+        self._retained: dict[str, object] = {}
+        self._heap: list = []
+        self._order = itertools.count()
+        self._virtual_now_ms = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._online = True
+
+        self._published = 0
+        self._delivered = 0
+        self._lost = 0
+        self._reordered = 0
+
+    # ----------------------------
+    # Clock and delivery loop
+    # ----------------------------
+    def now_ms(self) -> float:
+        if self.realtime:
+            return time.monotonic() * 1000.0
+        with self._cond:
+            return self._virtual_now_ms
+
+    def _ensure_thread_locked(self):
+        if not self.realtime or self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="loopback-broker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait_s = (self._heap[0][0] - time.monotonic() * 1000.0) / 1000.0
+                    if wait_s <= 0:
+                        break
+                    self._cond.wait(wait_s)
+                if not self._running:
+                    return
+                _, _, action = heapq.heappop(self._heap)
+            self._run_action(action)
+
+    def _run_action(self, action):
+        try:
+            action()
+        except Exception:
+            logger.exception("Loopback delivery failed")
+
+    def _schedule_locked(self, due_ms: float, action):
+        heapq.heappush(self._heap, (due_ms, next(self._order), action))
+        self._cond.notify_all()
+
+    def advance(self, ms: float) -> int:
+        """Move the virtual clock forward and run everything that became due."""
+        if self.realtime:
+            raise RuntimeError("advance() is only available with realtime=False")
+        with self._cond:
+            target = self._virtual_now_ms + max(0.0, float(ms))
+        ran = 0
+        while True:
+            with self._cond:
+                if not self._heap or self._heap[0][0] > target:
+                    self._virtual_now_ms = target
+                    return ran
+                due_ms, _, action = heapq.heappop(self._heap)
+                self._virtual_now_ms = max(self._virtual_now_ms, due_ms)
+            self._run_action(action)
+            ran += 1
+
+    def run_until_idle(self, max_ms: float = 60_000.0) -> int:
+        """Advance the virtual clock until nothing is in flight (bounded by max_ms)."""
+        if self.realtime:
+            raise RuntimeError("run_until_idle() is only available with realtime=False")
+        with self._cond:
+            limit = self._virtual_now_ms + max(0.0, float(max_ms))
+        ran = 0
+        while True:
+            with self._cond:
+                if not self._heap or self._virtual_now_ms >= limit:
+                    return ran
+                target = min(limit, max(item[0] for item in self._heap))
+                delta = target - self._virtual_now_ms
+            ran += self.advance(delta)
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            clients = list(self._clients)
+            self._cond.notify_all()
+            thread = self._thread
+            self._thread = None
+        for client in clients:
+            client.close()
+        if thread and thread is not threading.current_thread():
+            thread.join(1.0)
+
+    def set_online(self, online: bool):
+        """Take the broker down (dropping every client) or bring it back up."""
+        with self._cond:
+            self._online = bool(online)
+            clients = [] if self._online else list(self._clients)
+        for client in clients:
+            client.drop()
+
+    # ----------------------------
+    # Client management and routing
+    # ----------------------------
+    def client(self, client_id="loopback", **_ignored) -> "LoopbackMQTTClient":
+        return LoopbackMQTTClient(self, client_id=client_id)
+
+    def client_factory(self, **kwargs) -> "LoopbackMQTTClient":
+        """Drop-in for MQTTClient(**kwargs); broker/TLS/credential arguments are ignored."""
+        return self.client(client_id=kwargs.get("client_id", "loopback"))
+
+    def _attach(self, client: "LoopbackMQTTClient"):
+        with self._cond:
+            if client not in self._clients:
+                self._clients.append(client)
+            self._ensure_thread_locked()
+            due = self._now_ms_locked() + max(0.0, float(self.profile.connect_latency_ms))
+            if self._online:
+                self._schedule_locked(due, client._handle_connack)
+            else:
+                self._clients.remove(client)
+                self._schedule_locked(due, lambda: client._handle_connect_refused("Connection refused"))
+
+    def _detach(self, client: "LoopbackMQTTClient", publish_will: bool = False, graceful: bool = False):
+        with self._cond:
+            if client in self._clients:
+                self._clients.remove(client)
+        if not publish_will:
+            return
+        if graceful:
+            for topic, payload, retain in client._graceful_will_messages():
+                self.publish(topic, payload, retain=retain)
+        elif client.will:
+            topic, payload, retain = client.will
+            self.publish(topic, payload, retain=retain)
+
+    def _send_retained(self, client: "LoopbackMQTTClient", filters):
+        """Deliver retained messages matching newly added filters, as a broker does on SUBSCRIBE."""
+        with self._cond:
+            now = self._now_ms_locked()
+            for topic, payload in self._retained.items():
+                if not any(topic_matches(f, topic) for f in filters):
+                    continue
+                delay = self._delay_for_delivery_locked()
+                if delay is None:
+                    continue
+                self._schedule_locked(
+                    now + delay,
+                    lambda c=client, t=topic, m=payload: self._deliver_to(c, t, m),
+                )
+
+    def _now_ms_locked(self) -> float:
+        return time.monotonic() * 1000.0 if self.realtime else self._virtual_now_ms
+
+    def _delay_for_delivery_locked(self) -> Optional[float]:
+        p = self.profile
+        if p.loss > 0 and self._rng.random() < p.loss:
+            self._lost += 1
+            return None
+        delay = max(0.0, float(p.latency_ms))
+        if p.jitter_ms > 0:
+            delay = max(0.0, delay + self._rng.uniform(-p.jitter_ms, p.jitter_ms))
+        if p.reorder > 0 and self._rng.random() < p.reorder:
+            delay += max(0.0, float(p.reorder_delay_ms))
+            self._reordered += 1
+        return delay
+
+    def publish(self, topic: str, payload, retain: bool = False) -> int:
+        """Route one message to every matching subscriber; returns scheduled deliveries."""
+        scheduled = 0
+        with self._cond:
+            self._published += 1
+            if retain:
+                # An empty retained payload clears the slot, as in MQTT.
+                if payload:
+                    self._retained[topic] = payload
+                else:
+                    self._retained.pop(topic, None)
+            now = self._now_ms_locked()
+            for client in self._clients:
+                if not client._matches(topic):
+                    continue
+                delay = self._delay_for_delivery_locked()
+                if delay is None:
+                    continue
+                self._schedule_locked(
+                    now + delay,
+                    lambda c=client, t=topic, m=payload: self._deliver_to(c, t, m),
+                )
+                scheduled += 1
+        return scheduled
+
+    def _deliver_to(self, client: "LoopbackMQTTClient", topic: str, payload):
+        if not client.is_connected:
+            return
+        with self._cond:
+            self._delivered += 1
+        client._deliver(topic, payload)
+
+    def stats(self) -> LoopbackStats:
+        with self._cond:
+            return LoopbackStats(
+                published=self._published,
+                delivered=self._delivered,
+                lost=self._lost,
+                reordered=self._reordered,
+                in_flight=len(self._heap),
+            )
+
+
+class LoopbackMQTTClient(MQTTTransport):
+    """MQTTClient-compatible endpoint attached to a LoopbackBroker."""
+
+    def __init__(self, broker: LoopbackBroker, client_id="loopback"):
+        super().__init__(client_id=client_id)
+        self.broker_hub = broker
+
+    def _matches(self, topic: str) -> bool:
+        with self._lock:
+            if not self.is_connected or self._closing:
+                return False
+            filters = tuple(self.subscribe_topics)
+        return any(topic_matches(f, topic) for f in filters)
+
+    def _handle_connack(self):
+        with self._lock:
+            if self._closing:
+                return
+            self.is_connected = True
+            self._connected_evt.set()
+            self.last_error = ""
+            filters = tuple(self.subscribe_topics)
+        self._safe_status_cb(True, "")
+        self.broker_hub._send_retained(self, filters)
+
+    def _handle_connect_refused(self, detail):
+        with self._lock:
+            if self._closing:
+                return
+            self.last_error = str(detail)
+        self._safe_status_cb(False, detail)
+
+    def connect(self, publish_topic, subscribe_topics=None):
+        if not self._bind_topics(publish_topic, subscribe_topics):
+            return False
+        self.broker_hub._attach(self)
+        return True
+
+    def send_message(self, message):
+        if not message:
+            return False
+        with self._lock:
+            if not (self.is_connected and self.publish_topic) or self._closing:
+                return False
+            topic = self.publish_topic
+        self.broker_hub.publish(topic, message)
+        return True
+
+    def publish_to(self, topic, payload, retain=False):
+        topic = self._normalize_topic(topic)
+        with self._lock:
+            if not (self.is_connected and topic) or self._closing:
+                return False
+        self.broker_hub.publish(topic, payload, retain=retain)
+        return True
+
+    def replace_subscriptions(self, topics):
+        normalized = self._with_routes(self._normalize_topics(topics))
+        with self._lock:
+            added = normalized - self.subscribe_topics
+            self.subscribe_topics = set(normalized)
+            connected = self.is_connected and not self._closing
+        if connected and added:
+            self.broker_hub._send_retained(self, added)
+
+    def close(self):
+        self._disconnect("Connection closed", graceful=True)
+
+    def drop(self):
+        """Simulate an unexpected connection loss; the broker publishes the will."""
+        self._disconnect("Connection lost", graceful=False)
+
+    def _disconnect(self, detail, graceful):
+        with self._lock:
+            if self._closing:
+                return
+            was_connected = self.is_connected
+            self._closing = True
+            self.is_connected = False
+            self._connected_evt.clear()
+            self.publish_topic = None
+            self.subscribe_topics = set()
+        # Graceful close announces the will itself and clears its retained slot, like MQTTClient.close().
+        self.broker_hub._detach(self, publish_will=was_connected, graceful=graceful)
+        self._safe_status_cb(False, detail)
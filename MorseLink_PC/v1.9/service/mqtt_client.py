@@ -2,13 +2,34 @@ import logging
 import os
 import ssl
 import threading
+import time
 
 import paho.mqtt.client as mqtt
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+
+from service.transport import MQTTTransport
 
 logger = logging.getLogger(__name__)
 
+PROTOCOL_AUTO = "auto"
+PROTOCOL_V5 = "5"
+PROTOCOL_V311 = "3.1.1"
+MQTT_PROTOCOLS = (PROTOCOL_AUTO, PROTOCOL_V5, PROTOCOL_V311)
+
+# CONNACK codes meaning "protocol version not supported" (3.1.1 rc=1, MQTT 5 0x84).
+_UNSUPPORTED_PROTOCOL_CODES = (1, 132)
+
+# Total time close() waits for the offline messages, so a dead link does not freeze the caller.
+CLOSE_PUBLISH_TIMEOUT_S = 0.3
+
+
+def normalize_mqtt_protocol(value):
+    value = str(value or PROTOCOL_V311).strip().lower()
+    return value if value in MQTT_PROTOCOLS else PROTOCOL_V311
 
-class MQTTClient:
+
+class MQTTClient(MQTTTransport):
     def __init__(
         self,
         broker="localhost",
@@ -19,83 +40,123 @@ class MQTTClient:
         use_tls=False,
         tls_ca_certs=None,
         tls_insecure=False,
+        persistent_session=False,
+        max_queued_messages=1000,
+        protocol=PROTOCOL_V311,
+        message_expiry_s=0,
+        session_expiry_s=300,
     ):
+        super().__init__(client_id=client_id)
         self.broker = broker
         self.port = int(port)
-        self.client_id = client_id
         self.username = username
         self.password = password
         self.use_tls = bool(use_tls)
         self.tls_ca_certs = str(tls_ca_certs or "").strip()
         self.tls_insecure = bool(tls_insecure)
-
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
-
-        # External callbacks (kept backward compatible)
-        self.on_message_received = None
-        self.on_connection_status_change = None
-
-        self.publish_topic = None
-        self.subscribe_topics = set()
-        self.is_connected = False
-        self._connected_evt = threading.Event()
-        self._lock = threading.RLock()
-        self._closing = False
-        self.last_error = ""
-
-        self.client.on_connect = self._on_connect
-        self.client.on_disconnect = self._on_disconnect
-        self.client.on_message = self._on_message
+        # Persistent mode: broker keeps our session and queues QoS 1 key events
+        # across short drops; needs a stable client_id from the caller.
+        self.persistent_session = bool(persistent_session)
+        self.event_qos = 1 if self.persistent_session else 0
+        self.max_queued_messages = max(1, int(max_queued_messages))
+        self._broker_topics = set()
+
+        # MQTT 5 (opt-in): key events carry a message expiry and reuse topic aliases.
+        # "auto" tries 5 first and drops to 3.1.1 if the broker refuses it.
+        self.protocol_mode = normalize_mqtt_protocol(protocol)
+        self.message_expiry_s = max(0, int(message_expiry_s))
+        self.session_expiry_s = max(0, int(session_expiry_s))
+        self.use_v5 = self.protocol_mode != PROTOCOL_V311
+        self._v5_confirmed = False
+        self._alias_max = 0
+        self._topic_aliases = {}
+
+        self.client = self._create_paho_client()
+
+    def _create_paho_client(self):
+        if self.use_v5:
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, self.client_id, protocol=mqtt.MQTTv5)
+        else:
+            client = mqtt.Client(
+                mqtt.CallbackAPIVersion.VERSION2,
+                self.client_id,
+                clean_session=not self.persistent_session,
+                protocol=mqtt.MQTTv311,
+            )
+        if self.persistent_session:
+            # Outgoing QoS 1 events wait here while the link is down.
+            client.max_queued_messages_set(self.max_queued_messages)
+
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
 
         if self.username and self.password:
-            self.client.username_pw_set(self.username, self.password)
+            client.username_pw_set(self.username, self.password)
 
         # Automatic reconnect backoff.
-        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+        client.reconnect_delay_set(min_delay=1, max_delay=30)
+        return client
 
-    def _configure_tls(self):
+    def _configure_tls(self, client=None):
+        client = client or self.client
         tls_version = getattr(ssl, "PROTOCOL_TLS_CLIENT", ssl.PROTOCOL_TLS)
         tls_kwargs = {"tls_version": tls_version}
         if self.tls_ca_certs:
             if not os.path.isfile(self.tls_ca_certs):
                 raise FileNotFoundError(f"CA cert file not found: {self.tls_ca_certs}")
             tls_kwargs["ca_certs"] = self.tls_ca_certs
-        self.client.tls_set(**tls_kwargs)
-        self.client.tls_insecure_set(self.tls_insecure)
-
-    def _safe_status_cb(self, ok: bool, detail: str | None = None):
-        cb = self.on_connection_status_change
-        if cb:
-            try:
-                cb(ok, detail)
-            except TypeError:
-                # Compatibility for older callback signature: cb(ok)
-                cb(ok)
-            except Exception:
-                logger.exception("on_connection_status_change callback error")
-
-    def _safe_msg_cb(self, text: str):
-        cb = self.on_message_received
-        if cb:
-            try:
-                cb(text)
-            except Exception:
-                logger.exception("on_message_received callback error")
+        client.tls_set(**tls_kwargs)
+        client.tls_insecure_set(self.tls_insecure)
 
     def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if client is not self.client:
+            return
         if reason_code == 0:
+            alias_max = 0
+            if self.use_v5:
+                self._v5_confirmed = True
+                alias_max = int(getattr(properties, "TopicAliasMaximum", 0) or 0) if properties else 0
             with self._lock:
+                # Aliases are per connection; start over after every CONNACK.
+                self._alias_max = alias_max
+                self._topic_aliases = {}
                 self.is_connected = True
                 self._connected_evt.set()
-                subscribe_topics = tuple(sorted(self.subscribe_topics))
+                wanted = set(self.subscribe_topics)
+                session_present = self.persistent_session and bool(getattr(flags, "session_present", False))
+                if not session_present:
+                    self._broker_topics = set()
+                to_sub = tuple(sorted(wanted - self._broker_topics))
+                to_unsub = tuple(sorted(self._broker_topics - wanted))
                 self.last_error = ""
 
-            logger.info("Connected to MQTT broker: %s:%s (tls=%s)", self.broker, self.port, self.use_tls)
+            logger.info(
+                "Connected to MQTT broker: %s:%s (tls=%s, mqtt=%s, session_present=%s, topic_alias_max=%s)",
+                self.broker,
+                self.port,
+                self.use_tls,
+                PROTOCOL_V5 if self.use_v5 else PROTOCOL_V311,
+                session_present,
+                alias_max,
+            )
             self._safe_status_cb(True, "")
 
-            if subscribe_topics:
-                self._subscribe_topics(subscribe_topics)
+            # A resumed session still holds its subscriptions; only send the difference.
+            if to_sub:
+                self._subscribe_topics(to_sub)
+            if to_unsub:
+                self._unsubscribe_topics(to_unsub)
         else:
+            code = getattr(reason_code, "value", reason_code)
+            if (
+                self.use_v5
+                and self.protocol_mode == PROTOCOL_AUTO
+                and not self._v5_confirmed
+                and code in _UNSUPPORTED_PROTOCOL_CODES
+            ):
+                self._fallback_to_v311()
+                return
             detail = f"Connection failed, reason code: {reason_code}"
             logger.warning("Connection failed with reason code %s", reason_code)
             with self._lock:
@@ -105,6 +166,8 @@ class MQTTClient:
             self._safe_status_cb(False, detail)
 
     def _on_disconnect(self, client, userdata, disconnect_flags, reason_code, properties):
+        if client is not self.client:
+            return
         with self._lock:
             self.is_connected = False
             self._connected_evt.clear()
@@ -125,35 +188,17 @@ class MQTTClient:
             self._safe_status_cb(False, detail)
 
     def _on_message(self, client, userdata, message):
-        try:
-            text = message.payload.decode("utf-8", errors="replace")
-        except Exception:
-            text = str(message.payload)
-        self._safe_msg_cb(text)
-
-    @staticmethod
-    def _normalize_topic(topic):
-        return str(topic or "").strip()
-
-    def _normalize_topics(self, topics):
-        if topics is None:
-            return set()
-        if isinstance(topics, str):
-            normalized = self._normalize_topic(topics)
-            return {normalized} if normalized else set()
-        result = set()
-        for item in topics:
-            normalized = self._normalize_topic(item)
-            if normalized:
-                result.add(normalized)
-        return result
+        self._deliver(message.topic, message.payload)
 
     def _subscribe_topics(self, topics):
         for topic in topics:
             try:
-                result, mid = self.client.subscribe((topic, 0))
+                result, mid = self.client.subscribe((topic, self.event_qos))
                 if result != mqtt.MQTT_ERR_SUCCESS:
                     logger.warning("Subscribe failed topic=%s rc=%s mid=%s", topic, result, mid)
+                    continue
+                with self._lock:
+                    self._broker_topics.add(topic)
             except Exception:
                 logger.exception("Subscribe failed topic=%s", topic)
 
@@ -163,34 +208,55 @@ class MQTTClient:
                 result, mid = self.client.unsubscribe(topic)
                 if result != mqtt.MQTT_ERR_SUCCESS:
                     logger.warning("Unsubscribe failed topic=%s rc=%s mid=%s", topic, result, mid)
+                    continue
+                with self._lock:
+                    self._broker_topics.discard(topic)
             except Exception:
                 logger.exception("Unsubscribe failed topic=%s", topic)
 
-    def connect(self, publish_topic, subscribe_topics=None):
-        """Connect to MQTT broker and bind publish topic + subscription window."""
-        normalized_publish = self._normalize_topic(publish_topic)
-        if not normalized_publish:
-            detail = "Publish topic cannot be empty"
+    def _start_connect(self):
+        if self.use_tls:
+            self._configure_tls()
+        if self.will:
+            will_topic, will_payload, will_retain = self.will
+            self.client.will_set(will_topic, payload=will_payload, qos=1, retain=will_retain)
+        kwargs = {}
+        if self.use_v5:
+            properties = Properties(PacketTypes.CONNECT)
+            if self.persistent_session:
+                properties.SessionExpiryInterval = self.session_expiry_s
+            kwargs = {"clean_start": not self.persistent_session, "properties": properties}
+        self.client.connect_async(self.broker, self.port, keepalive=60, **kwargs)
+        self.client.loop_start()
+
+    def _fallback_to_v311(self):
+        """Rebuild the paho client for MQTT 3.1.1 after the broker refused version 5."""
+        logger.info("Broker %s:%s does not support MQTT 5, falling back to 3.1.1", self.broker, self.port)
+        old_client = self.client
+        self.use_v5 = False
+        self.client = self._create_paho_client()
+        try:
+            # Runs on the old client's network thread; loop_stop() only flags it to exit.
+            old_client.loop_stop()
+            old_client.disconnect()
+        except Exception:
+            logger.exception("Error while stopping MQTT 5 client")
+        try:
+            self._start_connect()
+        except Exception as e:
+            logger.exception("MQTT 3.1.1 fallback failed: %s", e)
+            detail = f"Connection init failed: {e}"
             with self._lock:
                 self.last_error = detail
             self._safe_status_cb(False, detail)
-            return False
-
-        normalized_subscribe = self._normalize_topics(subscribe_topics)
-        if not normalized_subscribe:
-            normalized_subscribe = {normalized_publish}
 
-        with self._lock:
-            self.publish_topic = normalized_publish
-            self.subscribe_topics = set(normalized_subscribe)
-            self._closing = False
-            self._connected_evt.clear()
+    def connect(self, publish_topic, subscribe_topics=None):
+        """Connect to MQTT broker and bind publish topic + subscription window."""
+        if not self._bind_topics(publish_topic, subscribe_topics):
+            return False
 
         try:
-            if self.use_tls:
-                self._configure_tls()
-            self.client.connect_async(self.broker, self.port, keepalive=60)
-            self.client.loop_start()
+            self._start_connect()
             with self._lock:
                 self.last_error = ""
             return True
@@ -202,41 +268,91 @@ class MQTTClient:
             self._safe_status_cb(False, detail)
             return False
 
+    def _event_publish_args(self, topic):
+        """Topic and MQTT 5 properties for one key event: expiry plus topic alias."""
+        if not self.use_v5:
+            return topic, None, False
+        properties = None
+        if self.message_expiry_s > 0:
+            properties = Properties(PacketTypes.PUBLISH)
+            properties.MessageExpiryInterval = self.message_expiry_s
+        # QoS 1 events can be resent on a later connection where aliases no longer exist.
+        if self.event_qos != 0:
+            return topic, properties, False
+        with self._lock:
+            if self._alias_max <= 0:
+                return topic, properties, False
+            alias = self._topic_aliases.get(topic)
+            new_alias = alias is None
+            if new_alias:
+                if len(self._topic_aliases) >= self._alias_max:
+                    return topic, properties, False
+                alias = len(self._topic_aliases) + 1
+                self._topic_aliases[topic] = alias
+        if properties is None:
+            properties = Properties(PacketTypes.PUBLISH)
+        properties.TopicAlias = alias
+        # First use binds the alias with the full topic; later ones send an empty topic.
+        return (topic if new_alias else ""), properties, new_alias
+
+    def _forget_topic_alias(self, topic):
+        with self._lock:
+            self._topic_aliases.pop(topic, None)
+
     def send_message(self, message):
-        """Send message to publish topic."""
+        """Send message to publish topic; returns True when handed to the client."""
         if not message:
-            return
+            return False
 
         with self._lock:
-            if not (self.is_connected and self.publish_topic) or self._closing:
-                return
+            if not self.publish_topic or self._closing:
+                return False
+            # In persistent mode paho queues QoS 1 publishes until the link is back.
+            if not (self.is_connected or self.persistent_session):
+                return False
             topic = self.publish_topic
 
         try:
-            info = self.client.publish(topic, payload=message, qos=0, retain=False)
+            wire_topic, properties, new_alias = self._event_publish_args(topic)
+            info = self.client.publish(
+                wire_topic,
+                payload=message,
+                qos=self.event_qos,
+                retain=False,
+                properties=properties,
+            )
+            if info.rc == mqtt.MQTT_ERR_NO_CONN and self.persistent_session:
+                return True
             if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                if new_alias:
+                    # The binding publish never left; the broker does not know this alias.
+                    self._forget_topic_alias(topic)
                 logger.warning("Publish failed rc=%s", info.rc)
+                return False
+            return True
         except Exception as e:
             logger.exception("Failed to send message: %s", e)
             with self._lock:
                 self.last_error = f"Send message failed: {e}"
             self.close()
+            return False
 
-    def set_publish_topic(self, topic):
-        """Update publish topic dynamically."""
-        normalized = self._normalize_topic(topic)
-        if not normalized:
-            return
+    def publish_to(self, topic, payload, retain=False):
+        """Publish to an explicit topic; retained messages use QoS 1."""
+        topic = self._normalize_topic(topic)
         with self._lock:
-            self.publish_topic = normalized
-
-    def set_publish_group(self, group):
-        """Backward compatible alias for older call sites."""
-        self.set_publish_topic(group)
+            if not (self.is_connected and topic) or self._closing:
+                return False
+        try:
+            info = self.client.publish(topic, payload=payload, qos=1 if retain else 0, retain=bool(retain))
+            return info.rc == mqtt.MQTT_ERR_SUCCESS
+        except Exception:
+            logger.exception("Failed to publish to %s", topic)
+            return False
 
     def replace_subscriptions(self, topics):
         """Replace subscription window; applies diff when connected."""
-        normalized = self._normalize_topics(topics)
+        normalized = self._with_routes(self._normalize_topics(topics))
         with self._lock:
             old_topics = set(self.subscribe_topics)
             self.subscribe_topics = set(normalized)
@@ -252,14 +368,88 @@ class MQTTClient:
         if to_unsub:
             self._unsubscribe_topics(to_unsub)
 
+    def close_discarding_session(self):
+        """
+        Close and drop the broker-side session, for connections that lost an endpoint race.
+
+        MQTT 5 disconnects with SessionExpiryInterval 0. MQTT 3.1.1 has no
+        such option, so a short clean-session CONNECT with the same client
+        id clears the session after the socket is gone.
+        """
+        self.will = None
+        if not self.persistent_session:
+            self.close()
+            return
+        if self.use_v5:
+            with self._lock:
+                if self._closing:
+                    return
+                self._closing = True
+            properties = Properties(PacketTypes.DISCONNECT)
+            properties.SessionExpiryInterval = 0
+            try:
+                try:
+                    self.client.loop_stop(force=False)
+                except TypeError:
+                    self.client.loop_stop()
+                self.client.disconnect(properties=properties)
+            except Exception:
+                logger.exception("Error while discarding MQTT 5 session")
+            finally:
+                with self._lock:
+                    self.is_connected = False
+                    self._connected_evt.clear()
+                    self.publish_topic = None
+                    self.subscribe_topics = set()
+            self._safe_status_cb(False, "Connection closed")
+            return
+        self.close()
+        threading.Thread(target=self._purge_v311_session, name="mqtt-session-purge", daemon=True).start()
+
+    def _purge_v311_session(self):
+        client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            self.client_id,
+            clean_session=True,
+            protocol=mqtt.MQTTv311,
+        )
+        if self.username and self.password:
+            client.username_pw_set(self.username, self.password)
+        try:
+            if self.use_tls:
+                self._configure_tls(client)
+            client.connect(self.broker, self.port, keepalive=10)
+            # One read for CONNACK; the broker drops the old session on CONNECT.
+            client.loop(timeout=2.0)
+            client.disconnect()
+        except Exception:
+            logger.warning("Could not purge MQTT session %s on %s:%s", self.client_id, self.broker, self.port)
+
     def close(self):
         """Close MQTT connection."""
         with self._lock:
             if self._closing:
                 return
+            announce_will = self._graceful_will_messages() if self.is_connected else []
             self._closing = True
 
         try:
+            # Queue every offline message first, then wait once against a shared deadline.
+            pending = []
+            for will_topic, will_payload, will_retain in announce_will:
+                try:
+                    pending.append(self.client.publish(will_topic, payload=will_payload, qos=1, retain=will_retain))
+                except Exception:
+                    logger.exception("Failed to publish will on close")
+            deadline = time.monotonic() + CLOSE_PUBLISH_TIMEOUT_S
+            for info in pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    info.wait_for_publish(timeout=remaining)
+                except Exception:
+                    logger.exception("Failed to publish will on close")
             try:
                 self.client.loop_stop(force=False)
             except TypeError:
@@ -275,10 +465,3 @@ class MQTTClient:
                 self.subscribe_topics = set()
             logger.info("MQTT connection closed.")
             self._safe_status_cb(False, "Connection closed")
-
-    def heartbeat(self):
-        """Optional heartbeat packet."""
-        try:
-            self.send_message("HEARTBEAT")
-        except Exception as e:
-            logger.exception("Heartbeat error: %s", e)
@@ -0,0 +1,208 @@
+"""Background publisher for outbound MQTT key events."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+
+
+def normalize_overflow_policy(policy, default=OVERFLOW_DROP_OLDEST):
+    value = str(policy or "").strip().lower()
+    return value if value in OVERFLOW_POLICIES else default
+
+
+@dataclass(frozen=True)
+class PublisherStats:
+    queue_depth: int
+    enqueued: int
+    published: int
+    failed: int
+    dropped: int
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_max_ms: float
+
+
+class MQTTPublisher:
+    """
+    Drains outbound messages on a dedicated worker thread.
+
+    Messages are sent as soon as they are queued instead of waiting for a
+    GUI timer tick. When the queue is full the overflow policy decides what
+    happens:
+    - drop_oldest: discard the oldest queued message and keep the new one
+    - drop_newest: reject the new message
+    - block: wait up to block_timeout_ms for room, then reject
+    Every discarded message is counted and reported through on_drop.
+    """
+
+    LATENCY_WINDOW = 512
+
+    def __init__(
+        self,
+        send: Callable[[str], Optional[bool]],
+        max_queue: int = 2000,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        block_timeout_ms: int = 20,
+        on_drop: Optional[Callable[[int], None]] = None,
+        name: str = "mqtt-publisher",
+    ) -> None:
+        self._send = send
+        self.max_queue = max(1, int(max_queue))
+        self.overflow_policy = normalize_overflow_policy(overflow_policy)
+        self.block_timeout_ms = max(0, int(block_timeout_ms))
+        self.on_drop = on_drop
+        self._name = name
+
+        self._queue: deque[tuple[float, str]] = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._latencies_ms: deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+
+        self._enqueued = 0
+        self._published = 0
+        self._failed = 0
+        self._dropped = 0
+
+    @property
+    def is_running(self) -> bool:
+        with self._cond:
+            return self._running
+
+    @property
+    def dropped(self) -> int:
+        with self._cond:
+            return self._dropped
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+            thread = self._thread
+            self._thread = None
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def clear(self) -> None:
+        with self._cond:
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def publish(self, message: str) -> bool:
+        """Queue one message; returns False when a message had to be dropped."""
+        if not message:
+            return True
+
+        dropped_now = 0
+        accepted = True
+        with self._cond:
+            if not self._running:
+                self._dropped += 1
+                dropped_now = self._dropped
+                accepted = False
+            elif len(self._queue) >= self.max_queue:
+                if self.overflow_policy == OVERFLOW_BLOCK and self.block_timeout_ms > 0:
+                    self._cond.wait_for(
+                        lambda: len(self._queue) < self.max_queue or not self._running,
+                        timeout=self.block_timeout_ms / 1000.0,
+                    )
+                if not self._running or len(self._queue) >= self.max_queue:
+                    if self.overflow_policy == OVERFLOW_DROP_OLDEST and self._running:
+                        self._queue.popleft()
+                    else:
+                        accepted = False
+                    self._dropped += 1
+                    dropped_now = self._dropped
+
+            if accepted:
+                self._queue.append((time.perf_counter(), message))
+                self._enqueued += 1
+                self._cond.notify_all()
+
+        if dropped_now:
+            if dropped_now == 1 or dropped_now % 100 == 0:
+                logger.warning(
+                    "Publisher queue overflow policy=%s limit=%s dropped_total=%s",
+                    self.overflow_policy,
+                    self.max_queue,
+                    dropped_now,
+                )
+            cb = self.on_drop
+            if cb:
+                try:
+                    cb(dropped_now)
+                except Exception:
+                    logger.exception("on_drop callback error")
+        return dropped_now == 0
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                enqueued_at, message = self._queue.popleft()
+                self._cond.notify_all()
+
+            try:
+                ok = self._send(message) is not False
+            except Exception:
+                logger.exception("Publisher send failed")
+                ok = False
+
+            latency_ms = (time.perf_counter() - enqueued_at) * 1000.0
+            with self._cond:
+                if ok:
+                    self._published += 1
+                    self._latencies_ms.append(latency_ms)
+                else:
+                    self._failed += 1
+
+    def stats(self) -> PublisherStats:
+        with self._cond:
+            latencies = sorted(self._latencies_ms)
+            depth = len(self._queue)
+            enqueued = self._enqueued
+            published = self._published
+            failed = self._failed
+            dropped = self._dropped
+
+        def _pct(q):
+            if not latencies:
+                return 0.0
+            idx = min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))
+            return float(latencies[idx])
+
+        return PublisherStats(
+            queue_depth=depth,
+            enqueued=enqueued,
+            published=published,
+            failed=failed,
+            dropped=dropped,
+            latency_p50_ms=_pct(0.50),
+            latency_p95_ms=_pct(0.95),
+            latency_max_ms=float(latencies[-1]) if latencies else 0.0,
+        )
@@ -0,0 +1,154 @@
+"""MQTT-native presence: retained status per station plus a channel roster."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Optional
+
+PRESENCE_PROTOCOL = "morselink.presence"
+PRESENCE_VERSION = 2
+PRESENCE_PREFIX = "morselink/v2/presence"
+PRESENCE_WILDCARD = f"{PRESENCE_PREFIX}/+"
+
+STATUS_ONLINE = "online"
+STATUS_OFFLINE = "offline"
+
+
+def presence_topic(call, prefix=PRESENCE_PREFIX):
+    # One retained slot per callsign keeps the broker's retained set bounded.
+    return f"{prefix}/{str(call or 'UNKNOWN').strip().upper()}"
+
+
+def build_presence(call, channel, status=STATUS_ONLINE, session_id=""):
+    return {
+        "protocol": PRESENCE_PROTOCOL,
+        "version": PRESENCE_VERSION,
+        "call": str(call or "").strip().upper(),
+        "channel": int(channel) if channel is not None else None,
+        "status": status,
+        "session_id": session_id,
+        "ts_ms": int(time.time() * 1000),
+    }
+
+
+def encode_presence(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class PresenceRoster:
+    """
+    In-memory roster built from retained presence messages.
+
+    apply() is incremental: each message moves one callsign between
+    channels, so per-channel occupancy is always available without
+    scanning. An empty retained payload or an "offline" status removes the
+    station. Safe to feed from the network thread and read from the GUI.
+
+    Each entry remembers the session_id and ts_ms it was announced with.
+    A station that reconnects before the broker expires its old connection
+    gets that connection's Last Will delivered after the new online record,
+    so offline messages from another session are ignored, as is anything
+    older than the entry when no session can be compared.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._channel_of: dict[str, Optional[int]] = {}
+        self._calls_by_channel: dict[Optional[int], set[str]] = {}
+        # call -> (session_id, ts_ms) of the message that created the entry
+        self._origin: dict[str, tuple[str, int]] = {}
+
+    @staticmethod
+    def _ts_of(data) -> int:
+        try:
+            return int(data.get("ts_ms") or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _is_stale_locked(self, call: str, session_id: str, ts_ms: int, offline: bool) -> bool:
+        origin = self._origin.get(call)
+        if origin is None:
+            return False
+        current_session, current_ts = origin
+        if offline and session_id and current_session:
+            # A will is built before its session announces itself, so its
+            # ts_ms predates the entry; the session alone decides.
+            return session_id != current_session
+        return bool(ts_ms and current_ts and ts_ms < current_ts)
+
+    def _remove_locked(self, call: str) -> bool:
+        if call not in self._channel_of:
+            return False
+        self._origin.pop(call, None)
+        channel = self._channel_of.pop(call)
+        calls = self._calls_by_channel.get(channel)
+        if calls is not None:
+            calls.discard(call)
+            if not calls:
+                del self._calls_by_channel[channel]
+        return True
+
+    def apply(self, topic: str, text: str) -> bool:
+        """Apply one presence message; returns True when the roster changed."""
+        topic_call = str(topic or "").rsplit("/", 1)[-1].strip().upper()
+        data = None
+        if text:
+            try:
+                data = json.loads(text)
+            except Exception:
+                return False
+            if not isinstance(data, dict) or data.get("protocol") != PRESENCE_PROTOCOL:
+                return False
+
+        call = str((data or {}).get("call") or topic_call).strip().upper()
+        if not call:
+            return False
+
+        with self._lock:
+            if data is None:
+                # Retained slot cleared by a clean shutdown.
+                return self._remove_locked(call)
+            session_id = str(data.get("session_id") or "")
+            ts_ms = self._ts_of(data)
+            online = data.get("status") == STATUS_ONLINE
+            if self._is_stale_locked(call, session_id, ts_ms, offline=not online):
+                return False
+            if not online:
+                return self._remove_locked(call)
+            try:
+                channel = int(data.get("channel"))
+            except (TypeError, ValueError):
+                channel = None
+            if call in self._channel_of and self._channel_of[call] == channel:
+                self._origin[call] = (session_id, ts_ms)
+                return False
+            self._remove_locked(call)
+            self._origin[call] = (session_id, ts_ms)
+            self._channel_of[call] = channel
+            self._calls_by_channel.setdefault(channel, set()).add(call)
+            return True
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return len(self._channel_of)
+
+    def channel_of(self, call) -> Optional[int]:
+        with self._lock:
+            return self._channel_of.get(str(call or "").strip().upper())
+
+    def calls_on(self, channel) -> list[str]:
+        with self._lock:
+            return sorted(self._calls_by_channel.get(int(channel), ()))
+
+    def occupancy(self) -> dict[Optional[int], int]:
+        with self._lock:
+            return {channel: len(calls) for channel, calls in self._calls_by_channel.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._channel_of.clear()
+            self._calls_by_channel.clear()
+            self._origin.clear()
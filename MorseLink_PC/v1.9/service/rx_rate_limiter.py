@@ -0,0 +1,146 @@
+"""Per-sender flood protection applied to raw messages before parsing."""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Cheap sender lookup so floods are rejected without a full json.loads().
+_SENDER_RE = re.compile(r'"myCall"\s*:\s*"([^"\\]{1,64})"')
+UNKNOWN_SENDER = "?"
+
+
+def sender_key_of(text) -> str:
+    match = _SENDER_RE.search(text) if isinstance(text, str) else None
+    return match.group(1).strip().upper() if match else UNKNOWN_SENDER
+
+
+@dataclass(frozen=True)
+class ThrottleStats:
+    sender: str
+    allowed: int
+    throttled: int
+    mutes: int
+    muted: bool
+
+
+class _SenderBucket:
+    __slots__ = (
+        "tokens",
+        "last_ms",
+        "allowed",
+        "throttled",
+        "window_start_ms",
+        "window_throttled",
+        "muted_until_ms",
+        "mutes",
+    )
+
+    def __init__(self, burst: float, now_ms: float) -> None:
+        self.tokens = float(burst)
+        self.last_ms = float(now_ms)
+        self.allowed = 0
+        self.throttled = 0
+        self.window_start_ms = float(now_ms)
+        self.window_throttled = 0
+        self.muted_until_ms = 0.0
+        self.mutes = 0
+
+
+class SenderRateLimiter:
+    """
+    Token bucket per sender callsign.
+
+    Each sender may deliver rate_per_s events with bursts up to burst.
+    Excess events are dropped and counted. A sender that is throttled at
+    least mute_threshold times within one second is muted for mute_ms, and
+    everything it sends in that time is dropped without touching its
+    bucket. rate_per_s <= 0 disables limiting.
+
+    Thread-safe; meant to run on the transport's network thread so a flood
+    never reaches the GUI thread's event queue.
+    """
+
+    def __init__(
+        self,
+        rate_per_s: float = 60.0,
+        burst: float = 120.0,
+        mute_threshold: Optional[int] = None,
+        mute_ms: int = 30_000,
+        max_senders: int = 1024,
+    ) -> None:
+        self.rate_per_s = float(rate_per_s)
+        self.burst = max(1.0, float(burst))
+        self.mute_threshold = int(mute_threshold if mute_threshold is not None else max(1, round(self.rate_per_s)))
+        self.mute_ms = max(0, int(mute_ms))
+        self.max_senders = max(1, int(max_senders))
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, _SenderBucket]" = OrderedDict()
+
+    def allow(self, sender: str, now_ms: float) -> bool:
+        if self.rate_per_s <= 0:
+            return True
+        with self._lock:
+            bucket = self._buckets.get(sender)
+            if bucket is None:
+                bucket = self._buckets[sender] = _SenderBucket(self.burst, now_ms)
+                while len(self._buckets) > self.max_senders:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(sender)
+
+            if now_ms < bucket.muted_until_ms:
+                bucket.throttled += 1
+                return False
+
+            elapsed = max(0.0, now_ms - bucket.last_ms)
+            bucket.last_ms = float(now_ms)
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * self.rate_per_s / 1000.0)
+            if bucket.tokens >= 1.0:
+                bucket.tokens -= 1.0
+                bucket.allowed += 1
+                return True
+
+            bucket.throttled += 1
+            if now_ms - bucket.window_start_ms >= 1000.0:
+                bucket.window_start_ms = float(now_ms)
+                bucket.window_throttled = 0
+            bucket.window_throttled += 1
+            if self.mute_ms > 0 and bucket.window_throttled >= self.mute_threshold:
+                bucket.muted_until_ms = float(now_ms) + self.mute_ms
+                bucket.mutes += 1
+                bucket.window_throttled = 0
+                logger.warning("Muting sender %s for %s ms after flooding", sender, self.mute_ms)
+            return False
+
+    def unmute(self, sender: str) -> None:
+        with self._lock:
+            bucket = self._buckets.get(sender)
+            if bucket is not None:
+                bucket.muted_until_ms = 0.0
+                bucket.tokens = self.burst
+
+    def stats(self, now_ms: float) -> list[ThrottleStats]:
+        """Senders that have been throttled at least once."""
+        with self._lock:
+            return [
+                ThrottleStats(
+                    sender=sender,
+                    allowed=bucket.allowed,
+                    throttled=bucket.throttled,
+                    mutes=bucket.mutes,
+                    muted=now_ms < bucket.muted_until_ms,
+                )
+                for sender, bucket in self._buckets.items()
+                if bucket.throttled
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
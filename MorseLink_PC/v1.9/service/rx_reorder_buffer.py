@@ -0,0 +1,99 @@
+"""Small per-sender reorder buffer for received key events."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+DEFAULT_MAX_EVENTS = 8
+DEFAULT_HOLD_MS = 40
+
+
+class ReorderBuffer:
+    """
+    Releases events of one sender session in `seq` order.
+
+    - The next expected seq is released at once, together with any held
+      successors.
+    - An event ahead of a hole is held until the hole is filled, hold_ms
+      passes since the hole was noticed, or more than max_events are held.
+      The hole is then skipped.
+    - Events at or below the released seq are late/duplicates and dropped.
+    - With first_seq the buffer expects the session to start there, so an
+      early reorder (N+1 before N) is held like any other hole. A receiver
+      that joins mid-session waits hold_ms once before skipping to the
+      first seq it saw. Without first_seq the first arrival seeds the
+      expected seq.
+
+    hold_ms <= 0 or max_events <= 0 disables holding: gaps are skipped
+    immediately, which matches the historical drop-on-regression behaviour.
+    """
+
+    __slots__ = ("max_events", "hold_ms", "next_seq", "deadline_ms", "_held")
+
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        hold_ms: int = DEFAULT_HOLD_MS,
+        first_seq: Optional[int] = None,
+    ) -> None:
+        self.max_events = max(0, int(max_events))
+        self.hold_ms = max(0, int(hold_ms))
+        self.next_seq: Optional[int] = None if first_seq is None else int(first_seq)
+        self.deadline_ms: Optional[int] = None
+        self._held: dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._held)
+
+    def push(self, seq: int, item: Any, now_ms: int) -> list:
+        """Add one event; returns the events that can be released, in order."""
+        seq = int(seq)
+        if self.next_seq is None:
+            self.next_seq = seq
+        if seq < self.next_seq or seq in self._held:
+            return []
+
+        self._held[seq] = item
+        released = self._drain()
+        if not self._held:
+            return released
+
+        if self.hold_ms <= 0 or self.max_events <= 0:
+            return released + self._skip_gap()
+        if len(self._held) > self.max_events:
+            released += self._skip_gap()
+        if self._held and self.deadline_ms is None:
+            self.deadline_ms = int(now_ms) + self.hold_ms
+        return released
+
+    def expire(self, now_ms: int) -> list:
+        """Skip the current hole if its hold time has passed."""
+        if self.deadline_ms is None or int(now_ms) < self.deadline_ms:
+            return []
+        released = self._skip_gap()
+        if self._held:
+            self.deadline_ms = int(now_ms) + self.hold_ms
+        return released
+
+    def flush(self) -> list:
+        """Release everything held, skipping all holes."""
+        released = []
+        while self._held:
+            released += self._skip_gap()
+        return released
+
+    def _skip_gap(self) -> list:
+        if not self._held:
+            return []
+        self.next_seq = min(self._held)
+        return self._drain()
+
+    def _drain(self) -> list:
+        released = []
+        held = self._held
+        while self.next_seq in held:
+            released.append(held.pop(self.next_seq))
+            self.next_seq += 1
+        if not held:
+            self.deadline_ms = None
+        return released
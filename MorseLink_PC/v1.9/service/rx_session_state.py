@@ -0,0 +1,179 @@
+"""Receive-side session state for remote key-event senders."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+from service.keyevent_protocol import FIRST_SEQ
+from service.rx_reorder_buffer import DEFAULT_HOLD_MS, DEFAULT_MAX_EVENTS, ReorderBuffer
+
+# (sender_call_upper, session_id, channel)
+RxStateKey = tuple[str, str, int]
+
+
+class RxSessionState:
+    """Keying state of one remote sender session on one channel."""
+
+    __slots__ = (
+        "sender_call",
+        "session_id",
+        "channel",
+        "last_seq",
+        "is_down",
+        "down_time_ms",
+        "last_up_time_ms",
+        "symbol_buffer",
+        "dot_ms_hint",
+        "dash_ms_hint",
+        "letter_gap_ms_hint",
+        "word_gap_ms_hint",
+        "last_rx_wallclock_ms",
+        "max_hold_timeout_ms",
+        "last_event_time_ms",
+        "last_event_type",
+        "reorder",
+        "delay_floor_ms",
+        "late_ms",
+    )
+
+    def __init__(
+        self,
+        sender_call: str,
+        session_id: str,
+        channel: int,
+        now_ms: int,
+        reorder_max_events: int = DEFAULT_MAX_EVENTS,
+        reorder_hold_ms: int = DEFAULT_HOLD_MS,
+    ) -> None:
+        self.sender_call = sender_call
+        self.session_id = session_id
+        self.channel = int(channel)
+        self.last_seq = -1
+        self.is_down = False
+        self.down_time_ms: Optional[int] = None
+        self.last_up_time_ms: Optional[int] = None
+        self.symbol_buffer = ""
+        self.dot_ms_hint = 0
+        self.dash_ms_hint = 0
+        self.letter_gap_ms_hint = 0
+        self.word_gap_ms_hint = 0
+        self.last_rx_wallclock_ms = int(now_ms)
+        self.max_hold_timeout_ms = 1200
+        self.last_event_time_ms = -1
+        self.last_event_type = ""
+        self.reorder = ReorderBuffer(reorder_max_events, reorder_hold_ms, first_seq=FIRST_SEQ)
+        self.delay_floor_ms: Optional[int] = None
+        self.late_ms = 0
+
+    @classmethod
+    def from_payload(cls, payload: dict, now_ms: int, **reorder_kwargs) -> "RxSessionState":
+        state = cls(payload["myCall"], payload["session_id"], int(payload["myChannel"]), now_ms, **reorder_kwargs)
+        state.apply_timing_hints(payload)
+        return state
+
+    def observe_arrival(self, event_time_ms: int, now_ms: int) -> int:
+        """
+        Track how far behind real time this sender's events arrive.
+
+        Sender and receiver clocks are unrelated, so lateness is measured
+        against the smallest arrival delay seen in the session. Events
+        replayed by the broker after a reconnect show up as large values.
+        """
+        delay = int(now_ms) - int(event_time_ms)
+        if self.delay_floor_ms is None or delay < self.delay_floor_ms:
+            self.delay_floor_ms = delay
+        self.late_ms = delay - self.delay_floor_ms
+        return self.late_ms
+
+    def apply_timing_hints(self, payload: dict) -> None:
+        self.dot_ms_hint = int(payload["dot_ms_hint"])
+        self.dash_ms_hint = int(payload["dash_ms_hint"])
+        self.letter_gap_ms_hint = int(payload["letter_gap_ms_hint"])
+        self.word_gap_ms_hint = int(payload["word_gap_ms_hint"])
+        self.max_hold_timeout_ms = max(1200, self.dash_ms_hint * 4)
+
+
+class RxSessionTable:
+    """
+    Bounded table of receive sessions.
+
+    - Entries are kept in least-recently-used order, so idle senders are
+      evicted from the head without scanning the whole table.
+    - A secondary index by (call, channel) points at the live session, so a
+      new session id from the same sender replaces the stale one in O(1).
+    """
+
+    DEFAULT_TTL_MS = 10 * 60 * 1000
+    DEFAULT_MAX_SESSIONS = 512
+
+    def __init__(self, ttl_ms: int = DEFAULT_TTL_MS, max_sessions: int = DEFAULT_MAX_SESSIONS) -> None:
+        self.ttl_ms = max(1000, int(ttl_ms))
+        self.max_sessions = max(1, int(max_sessions))
+        self._states: "OrderedDict[RxStateKey, RxSessionState]" = OrderedDict()
+        self._by_sender: dict[tuple[str, int], RxStateKey] = {}
+
+    @staticmethod
+    def key_for(payload: dict) -> RxStateKey:
+        return (str(payload["myCall"]).upper(), str(payload["session_id"]), int(payload["myChannel"]))
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, key) -> bool:
+        return key in self._states
+
+    def __iter__(self) -> Iterator[RxStateKey]:
+        return iter(self._states)
+
+    def get(self, key) -> Optional[RxSessionState]:
+        if key is None:
+            return None
+        return self._states.get(key)
+
+    def items(self):
+        return self._states.items()
+
+    def touch(self, key: RxStateKey, now_ms: int) -> None:
+        state = self._states.get(key)
+        if state is None:
+            return
+        state.last_rx_wallclock_ms = int(now_ms)
+        self._states.move_to_end(key)
+
+    def insert(self, key: RxStateKey, state: RxSessionState) -> Optional[RxStateKey]:
+        """Insert a session and return the stale key it replaced, if any."""
+        sender_key = (key[0], key[2])
+        stale_key = self._by_sender.get(sender_key)
+        if stale_key == key:
+            stale_key = None
+        if stale_key is not None:
+            self._states.pop(stale_key, None)
+        self._states[key] = state
+        self._states.move_to_end(key)
+        self._by_sender[sender_key] = key
+        return stale_key
+
+    def pop(self, key: RxStateKey) -> Optional[RxSessionState]:
+        state = self._states.pop(key, None)
+        if state is not None:
+            sender_key = (key[0], key[2])
+            if self._by_sender.get(sender_key) == key:
+                del self._by_sender[sender_key]
+        return state
+
+    def evict_idle(self, now_ms: int) -> list[RxStateKey]:
+        """Drop sessions idle longer than ttl_ms and trim to max_sessions."""
+        evicted = []
+        deadline = int(now_ms) - self.ttl_ms
+        while self._states:
+            key, state = next(iter(self._states.items()))
+            if len(self._states) <= self.max_sessions and state.last_rx_wallclock_ms > deadline:
+                break
+            self.pop(key)
+            evicted.append(key)
+        return evicted
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._by_sender.clear()
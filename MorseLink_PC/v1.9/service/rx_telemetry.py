@@ -0,0 +1,253 @@
+"""Per-sender network quality telemetry for received key events."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class LinkQualitySnapshot:
+    sender_call: str
+    channel: int
+    received: int
+    lost: int
+    reordered: int
+    duplicates: int
+    debounce_drops: int
+    jitter_ms: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    last_seen_ms: int
+
+    @property
+    def expected(self) -> int:
+        return self.received + self.lost
+
+    @property
+    def loss_ratio(self) -> float:
+        expected = self.expected
+        return float(self.lost) / expected if expected > 0 else 0.0
+
+
+class SenderLinkStats:
+    """Sequence and timing statistics for one (call, channel) sender."""
+
+    __slots__ = (
+        "sender_call",
+        "channel",
+        "session_id",
+        "highest_seq",
+        "_seen",
+        "_missing",
+        "received",
+        "lost",
+        "reordered",
+        "duplicates",
+        "debounce_drops",
+        "jitter_ms",
+        "_prev_arrival_ms",
+        "_prev_event_time_ms",
+        "_delay_floor_ms",
+        "_delays_ms",
+        "last_seen_ms",
+    )
+
+    SEQ_WINDOW = 256
+    DELAY_WINDOW = 256
+
+    def __init__(self, sender_call: str, channel: int) -> None:
+        self.sender_call = sender_call
+        self.channel = int(channel)
+        self.session_id = None
+        self.highest_seq = -1
+        self._seen: set[int] = set()
+        # Holes of the current session that were counted as lost and may still arrive.
+        self._missing: set[int] = set()
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.debounce_drops = 0
+        self.jitter_ms = 0.0
+        self._prev_arrival_ms: Optional[float] = None
+        self._prev_event_time_ms: Optional[float] = None
+        self._delay_floor_ms: Optional[float] = None
+        self._delays_ms: deque[float] = deque(maxlen=self.DELAY_WINDOW)
+        self.last_seen_ms = 0
+
+    def _reset_session(self, session_id: str) -> None:
+        self.session_id = session_id
+        self.highest_seq = -1
+        self._seen.clear()
+        self._missing.clear()
+        self._prev_arrival_ms = None
+        self._prev_event_time_ms = None
+        self._delay_floor_ms = None
+
+    def observe(self, session_id: str, seq: int, event_time_ms: int, arrival_ms: float) -> str:
+        """Record one arrival; returns "ok", "gap", "reordered" or "duplicate"."""
+        if session_id != self.session_id:
+            self._reset_session(session_id)
+        self.last_seen_ms = int(arrival_ms)
+
+        # Below the window the seen set has been pruned, so a duplicate can no longer be
+        # told from a very late event; neither is counted as received nor touches lost.
+        if seq in self._seen or (self.highest_seq >= 0 and seq <= self.highest_seq - self.SEQ_WINDOW):
+            self.duplicates += 1
+            return "duplicate"
+
+        self._seen.add(seq)
+        if len(self._seen) > self.SEQ_WINDOW * 2:
+            floor = self.highest_seq - self.SEQ_WINDOW
+            self._seen = {s for s in self._seen if s > floor}
+            self._missing = {s for s in self._missing if s > floor}
+        self.received += 1
+
+        # Clock offsets are unknown, so latency is the delay above the best one seen this session.
+        delay = float(arrival_ms) - float(event_time_ms)
+        if self._delay_floor_ms is None or delay < self._delay_floor_ms:
+            self._delay_floor_ms = delay
+        self._delays_ms.append(delay - self._delay_floor_ms)
+
+        if self.highest_seq >= 0 and seq < self.highest_seq:
+            self.reordered += 1
+            # A late arrival fills a hole of this session that was already counted as lost.
+            if seq in self._missing:
+                self._missing.discard(seq)
+                self.lost -= 1
+            return "reordered"
+
+        result = "ok"
+        if self.highest_seq >= 0 and seq > self.highest_seq + 1:
+            self.lost += seq - self.highest_seq - 1
+            # Only holes inside the window can still be filled.
+            self._missing.update(range(max(self.highest_seq + 1, seq - self.SEQ_WINDOW), seq))
+            result = "gap"
+
+        if self._prev_arrival_ms is not None and self._prev_event_time_ms is not None:
+            # RFC 3550 interarrival jitter estimator.
+            d = (float(arrival_ms) - self._prev_arrival_ms) - (float(event_time_ms) - self._prev_event_time_ms)
+            self.jitter_ms += (abs(d) - self.jitter_ms) / 16.0
+        self._prev_arrival_ms = float(arrival_ms)
+        self._prev_event_time_ms = float(event_time_ms)
+        self.highest_seq = seq
+        return result
+
+    def snapshot(self) -> LinkQualitySnapshot:
+        delays = sorted(self._delays_ms)
+
+        def _pct(q):
+            if not delays:
+                return 0.0
+            return float(delays[min(len(delays) - 1, int(round(q * (len(delays) - 1))))])
+
+        return LinkQualitySnapshot(
+            sender_call=self.sender_call,
+            channel=self.channel,
+            received=self.received,
+            lost=self.lost,
+            reordered=self.reordered,
+            duplicates=self.duplicates,
+            debounce_drops=self.debounce_drops,
+            jitter_ms=float(self.jitter_ms),
+            latency_p50_ms=_pct(0.50),
+            latency_p95_ms=_pct(0.95),
+            last_seen_ms=self.last_seen_ms,
+        )
+
+
+class RxTelemetry:
+    """
+    Link quality counters per sender and per channel.
+
+    Fed from the receive path before any filtering, so it sees the raw
+    arrival stream: sequence gaps (loss), reorders, duplicates, debounce
+    drops, interarrival jitter and queuing-delay percentiles. Idle senders
+    are evicted in LRU order like RxSessionTable.
+    """
+
+    def __init__(self, ttl_ms: int = 10 * 60 * 1000, max_senders: int = 512) -> None:
+        self.ttl_ms = max(1000, int(ttl_ms))
+        self.max_senders = max(1, int(max_senders))
+        self._lock = threading.Lock()
+        self._senders: "OrderedDict[tuple[str, int], SenderLinkStats]" = OrderedDict()
+
+    def _get_locked(self, sender_call: str, channel: int, now_ms: float) -> SenderLinkStats:
+        key = (str(sender_call).upper(), int(channel))
+        stats = self._senders.get(key)
+        if stats is None:
+            stats = SenderLinkStats(key[0], key[1])
+            self._senders[key] = stats
+        else:
+            self._senders.move_to_end(key)
+        self._evict_locked(now_ms)
+        return stats
+
+    def _evict_locked(self, now_ms: float) -> None:
+        deadline = int(now_ms) - self.ttl_ms
+        while self._senders:
+            key, stats = next(iter(self._senders.items()))
+            if len(self._senders) <= self.max_senders and stats.last_seen_ms > deadline:
+                break
+            del self._senders[key]
+
+    def observe(self, sender_call, channel, session_id, seq, event_time_ms, arrival_ms) -> str:
+        with self._lock:
+            stats = self._get_locked(sender_call, channel, arrival_ms)
+            return stats.observe(str(session_id), int(seq), int(event_time_ms), float(arrival_ms))
+
+    def record_debounce_drop(self, sender_call, channel, arrival_ms) -> None:
+        with self._lock:
+            stats = self._get_locked(sender_call, channel, arrival_ms)
+            stats.debounce_drops += 1
+
+    def sender_stats(self) -> list[LinkQualitySnapshot]:
+        with self._lock:
+            return [s.snapshot() for s in self._senders.values()]
+
+    def get_sender(self, sender_call, channel) -> Optional[LinkQualitySnapshot]:
+        with self._lock:
+            stats = self._senders.get((str(sender_call).upper(), int(channel)))
+            return stats.snapshot() if stats else None
+
+    def channel_stats(self) -> dict[int, LinkQualitySnapshot]:
+        """Aggregate per channel; jitter/latency are the worst sender on that channel."""
+        result: dict[int, LinkQualitySnapshot] = {}
+        for snap in self.sender_stats():
+            prev = result.get(snap.channel)
+            if prev is None:
+                result[snap.channel] = LinkQualitySnapshot(
+                    sender_call="*",
+                    channel=snap.channel,
+                    received=snap.received,
+                    lost=snap.lost,
+                    reordered=snap.reordered,
+                    duplicates=snap.duplicates,
+                    debounce_drops=snap.debounce_drops,
+                    jitter_ms=snap.jitter_ms,
+                    latency_p50_ms=snap.latency_p50_ms,
+                    latency_p95_ms=snap.latency_p95_ms,
+                    last_seen_ms=snap.last_seen_ms,
+                )
+                continue
+            result[snap.channel] = LinkQualitySnapshot(
+                sender_call="*",
+                channel=snap.channel,
+                received=prev.received + snap.received,
+                lost=prev.lost + snap.lost,
+                reordered=prev.reordered + snap.reordered,
+                duplicates=prev.duplicates + snap.duplicates,
+                debounce_drops=prev.debounce_drops + snap.debounce_drops,
+                jitter_ms=max(prev.jitter_ms, snap.jitter_ms),
+                latency_p50_ms=max(prev.latency_p50_ms, snap.latency_p50_ms),
+                latency_p95_ms=max(prev.latency_p95_ms, snap.latency_p95_ms),
+                last_seen_ms=max(prev.last_seen_ms, snap.last_seen_ms),
+            )
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._senders.clear()
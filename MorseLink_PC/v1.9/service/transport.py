@@ -0,0 +1,220 @@
+"""Transport interface shared by the MQTT client implementations."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT topic filter match supporting `+` and `#` wildcards."""
+    if topic_filter == topic:
+        return True
+    f_parts = topic_filter.split("/")
+    t_parts = topic.split("/")
+    for i, part in enumerate(f_parts):
+        if part == "#":
+            return True
+        if i >= len(t_parts):
+            return False
+        if part != "+" and part != t_parts[i]:
+            return False
+    return len(f_parts) == len(t_parts)
+
+
+class MQTTTransport(ABC):
+    """
+    Base class for the transports used by the online QSO page.
+
+    Subclasses implement connect/send_message/replace_subscriptions/close
+    and feed received payloads through _deliver(). Callbacks keep the
+    historical MQTTClient contract:
+    - on_message_received(text)
+    - on_connection_status_change(ok, detail)
+    - topic_filter(topic) -> bool, evaluated before decoding
+
+    Topics registered with add_route() bypass topic_filter and go to their
+    own callback(topic, text); their filters are always subscribed. A will
+    set with set_will() is registered at connect time. A graceful close()
+    announces it to live subscribers without retain and then clears a
+    retained will slot, so clean shutdowns leave nothing on the broker.
+    """
+
+    def __init__(self, client_id="chat_client"):
+        self.client_id = client_id
+
+        # External callbacks (kept backward compatible)
+        self.on_message_received = None
+        self.on_connection_status_change = None
+        # Optional topic predicate evaluated on the network thread before decoding.
+        self.topic_filter = None
+        self._routes = []
+        # (topic, payload, retain) registered as the MQTT Last Will.
+        self.will = None
+
+        self.publish_topic = None
+        self.subscribe_topics = set()
+        self.is_connected = False
+        self._connected_evt = threading.Event()
+        self._lock = threading.RLock()
+        self._closing = False
+        self.last_error = ""
+
+    def _safe_status_cb(self, ok: bool, detail: str | None = None):
+        cb = self.on_connection_status_change
+        if cb:
+            try:
+                cb(ok, detail)
+            except TypeError:
+                # Compatibility for older callback signature: cb(ok)
+                cb(ok)
+            except Exception:
+                logger.exception("on_connection_status_change callback error")
+
+    def _safe_msg_cb(self, text: str):
+        cb = self.on_message_received
+        if cb:
+            try:
+                cb(text)
+            except Exception:
+                logger.exception("on_message_received callback error")
+
+    @staticmethod
+    def _decode(payload):
+        if isinstance(payload, str):
+            return payload
+        try:
+            return payload.decode("utf-8", errors="replace")
+        except Exception:
+            return str(payload)
+
+    def _deliver(self, topic, payload):
+        for route_filter, callback in self._routes:
+            if topic_matches(route_filter, topic):
+                try:
+                    callback(topic, self._decode(payload))
+                except Exception:
+                    logger.exception("Route callback error for %s", route_filter)
+                return
+
+        topic_filter = self.topic_filter
+        if topic_filter is not None:
+            try:
+                if not topic_filter(topic):
+                    return
+            except Exception:
+                logger.exception("topic_filter error")
+        self._safe_msg_cb(self._decode(payload))
+
+    @staticmethod
+    def _normalize_topic(topic):
+        return str(topic or "").strip()
+
+    def _normalize_topics(self, topics):
+        if topics is None:
+            return set()
+        if isinstance(topics, str):
+            normalized = self._normalize_topic(topics)
+            return {normalized} if normalized else set()
+        result = set()
+        for item in topics:
+            normalized = self._normalize_topic(item)
+            if normalized:
+                result.add(normalized)
+        return result
+
+    def _with_routes(self, topics):
+        """Subscription set for topics plus every routed filter."""
+        result = set(topics)
+        result.update(route_filter for route_filter, _ in self._routes)
+        return result
+
+    def add_route(self, topic_filter, callback):
+        """Deliver topics matching topic_filter to callback(topic, text); call before connect()."""
+        normalized = self._normalize_topic(topic_filter)
+        if normalized:
+            self._routes.append((normalized, callback))
+
+    def set_will(self, topic, payload, retain=True):
+        """Register the Last Will; takes effect on the next connect()."""
+        normalized = self._normalize_topic(topic)
+        self.will = (normalized, payload, bool(retain)) if normalized else None
+
+    def _graceful_will_messages(self):
+        """(topic, payload, retain) messages a graceful close() publishes in place of the will."""
+        if not self.will:
+            return []
+        topic, payload, retain = self.will
+        messages = [(topic, payload, False)]
+        if retain:
+            # An empty retained payload deletes the retained message.
+            messages.append((topic, "", True))
+        return messages
+
+    def _bind_topics(self, publish_topic, subscribe_topics):
+        """Validate and store topics for connect(); returns False on bad input."""
+        normalized_publish = self._normalize_topic(publish_topic)
+        if not normalized_publish:
+            detail = "Publish topic cannot be empty"
+            with self._lock:
+                self.last_error = detail
+            self._safe_status_cb(False, detail)
+            return False
+
+        normalized_subscribe = self._normalize_topics(subscribe_topics)
+        if not normalized_subscribe:
+            normalized_subscribe = {normalized_publish}
+
+        with self._lock:
+            self.publish_topic = normalized_publish
+            self.subscribe_topics = self._with_routes(normalized_subscribe)
+            self._closing = False
+            self._connected_evt.clear()
+        return True
+
+    @abstractmethod
+    def connect(self, publish_topic, subscribe_topics=None):
+        """Start connecting; returns False when the attempt could not even start."""
+
+    @abstractmethod
+    def send_message(self, message):
+        """Publish one key event on the bound publish topic."""
+
+    @abstractmethod
+    def publish_to(self, topic, payload, retain=False):
+        """Publish to an explicit topic (presence and other side channels)."""
+
+    @abstractmethod
+    def replace_subscriptions(self, topics):
+        """Replace the subscription window, applying the diff when connected."""
+
+    @abstractmethod
+    def close(self):
+        """Close the connection; a graceful close announces the will."""
+
+    def close_discarding_session(self):
+        """Close without announcing the will and ask the broker to drop any persistent session."""
+        self.will = None
+        self.close()
+
+    def set_publish_topic(self, topic):
+        """Update publish topic dynamically."""
+        normalized = self._normalize_topic(topic)
+        if not normalized:
+            return
+        with self._lock:
+            self.publish_topic = normalized
+
+    def set_publish_group(self, group):
+        """Backward compatible alias for older call sites."""
+        self.set_publish_topic(group)
+
+    def heartbeat(self):
+        """Optional heartbeat packet."""
+        try:
+            self.send_message("HEARTBEAT")
+        except Exception as e:
+            logger.exception("Heartbeat error: %s", e)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试按应用运行时的方式导入 service/、utils/ 下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,146 @@
+import threading
+
+from service.connection_manager import Endpoint, FailoverMQTTClient
+from service.loopback_transport import LinkProfile, LoopbackBroker
+
+ENDPOINTS = [Endpoint("mqtt", "a.example", 1883), Endpoint("mqtt", "b.example", 1883)]
+
+
+class _StatusLog:
+    def __init__(self):
+        self.events = []
+        self._cond = threading.Condition()
+
+    def __call__(self, ok, detail=None):
+        with self._cond:
+            self.events.append(bool(ok))
+            self._cond.notify_all()
+
+    def wait_for(self, count, timeout=5.0):
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.events) >= count, timeout)
+
+
+def _failover(brokers, **kwargs):
+    by_host = {ep.host: broker for ep, broker in zip(ENDPOINTS, brokers)}
+    client = FailoverMQTTClient(
+        ENDPOINTS,
+        client_factory=lambda **kw: by_host[kw["broker"]].client_factory(**kw),
+        stagger_ms=0,
+        retry_min_ms=20,
+        retry_max_ms=80,
+        **kwargs,
+    )
+    status = _StatusLog()
+    client.on_connection_status_change = status
+    return client, status
+
+
+def _shutdown(client, brokers):
+    client.close()
+    for broker in brokers:
+        broker.shutdown()
+
+
+def test_all_endpoints_fail_then_recover():
+    brokers = [LoopbackBroker(), LoopbackBroker()]
+    for broker in brokers:
+        broker.set_online(False)
+    client, status = _failover(brokers)
+    try:
+        assert client.connect("ch/1", subscribe_topics=["ch/1"])
+        assert status.wait_for(1)
+        assert status.events == [False]
+        assert not client.is_connected
+
+        brokers[1].set_online(True)
+        assert status.wait_for(2)
+        # 重试期间不重复报告断开，恢复后只报告一次连接
+        assert status.events == [False, True]
+        assert client.is_connected
+        assert client.active_endpoint == ENDPOINTS[1]
+    finally:
+        _shutdown(client, brokers)
+
+
+def test_outage_after_connect_recovers_by_retrying():
+    brokers = [LoopbackBroker(), LoopbackBroker()]
+    client, status = _failover(brokers)
+    try:
+        assert client.connect("ch/1", subscribe_topics=["ch/1"])
+        assert status.wait_for(1)
+        assert status.events == [True]
+
+        # 先关闭空闲的 broker，否则故障切换会立即连上另一个
+        active = ENDPOINTS.index(client.active_endpoint)
+        brokers[1 - active].set_online(False)
+        brokers[active].set_online(False)
+        assert status.wait_for(2)
+        assert status.events == [True, False]
+
+        for broker in brokers:
+            broker.set_online(True)
+        assert status.wait_for(3)
+        assert status.events == [True, False, True]
+        assert client.is_connected
+    finally:
+        _shutdown(client, brokers)
+
+
+def test_close_stops_retrying():
+    brokers = [LoopbackBroker(), LoopbackBroker()]
+    for broker in brokers:
+        broker.set_online(False)
+    client, status = _failover(brokers)
+    try:
+        client.connect("ch/1", subscribe_topics=["ch/1"])
+        assert status.wait_for(1)
+        client.close()
+        for broker in brokers:
+            broker.set_online(True)
+        assert not status.wait_for(3, timeout=0.3)
+        assert status.events == [False, False]
+        assert not client.is_connected
+    finally:
+        _shutdown(client, brokers)
+
+
+def test_child_client_ids_follow_configured_position():
+    # 握手有延迟，两个端点都会在有人获胜前创建客户端
+    brokers = [LoopbackBroker(LinkProfile(connect_latency_ms=50)) for _ in ENDPOINTS]
+    seen = []
+    by_host = {ep.host: broker for ep, broker in zip(ENDPOINTS, brokers)}
+
+    def factory(**kw):
+        seen.append((kw["broker"], kw["client_id"]))
+        return by_host[kw["broker"]].client_factory(**kw)
+
+    client = FailoverMQTTClient(ENDPOINTS, client_factory=factory, stagger_ms=0, client_id="me")
+    status = _StatusLog()
+    client.on_connection_status_change = status
+    try:
+        client.connect("ch/1", subscribe_topics=["ch/1"])
+        assert status.wait_for(1)
+        assert sorted(seen) == [("a.example", "me-0"), ("b.example", "me-1")]
+    finally:
+        _shutdown(client, brokers)
+
+
+def test_duplicate_endpoints_get_distinct_client_ids():
+    broker = LoopbackBroker(LinkProfile(connect_latency_ms=50))
+    seen = []
+
+    def factory(**kw):
+        seen.append(kw["client_id"])
+        return broker.client_factory(**kw)
+
+    client = FailoverMQTTClient([ENDPOINTS[0], ENDPOINTS[0]], client_factory=factory, stagger_ms=0, client_id="me")
+    status = _StatusLog()
+    client.on_connection_status_change = status
+    try:
+        client.connect("ch/1", subscribe_topics=["ch/1"])
+        assert status.wait_for(1)
+        assert status.events == [True]
+        assert sorted(seen) == ["me-0", "me-1"]
+    finally:
+        _shutdown(client, [broker])
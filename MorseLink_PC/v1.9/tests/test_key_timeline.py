@@ -0,0 +1,139 @@
+from utils.key_timeline import KeyTimeline
+
+
+def _timeline(now_ms=0.0, retain_ms=2000):
+    timeline = KeyTimeline(retain_ms=retain_ms)
+    timeline.now_ms = lambda: now_ms
+    return timeline
+
+
+def test_overlapping_intervals_are_merged():
+    timeline = _timeline()
+    timeline.add(1, 10, 50)
+    timeline.add(1, 40, 80)
+    timeline.add(1, 80, 90)
+    timeline.add(1, 100, 120)
+    # 合并后 10..90 之间没有抬键边沿
+    assert timeline.next_edge(10, channel=1) == 90
+    assert timeline.is_down(85, channel=1)
+    assert not timeline.is_down(95, channel=1)
+    assert timeline.last_off(1) == 120.0
+
+
+def test_invalid_interval_is_ignored():
+    calls = []
+    timeline = _timeline()
+    timeline.add_listener(lambda *args: calls.append(args))
+    timeline.add(1, 50, 50)
+    timeline.add(1, 60, 40)
+    assert timeline.channels() == []
+    assert timeline.last_off(1) is None
+    assert calls == []
+
+
+def test_listeners_are_notified_and_errors_contained():
+    calls = []
+    timeline = _timeline()
+
+    def broken(*args):
+        raise RuntimeError("boom")
+
+    timeline.add_listener(broken)
+    timeline.add_listener(lambda *args: calls.append(args))
+    timeline.add(2, 10, 20)
+    assert calls == [(2, 10.0, 20.0)]
+    timeline.remove_listener(broken)
+    timeline.remove_listener(broken)
+    timeline.add(2, 30, 40)
+    assert calls == [(2, 10.0, 20.0), (2, 30.0, 40.0)]
+
+
+def test_listener_is_registered_once_and_can_be_removed():
+    calls = []
+    timeline = _timeline()
+
+    def listener(*args):
+        calls.append(args)
+
+    timeline.add_listener(listener)
+    timeline.add_listener(listener)
+    timeline.add(1, 10, 20)
+    assert calls == [(1, 10.0, 20.0)]
+    timeline.remove_listener(listener)
+    timeline.add(1, 30, 40)
+    assert calls == [(1, 10.0, 20.0)]
+
+
+def test_is_down_per_channel_and_any():
+    timeline = _timeline()
+    timeline.add(1, 10, 20)
+    timeline.add(2, 30, 40)
+    assert timeline.is_down(15, channel=1)
+    assert not timeline.is_down(20, channel=1)
+    assert not timeline.is_down(15, channel=2)
+    assert timeline.is_down(35)
+    assert not timeline.is_down(25)
+    assert not timeline.is_down(15, channel=3)
+
+
+def test_next_edge_walks_down_and_up_edges():
+    timeline = _timeline()
+    timeline.add(1, 10, 80)
+    timeline.add(1, 100, 120)
+    timeline.add(2, 90, 95)
+    assert timeline.next_edge(0) == 10
+    assert timeline.next_edge(10) == 80
+    assert timeline.next_edge(85) == 90
+    assert timeline.next_edge(85, channel=1) == 100
+    assert timeline.next_edge(110) == 120
+    assert timeline.next_edge(120) is None
+
+
+def test_overlaps_counts_blips_shorter_than_window():
+    timeline = _timeline()
+    timeline.add(1, 12, 13)
+    assert timeline.overlaps(1, 0, 40)
+    assert not timeline.overlaps(1, 13, 40)
+    assert not timeline.overlaps(1, 0, 12)
+    assert not timeline.overlaps(2, 0, 40)
+
+
+def test_old_intervals_are_pruned_after_retain():
+    clock = [0.0]
+    timeline = KeyTimeline(retain_ms=1000)
+    timeline.now_ms = lambda: clock[0]
+    timeline.add(1, 100, 200)
+    timeline.add(1, 900, 1000)
+    assert timeline.next_edge(0, channel=1) == 100
+    clock[0] = 1500.0
+    timeline.add(1, 1500, 1600)
+    # 100..200 已超过保留时长被清理，900..1000 仍在
+    assert timeline.next_edge(0, channel=1) == 900
+    assert not timeline.is_down(150, channel=1)
+    assert timeline.is_down(950, channel=1)
+    # 采样窗口同样按 retain_ms 清理更早的区间
+    assert not timeline.overlaps(1, 2100, 2116)
+    assert timeline.next_edge(0, channel=1) == 1500
+
+
+def test_has_pending_and_clear():
+    timeline = _timeline()
+    timeline.add(1, 10, 20)
+    timeline.add(2, 10, 50)
+    assert timeline.has_pending(30)
+    assert not timeline.has_pending(50)
+    timeline.clear(2)
+    assert timeline.channels() == [1]
+    timeline.clear()
+    assert timeline.channels() == []
+
+
+def test_intervals_and_generation_track_clears():
+    timeline = _timeline()
+    timeline.add(1, 10, 20)
+    timeline.add(2, 30, 40)
+    assert sorted(timeline.intervals()) == [(1, 10.0, 20.0), (2, 30.0, 40.0)]
+    generation = timeline.generation
+    timeline.clear(1)
+    assert timeline.generation == generation + 1
+    assert timeline.intervals() == [(2, 30.0, 40.0)]
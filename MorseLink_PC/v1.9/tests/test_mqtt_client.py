@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("paho.mqtt")
+
+from service.mqtt_client import PROTOCOL_V311, MQTTClient, normalize_mqtt_protocol
+
+
+def _client(protocol, monkeypatch):
+    client = MQTTClient(client_id="test", protocol=protocol)
+    started = []
+    statuses = []
+    monkeypatch.setattr(client, "_start_connect", lambda: started.append(client.use_v5))
+    client.on_connection_status_change = lambda ok, detail=None: statuses.append(ok)
+    return client, started, statuses
+
+
+def test_default_protocol_is_311():
+    assert normalize_mqtt_protocol(None) == PROTOCOL_V311
+    assert normalize_mqtt_protocol("bogus") == PROTOCOL_V311
+    client = MQTTClient(client_id="test")
+    assert client.protocol_mode == PROTOCOL_V311
+    assert not client.use_v5
+
+
+@pytest.mark.parametrize("code", [1, 132])
+def test_auto_falls_back_to_311_when_v5_refused(code, monkeypatch):
+    client, started, statuses = _client("auto", monkeypatch)
+    v5_client = client.client
+    assert client.use_v5
+
+    client._on_connect(v5_client, None, None, code, None)
+
+    assert not client.use_v5
+    assert client.client is not v5_client
+    assert started == [False]
+    # 回退过程不向上层报告失败
+    assert statuses == []
+
+
+def test_auto_does_not_fall_back_on_other_errors(monkeypatch):
+    client, started, statuses = _client("auto", monkeypatch)
+    client._on_connect(client.client, None, None, 135, None)
+    assert client.use_v5
+    assert started == []
+    assert statuses == [False]
+
+
+def test_explicit_v5_never_falls_back(monkeypatch):
+    client, started, statuses = _client("5", monkeypatch)
+    client._on_connect(client.client, None, None, 132, None)
+    assert client.use_v5
+    assert started == []
+    assert statuses == [False]
+
+
+def test_no_fallback_after_v5_was_accepted(monkeypatch):
+    client, started, statuses = _client("auto", monkeypatch)
+    client._on_connect(client.client, None, None, 0, None)
+    client._on_connect(client.client, None, None, 132, None)
+    assert client.use_v5
+    assert started == []
+    assert statuses == [True, False]
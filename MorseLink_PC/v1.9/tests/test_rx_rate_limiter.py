@@ -0,0 +1,70 @@
+from service.rx_rate_limiter import UNKNOWN_SENDER, SenderRateLimiter, sender_key_of
+
+
+def test_sender_key_of_extracts_call_without_parsing():
+    assert sender_key_of('{"x": 1, "myCall" : " bg1abc "}') == "BG1ABC"
+    assert sender_key_of("not json") == UNKNOWN_SENDER
+    assert sender_key_of(b'{"myCall":"A"}') == UNKNOWN_SENDER
+
+
+def test_burst_then_throttle():
+    limiter = SenderRateLimiter(rate_per_s=10, burst=3, mute_ms=0)
+    assert [limiter.allow("A", 0) for _ in range(4)] == [True, True, True, False]
+
+
+def test_tokens_refill_with_elapsed_time():
+    limiter = SenderRateLimiter(rate_per_s=10, burst=2, mute_ms=0)
+    assert limiter.allow("A", 0)
+    assert limiter.allow("A", 0)
+    assert not limiter.allow("A", 50)
+    assert limiter.allow("A", 100)
+    assert not limiter.allow("A", 100)
+    # 长时间空闲后最多恢复到 burst
+    assert limiter.allow("A", 10_000)
+    assert limiter.allow("A", 10_000)
+    assert not limiter.allow("A", 10_000)
+
+
+def test_senders_have_independent_buckets():
+    limiter = SenderRateLimiter(rate_per_s=1, burst=1, mute_ms=0)
+    assert limiter.allow("A", 0)
+    assert not limiter.allow("A", 0)
+    assert limiter.allow("B", 0)
+
+
+def test_flooding_sender_is_muted_then_released():
+    limiter = SenderRateLimiter(rate_per_s=10, burst=1, mute_threshold=3, mute_ms=500)
+    assert limiter.allow("A", 0)
+    for _ in range(3):
+        assert not limiter.allow("A", 0)
+    stats = limiter.stats(0)
+    assert [(s.sender, s.mutes, s.muted) for s in stats] == [("A", 1, True)]
+    # 静音期内即使令牌已恢复也丢弃
+    assert not limiter.allow("A", 400)
+    assert limiter.allow("A", 600)
+
+
+def test_unmute_restores_full_burst():
+    limiter = SenderRateLimiter(rate_per_s=10, burst=2, mute_threshold=1, mute_ms=60_000)
+    limiter.allow("A", 0)
+    limiter.allow("A", 0)
+    assert not limiter.allow("A", 0)
+    limiter.unmute("A")
+    assert limiter.allow("A", 0)
+    assert limiter.allow("A", 0)
+
+
+def test_sender_table_is_bounded_lru():
+    limiter = SenderRateLimiter(rate_per_s=1, burst=1, mute_ms=0, max_senders=2)
+    limiter.allow("A", 0)
+    limiter.allow("B", 0)
+    limiter.allow("A", 0)
+    limiter.allow("C", 0)
+    # B 最久未出现，被淘汰后重新获得完整令牌
+    assert limiter.allow("B", 0)
+    assert [s.sender for s in limiter.stats(0)] == []
+
+
+def test_non_positive_rate_disables_limiting():
+    limiter = SenderRateLimiter(rate_per_s=0, burst=1)
+    assert all(limiter.allow("A", 0) for _ in range(100))
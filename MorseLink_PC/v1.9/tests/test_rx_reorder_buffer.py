@@ -0,0 +1,99 @@
+from service.rx_reorder_buffer import ReorderBuffer
+
+
+def test_in_order_events_are_released_immediately():
+    buf = ReorderBuffer(max_events=4, hold_ms=40)
+    assert buf.push(5, "a", 0) == ["a"]
+    assert buf.push(6, "b", 1) == ["b"]
+    assert len(buf) == 0
+    assert buf.deadline_ms is None
+
+
+def test_hole_is_filled_before_deadline():
+    buf = ReorderBuffer(max_events=4, hold_ms=40)
+    buf.push(1, "a", 0)
+    assert buf.push(3, "c", 10) == []
+    assert buf.deadline_ms == 50
+    assert buf.push(2, "b", 20) == ["b", "c"]
+    assert buf.deadline_ms is None
+
+
+def test_hole_is_skipped_after_hold_time():
+    buf = ReorderBuffer(max_events=4, hold_ms=40)
+    buf.push(1, "a", 0)
+    buf.push(3, "c", 10)
+    buf.push(4, "d", 15)
+    assert buf.expire(49) == []
+    assert buf.expire(50) == ["c", "d"]
+    assert buf.next_seq == 5
+    # 被跳过的序号迟到后按重复丢弃
+    assert buf.push(2, "b", 60) == []
+
+
+def test_expire_rearms_deadline_for_next_hole():
+    buf = ReorderBuffer(max_events=4, hold_ms=40)
+    buf.push(1, "a", 0)
+    buf.push(3, "c", 0)
+    buf.push(5, "e", 0)
+    assert buf.expire(40) == ["c"]
+    assert buf.deadline_ms == 80
+    assert buf.expire(80) == ["e"]
+    assert buf.deadline_ms is None
+
+
+def test_overflow_skips_gap_without_waiting():
+    buf = ReorderBuffer(max_events=2, hold_ms=1000)
+    buf.push(1, "a", 0)
+    assert buf.push(3, "c", 0) == []
+    assert buf.push(4, "d", 0) == []
+    assert buf.push(5, "e", 0) == ["c", "d", "e"]
+
+
+def test_late_and_duplicate_events_are_dropped():
+    buf = ReorderBuffer(max_events=4, hold_ms=40)
+    buf.push(1, "a", 0)
+    buf.push(3, "c", 0)
+    assert buf.push(1, "a", 1) == []
+    assert buf.push(3, "c2", 1) == []
+    assert buf.push(0, "z", 1) == []
+    assert buf.flush() == ["c"]
+
+
+def test_zero_hold_skips_gaps_immediately():
+    buf = ReorderBuffer(max_events=8, hold_ms=0)
+    buf.push(1, "a", 0)
+    assert buf.push(4, "d", 0) == ["d"]
+    assert buf.push(2, "b", 0) == []
+
+
+def test_flush_releases_everything_in_order():
+    buf = ReorderBuffer(max_events=8, hold_ms=40)
+    buf.push(1, "a", 0)
+    buf.push(6, "f", 0)
+    buf.push(3, "c", 0)
+    assert buf.flush() == ["c", "f"]
+    assert len(buf) == 0
+    assert buf.deadline_ms is None
+
+
+def test_first_seq_holds_early_reorder_at_session_start():
+    buf = ReorderBuffer(max_events=4, hold_ms=40, first_seq=1)
+    assert buf.push(2, "b", 0) == []
+    assert buf.push(1, "a", 10) == ["a", "b"]
+
+
+def test_first_seq_skips_to_mid_session_join_after_hold():
+    buf = ReorderBuffer(max_events=4, hold_ms=40, first_seq=1)
+    assert buf.push(500, "x", 0) == []
+    assert buf.push(501, "y", 5) == []
+    assert buf.expire(40) == ["x", "y"]
+    assert buf.push(502, "z", 50) == ["z"]
+
+
+def test_session_state_expects_protocol_first_seq():
+    from service.keyevent_protocol import FIRST_SEQ
+    from service.rx_session_state import RxSessionState
+
+    state = RxSessionState("A", "s1", 1, 0)
+    assert state.reorder.push(FIRST_SEQ + 1, "b", 0) == []
+    assert state.reorder.push(FIRST_SEQ, "a", 5) == ["a", "b"]
@@ -0,0 +1,78 @@
+from service.rx_session_state import RxSessionState, RxSessionTable
+
+
+def _state(call, session, channel=1, now_ms=0):
+    return RxSessionState(call, session, channel, now_ms)
+
+
+def _insert(table, call, session, channel=1, now_ms=0):
+    key = (call, session, channel)
+    table.insert(key, _state(call, session, channel, now_ms))
+    return key
+
+
+def test_key_for_normalizes_payload():
+    payload = {"myCall": "bg1abc", "session_id": 7, "myChannel": "2"}
+    assert RxSessionTable.key_for(payload) == ("BG1ABC", "7", 2)
+
+
+def test_new_session_replaces_stale_one_of_same_sender():
+    table = RxSessionTable()
+    old = _insert(table, "A", "s1")
+    other_channel = _insert(table, "A", "s1", channel=2)
+    key = ("A", "s2", 1)
+    assert table.insert(key, _state("A", "s2")) == old
+    assert old not in table
+    assert key in table
+    assert other_channel in table
+
+
+def test_reinserting_same_key_reports_no_stale_session():
+    table = RxSessionTable()
+    key = _insert(table, "A", "s1")
+    assert table.insert(key, _state("A", "s1")) is None
+    assert len(table) == 1
+
+
+def test_evicts_idle_sessions_from_lru_head():
+    table = RxSessionTable(ttl_ms=1000)
+    a = _insert(table, "A", "s", now_ms=0)
+    b = _insert(table, "B", "s", now_ms=0)
+    c = _insert(table, "C", "s", now_ms=0)
+    table.touch(a, 1500)
+    assert table.evict_idle(1800) == [b, c]
+    assert list(table) == [a]
+
+
+def test_evict_stops_at_first_live_session():
+    table = RxSessionTable(ttl_ms=1000)
+    a = _insert(table, "A", "s", now_ms=0)
+    _insert(table, "B", "s", now_ms=900)
+    _insert(table, "C", "s", now_ms=0)
+    # B 仍在有效期内，C 虽然空闲但排在 B 之后，本次不扫描
+    assert table.evict_idle(1500) == [a]
+    assert len(table) == 2
+
+
+def test_trims_to_max_sessions_in_lru_order():
+    table = RxSessionTable(ttl_ms=60_000, max_sessions=2)
+    a = _insert(table, "A", "s")
+    b = _insert(table, "B", "s")
+    c = _insert(table, "C", "s")
+    table.touch(a, 10)
+    assert table.evict_idle(20) == [b]
+    assert list(table) == [c, a]
+
+
+def test_pop_clears_sender_index():
+    table = RxSessionTable()
+    key = _insert(table, "A", "s1")
+    assert table.pop(key) is not None
+    assert table.insert(("A", "s2", 1), _state("A", "s2")) is None
+
+
+def test_observe_arrival_measures_lateness_against_floor():
+    state = _state("A", "s1")
+    assert state.observe_arrival(1000, 1050) == 0
+    assert state.observe_arrival(1100, 1140) == 0
+    assert state.observe_arrival(1200, 1540) == 300
@@ -0,0 +1,72 @@
+from service.rx_telemetry import RxTelemetry, SenderLinkStats
+
+
+def _observe(stats, session, seqs, start_ms=0):
+    return [stats.observe(session, seq, 1000 + seq * 10, start_ms + seq * 10) for seq in seqs]
+
+
+def test_gap_counts_loss_and_late_arrival_fills_it():
+    stats = SenderLinkStats("A", 1)
+    assert _observe(stats, "s1", [0, 1, 4]) == ["ok", "ok", "gap"]
+    assert stats.lost == 2
+    assert stats.observe("s1", 2, 1020, 80) == "reordered"
+    assert stats.lost == 1
+    assert stats.reordered == 1
+    assert stats.received == 4
+
+
+def test_refilled_hole_is_not_decremented_twice():
+    stats = SenderLinkStats("A", 1)
+    _observe(stats, "s1", [0, 2])
+    assert stats.observe("s1", 1, 1010, 40) == "reordered"
+    assert stats.observe("s1", 1, 1010, 41) == "duplicate"
+    assert stats.lost == 0
+    assert stats.duplicates == 1
+
+
+def test_late_packet_in_new_session_keeps_earlier_loss():
+    stats = SenderLinkStats("A", 1)
+    _observe(stats, "s1", [0, 5])
+    assert stats.lost == 4
+    _observe(stats, "s2", [0, 1, 3])
+    assert stats.lost == 5
+    # s2 的迟到包只能填补 s2 自己的空洞
+    assert stats.observe("s2", 2, 1020, 100) == "reordered"
+    assert stats.lost == 4
+    assert stats.observe("s2", 0, 1000, 101) == "duplicate"
+    assert stats.lost == 4
+
+
+def test_arrival_below_window_is_duplicate_after_prune():
+    stats = SenderLinkStats("A", 1)
+    window = SenderLinkStats.SEQ_WINDOW
+    seqs = list(range(0, window * 3))
+    _observe(stats, "s1", seqs)
+    received = stats.received
+    # 0 已被修剪出已见集合，仍应识别为重复而非乱序
+    assert stats.observe("s1", 0, 1000, 1.0e6) == "duplicate"
+    assert stats.received == received
+    assert stats.reordered == 0
+    assert stats.lost == 0
+
+
+def test_hole_older_than_window_is_not_refilled():
+    stats = SenderLinkStats("A", 1)
+    window = SenderLinkStats.SEQ_WINDOW
+    _observe(stats, "s1", [0, window * 2])
+    assert stats.lost == window * 2 - 1
+    assert stats.observe("s1", 1, 1010, 1.0e6) == "duplicate"
+    assert stats.lost == window * 2 - 1
+    assert stats.observe("s1", window * 2 - 1, 1000, 1.0e6) == "reordered"
+    assert stats.lost == window * 2 - 2
+
+
+def test_channel_stats_aggregate_senders():
+    telemetry = RxTelemetry()
+    telemetry.observe("a", 1, "s", 0, 1000, 0)
+    telemetry.observe("a", 1, "s", 2, 1020, 20)
+    telemetry.observe("b", 1, "s", 0, 1000, 0)
+    snap = telemetry.channel_stats()[1]
+    assert snap.received == 3
+    assert snap.lost == 1
+    assert snap.expected == 4
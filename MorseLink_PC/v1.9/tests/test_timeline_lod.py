@@ -0,0 +1,66 @@
+import pytest
+
+from utils.timeline_lod import TimelineLod
+
+
+def test_layout_scales_and_caps_elements():
+    lod = TimelineLod([100, 10_000, 1], [0, 500, 10_000])
+    assert lod.starts == pytest.approx([0.0, 52.0, 472.0 + 220.0])
+    assert lod.ends == pytest.approx([12.0, 472.0, 693.0])
+    assert lod.total == pytest.approx(693.0)
+
+
+def test_missing_gap_uses_default():
+    lod = TimelineLod([100, 100], [0])
+    assert lod.starts[1] == pytest.approx(12.0 + 80.0 * TimelineLod.GAP_SCALE)
+
+
+def test_level0_min_max_at_fractional_edges():
+    # 单个元素占 [0, 12)，再补一个元素让总长覆盖小数边界
+    lod = TimelineLod([100, 12.5], [0, 0])
+    mins, maxs = lod.levels[0]
+    assert len(maxs) == 16
+    assert maxs[:12] == b"\x01" * 12
+    assert maxs[12:14] == b"\x00\x00"
+    assert maxs[14:16] == b"\x01\x01"
+    # 第二个元素 [14, 15.5)：最后一格只被部分覆盖
+    assert mins[14:16] == b"\x01\x00"
+
+
+def test_pyramid_halves_with_and_or():
+    lod = TimelineLod([100, 12.5], [0, 0])
+    sizes = [len(maxs) for _, maxs in lod.levels]
+    assert sizes == [16, 8, 4, 2, 1]
+    for (lo_fine, hi_fine), (lo, hi) in zip(lod.levels, lod.levels[1:]):
+        for i in range(len(hi)):
+            pair_lo = lo_fine[2 * i:2 * i + 2]
+            pair_hi = hi_fine[2 * i:2 * i + 2]
+            assert lo[i] == min(pair_lo)
+            assert hi[i] == max(pair_hi)
+    assert lod.levels[-1] == (b"\x00", b"\x01")
+
+
+def test_odd_level_pads_with_last_bucket():
+    lod = TimelineLod([25], [])
+    assert len(lod.levels[0][1]) == 3
+    assert [len(maxs) for _, maxs in lod.levels] == [3, 2, 1]
+    assert lod.levels[1] == (b"\x01\x01", b"\x01\x01")
+
+
+def test_level_for_zoom():
+    lod = TimelineLod([100] * 2000, [100] * 2000)
+    top = len(lod.levels) - 1
+    assert lod.level_for(0.5) == 0
+    assert lod.level_for(1.0) == 0
+    assert lod.level_for(2.0) == 1
+    assert lod.level_for(3.0) == 2
+    assert lod.level_for(1e9) == top
+
+
+def test_visible_range():
+    lod = TimelineLod([100, 100, 100], [0, 100, 100])
+    # 元素：[0,12) [20,32) [40,52)
+    assert lod.visible_range(0, 100) == (0, 3)
+    assert lod.visible_range(12, 20) == (1, 1)
+    assert lod.visible_range(25, 41) == (1, 3)
+    assert lod.visible_range(60, 80) == (3, 3)
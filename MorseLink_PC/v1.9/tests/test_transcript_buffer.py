@@ -0,0 +1,66 @@
+from utils.transcript_buffer import TranscriptBuffer
+
+
+def test_append_and_text():
+    buf = TranscriptBuffer(max_chars=100, chunk_chars=4)
+    for piece in ("ab", "cd", "e"):
+        assert buf.append(piece) is False
+    assert buf.text() == "abcde"
+    assert len(buf) == 5
+    assert not buf.append("")
+
+
+def test_trim_drops_whole_oldest_chunks():
+    buf = TranscriptBuffer(max_chars=8, chunk_chars=4)
+    trimmed = [buf.append(c) for c in "abcdefghijklm"]
+    assert trimmed.index(True) == 11
+    assert buf.text() == "efghijklm"
+    assert buf.trimmed_chars == 4
+    assert len(buf) == 9
+
+
+def test_tail_spans_sealed_and_open_chunks():
+    buf = TranscriptBuffer(max_chars=100, chunk_chars=4)
+    for c in "abcdefghij":
+        buf.append(c)
+    assert buf.tail(3) == "hij"
+    assert buf.tail(6) == "efghij"
+    assert buf.tail(100) == "abcdefghij"
+    assert buf.tail(0) == ""
+
+
+def test_delta_since_returns_new_text():
+    buf = TranscriptBuffer(max_chars=100, chunk_chars=4)
+    buf.append("hello ")
+    mark = buf.mark()
+    buf.append("wor")
+    buf.append("ld")
+    assert buf.delta_since(mark) == "world"
+    assert buf.delta_since(buf.mark()) == ""
+
+
+def test_delta_since_survives_trim_of_older_text():
+    buf = TranscriptBuffer(max_chars=8, chunk_chars=4)
+    for c in "abcdefgh":
+        buf.append(c)
+    mark = buf.mark()
+    for c in "ijkl":
+        buf.append(c)
+    assert buf.trimmed_chars > 0
+    assert buf.delta_since(mark) == "ijkl"
+
+
+def test_delta_since_invalid_after_mark_is_trimmed_or_cleared():
+    buf = TranscriptBuffer(max_chars=4, chunk_chars=2)
+    buf.append("ab")
+    mark = buf.mark()
+    for c in "cdefghij":
+        buf.append(c)
+    assert buf.delta_since(mark) is None
+    assert buf.delta_since(None) is None
+
+    mark = buf.mark()
+    buf.clear()
+    buf.append("x")
+    assert buf.delta_since(mark) is None
+    assert buf.text() == "x"
@@ -0,0 +1 @@
+"""Developer command-line tools (benchmarks, load generators)."""
@@ -0,0 +1,103 @@
+"""
+Compare per-topic window subscriptions with the wildcard + local filter mode.
+
+Sweeps the tuning dial across the band one channel at a time and reports
+how many SUBSCRIBE/UNSUBSCRIBE packets each mode would send, plus the
+local cost of retuning and of filtering incoming topics.
+
+Usage (from MorseLink_PC/v1.9):
+    python -m tools.bench_subscriptions --sweeps 3 --messages 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from service.channel_window import SUBSCRIBE_MODE_WILDCARD, SUBSCRIBE_MODE_WINDOW, ChannelWindow
+
+TOPIC_PREFIX = "morselink/v2/keyevent"
+
+
+def _sweep_channels(min_channel, max_channel, sweeps):
+    up = list(range(min_channel, max_channel + 1))
+    down = up[::-1]
+    path = []
+    for i in range(sweeps):
+        path.extend(up if i % 2 == 0 else down)
+    return path
+
+
+def bench_retune(mode, path, side_range, min_channel, max_channel):
+    window = ChannelWindow(TOPIC_PREFIX, path[0], side_range, min_channel, max_channel, mode)
+    current = window.subscribe_topics()
+    subscribe_packets = len(current)
+    unsubscribe_packets = 0
+
+    started = time.perf_counter()
+    for center in path[1:]:
+        window.set_center(center)
+        desired = window.subscribe_topics()
+        # Same diff MQTTClient.replace_subscriptions applies when connected.
+        subscribe_packets += len(desired - current)
+        unsubscribe_packets += len(current - desired)
+        current = desired
+    elapsed = time.perf_counter() - started
+    return {
+        "retunes": len(path) - 1,
+        "subscribe": subscribe_packets,
+        "unsubscribe": unsubscribe_packets,
+        "us_per_retune": elapsed * 1e6 / max(1, len(path) - 1),
+    }
+
+
+def bench_filter(messages, side_range, min_channel, max_channel, seed):
+    rnd = random.Random(seed)
+    center = (min_channel + max_channel) // 2
+    window = ChannelWindow(TOPIC_PREFIX, center, side_range, min_channel, max_channel, SUBSCRIBE_MODE_WILDCARD)
+    topics = [f"{TOPIC_PREFIX}/{rnd.randint(min_channel, max_channel)}" for _ in range(messages)]
+
+    accepted = 0
+    started = time.perf_counter()
+    for topic in topics:
+        if window.accepts_topic(topic):
+            accepted += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": messages,
+        "accepted": accepted,
+        "ns_per_message": elapsed * 1e9 / max(1, messages),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-channel", type=int, default=7000)
+    parser.add_argument("--max-channel", type=int, default=7300)
+    parser.add_argument("--side-range", type=int, default=5)
+    parser.add_argument("--sweeps", type=int, default=2)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    path = _sweep_channels(args.min_channel, args.max_channel, max(1, args.sweeps))
+    print(f"Sweep: {len(path) - 1} retunes over {args.min_channel}-{args.max_channel}, window ±{args.side_range}")
+    for mode in (SUBSCRIBE_MODE_WINDOW, SUBSCRIBE_MODE_WILDCARD):
+        r = bench_retune(mode, path, args.side_range, args.min_channel, args.max_channel)
+        total = r["subscribe"] + r["unsubscribe"]
+        print(
+            f"  {mode:<8} SUBSCRIBE={r['subscribe']:<6} UNSUBSCRIBE={r['unsubscribe']:<6} "
+            f"packets/retune={total / max(1, r['retunes']):.2f} local={r['us_per_retune']:.2f} us/retune"
+        )
+
+    f = bench_filter(args.messages, args.side_range, args.min_channel, args.max_channel, args.seed)
+    print(
+        f"Wildcard filter: {f['messages']} band-wide messages, {f['accepted']} in window, "
+        f"{f['ns_per_message']:.0f} ns/message"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,337 @@
+"""
+Virtual-operator load generator for the v2 key-event protocol.
+
+Spawns N simulated operators that key text at a given WPM with timing
+jitter and publish straight-key down/up events exactly as the online QSO
+page does. One receiver subscribes to the channel window, parses every
+event, and measures delivery latency. The run reports publish rate,
+latency percentiles, loss and receiver CPU.
+
+Usage (from MorseLink_PC/v1.9):
+    python -m tools.loadgen --operators 20 --wpm 25 --duration 30
+    python -m tools.loadgen --transport mqtt --host 127.0.0.1 --username U --password P
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+
+from service.channel_window import ChannelWindow, SUBSCRIBE_MODE_WILDCARD
+from service.keyevent_protocol import (
+    EVENT_DOWN,
+    EVENT_UP,
+    TOPIC_PREFIX,
+    build_key_event,
+    encode_key_event,
+    new_session_id,
+    topic_for_channel,
+)
+from service.loopback_transport import LinkProfile, LoopbackBroker
+from utils.translator import MorseCodeTranslator
+
+DEFAULT_TEXT = "CQ CQ DE BI4MOL BI4MOL K"
+REQUIRED_KEYS = ("protocol", "version", "session_id", "seq", "myCall", "myChannel", "event", "event_time_ms")
+
+_TEXT_TO_MORSE = {
+    text: code for code, text in MorseCodeTranslator.morse_code_dict.items() if len(text) == 1 and text != " "
+}
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return float(sorted_values[idx])
+
+
+def keying_plan(text, dot_ms):
+    """Yield (tone_ms, gap_after_ms) per element of text, looping forever."""
+    words = [[_TEXT_TO_MORSE[ch] for ch in w if ch in _TEXT_TO_MORSE] for w in str(text).upper().split()]
+    words = [w for w in words if w]
+    if not words:
+        raise ValueError("text has no keyable characters")
+    while True:
+        for codes in words:
+            for ci, code in enumerate(codes):
+                for ei, element in enumerate(code):
+                    tone = dot_ms * (3 if element == "-" else 1)
+                    if ei != len(code) - 1:
+                        gap = dot_ms
+                    elif ci != len(codes) - 1:
+                        gap = dot_ms * 3
+                    else:
+                        gap = dot_ms * 7
+                    yield tone, gap
+
+
+class VirtualOperator:
+    """One simulated straight-key operator with its own session and seq counter."""
+
+    def __init__(self, index, client, channel, wpm, jitter, text, rng, on_published):
+        self.call = f"VOP{index:03d}"
+        self.client = client
+        self.channel = int(channel)
+        self.rng = rng
+        self.jitter = max(0.0, float(jitter))
+        self.dot_ms = 1200.0 / max(1.0, float(wpm))
+        self.session_id = new_session_id(self.call)
+        self.seq = 0
+        self.origin_ms = time.monotonic() * 1000.0
+        self.last_event_time_ms = -1
+        self.on_published = on_published
+        self.in_receiver_window = True
+        self._plan = keying_plan(text, self.dot_ms)
+        self._pending_event = EVENT_DOWN
+        self._gap_after_ms = 0.0
+        self.next_due_ms = self.origin_ms + rng.uniform(0.0, self.dot_ms * 7)
+
+    def _jittered(self, nominal_ms):
+        if self.jitter <= 0:
+            return nominal_ms
+        return max(nominal_ms * 0.3, nominal_ms * (1.0 + self.rng.gauss(0.0, self.jitter)))
+
+    def fire(self):
+        now_ms = time.monotonic() * 1000.0
+        event_time_ms = max(self.last_event_time_ms + 1, int(now_ms - self.origin_ms))
+        self.last_event_time_ms = event_time_ms
+        self.seq += 1
+        message = encode_key_event(
+            build_key_event(
+                session_id=self.session_id,
+                seq=self.seq,
+                call=self.call,
+                channel=self.channel,
+                event=self._pending_event,
+                event_time_ms=event_time_ms,
+                keyer_mode="straight",
+                dot_ms=self.dot_ms,
+                dash_ms=self.dot_ms * 3,
+                letter_gap_ms=self.dot_ms * 3,
+                word_gap_ms=self.dot_ms * 7,
+            )
+        )
+        self.on_published(self.session_id, self.seq, self.in_receiver_window)
+        self.client.send_message(message)
+
+        if self._pending_event == EVENT_DOWN:
+            tone_ms, self._gap_after_ms = next(self._plan)
+            self.next_due_ms += self._jittered(tone_ms)
+            self._pending_event = EVENT_UP
+        else:
+            self.next_due_ms += self._jittered(self._gap_after_ms)
+            self._pending_event = EVENT_DOWN
+
+
+class LoadStats:
+    """Thread-safe publish/receive bookkeeping shared by operators and receiver."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sent_at = {}
+        self.published = 0
+        self.received = 0
+        self.unmatched = 0
+        self.malformed = 0
+        self.latencies_ms = []
+        self.receiver_cpu_s = 0.0
+
+    def on_published(self, session_id, seq, expected=True):
+        with self._lock:
+            if expected:
+                self._sent_at[(session_id, seq)] = time.perf_counter()
+            self.published += 1
+
+    def on_message(self, text):
+        cpu_started = time.thread_time()
+        arrived = time.perf_counter()
+        try:
+            data = json.loads(text)
+            ok = isinstance(data, dict) and all(k in data for k in REQUIRED_KEYS)
+        except Exception:
+            ok = False
+        with self._lock:
+            if not ok:
+                self.malformed += 1
+            else:
+                sent = self._sent_at.pop((data["session_id"], data["seq"]), None)
+                if sent is None:
+                    self.unmatched += 1
+                else:
+                    self.received += 1
+                    self.latencies_ms.append((arrived - sent) * 1000.0)
+            self.receiver_cpu_s += time.thread_time() - cpu_started
+
+    def outstanding(self):
+        with self._lock:
+            return len(self._sent_at)
+
+
+def _make_client_factory(args):
+    if args.transport == "loopback":
+        broker = LoopbackBroker(
+            LinkProfile(
+                latency_ms=args.link_latency_ms,
+                jitter_ms=args.link_jitter_ms,
+                loss=args.link_loss,
+                reorder=args.link_reorder,
+            ),
+            seed=args.seed,
+            realtime=True,
+        )
+        return broker, (lambda client_id: broker.client(client_id=client_id))
+
+    from service.mqtt_client import MQTTClient
+
+    def _factory(client_id):
+        return MQTTClient(
+            broker=args.host,
+            port=args.port,
+            client_id=client_id,
+            username=args.username,
+            password=args.password,
+            use_tls=args.tls,
+            tls_insecure=args.tls,
+        )
+
+    return None, _factory
+
+
+def _wait_connected(clients, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if all(c.is_connected for c in clients):
+            return True
+        time.sleep(0.02)
+    return all(c.is_connected for c in clients)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    stats = LoadStats()
+    broker, make_client = _make_client_factory(args)
+    run_tag = int(time.time())
+
+    window = ChannelWindow(TOPIC_PREFIX, args.channel, args.side_range, mode=SUBSCRIBE_MODE_WILDCARD)
+    receiver = make_client(f"loadgen-rx-{run_tag}")
+    receiver.on_message_received = stats.on_message
+    receiver.topic_filter = window.accepts_topic
+    receiver.connect(topic_for_channel(args.channel), subscribe_topics=window.subscribe_topics())
+
+    operators = []
+    clients = [receiver]
+    for i in range(args.operators):
+        offset = rng.randint(-args.spread, args.spread) if args.spread > 0 else 0
+        channel = args.channel + offset
+        client = make_client(f"loadgen-op{i}-{run_tag}")
+        client.connect(topic_for_channel(channel), subscribe_topics=[topic_for_channel(channel)])
+        clients.append(client)
+        wpm = max(5.0, args.wpm + rng.uniform(-args.wpm_spread, args.wpm_spread))
+        op = VirtualOperator(i, client, channel, wpm, args.jitter, args.text, random.Random(rng.random()), stats.on_published)
+        op.in_receiver_window = window.accepts_channel(channel)
+        operators.append(op)
+
+    if not _wait_connected(clients, args.connect_timeout):
+        print("Not every client connected before the timeout; results will include failures.")
+
+    # Restart every schedule after the connect phase so the first events are not a burst.
+    start_ms = time.monotonic() * 1000.0
+    for op in operators:
+        op.next_due_ms = start_ms + (op.next_due_ms - op.origin_ms)
+
+    heap = [(op.next_due_ms, i) for i, op in enumerate(operators)]
+    heapq.heapify(heap)
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    end_ms = start_ms + args.duration * 1000.0
+    late_ms = []
+
+    while heap:
+        due_ms, idx = heap[0]
+        if due_ms >= end_ms:
+            break
+        wait_ms = due_ms - time.monotonic() * 1000.0
+        if wait_ms > 0:
+            time.sleep(wait_ms / 1000.0)
+        heapq.heappop(heap)
+        late_ms.append(max(0.0, time.monotonic() * 1000.0 - due_ms))
+        op = operators[idx]
+        op.fire()
+        heapq.heappush(heap, (op.next_due_ms, idx))
+
+    send_wall_s = time.perf_counter() - wall_started
+    drain_deadline = time.monotonic() + args.drain
+    while stats.outstanding() and time.monotonic() < drain_deadline:
+        time.sleep(0.02)
+    wall_s = time.perf_counter() - wall_started
+    cpu_s = time.process_time() - cpu_started
+
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+    if broker is not None:
+        broker.shutdown()
+
+    latencies = sorted(stats.latencies_ms)
+    late_ms.sort()
+    lost = stats.outstanding()
+    print(f"Transport:        {args.transport}")
+    print(f"Operators:        {args.operators} around {args.channel} (spread ±{args.spread}, window ±{args.side_range})")
+    print(f"Published:        {stats.published} events in {send_wall_s:.2f}s ({stats.published / max(1e-9, send_wall_s):.1f} ev/s)")
+    print(f"Received:         {stats.received} matched, {lost} missing, {stats.unmatched} unmatched, {stats.malformed} malformed")
+    print(
+        "Latency ms:       p50={:.2f} p90={:.2f} p99={:.2f} max={:.2f}".format(
+            _percentile(latencies, 0.50),
+            _percentile(latencies, 0.90),
+            _percentile(latencies, 0.99),
+            latencies[-1] if latencies else 0.0,
+        )
+    )
+    print(f"Scheduler late:   p99={_percentile(late_ms, 0.99):.2f} ms")
+    print(
+        f"Receiver CPU:     {stats.receiver_cpu_s * 1000.0:.1f} ms total, "
+        f"{stats.receiver_cpu_s * 1e6 / max(1, stats.received):.1f} us/event, "
+        f"{100.0 * stats.receiver_cpu_s / max(1e-9, wall_s):.2f}% of one core"
+    )
+    print(f"Process CPU:      {100.0 * cpu_s / max(1e-9, wall_s):.1f}% of one core")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operators", type=int, default=10)
+    parser.add_argument("--channel", type=int, default=7150)
+    parser.add_argument("--spread", type=int, default=0, help="spread operators over ±N channels")
+    parser.add_argument("--side-range", type=int, default=5, help="receiver window ±N channels")
+    parser.add_argument("--wpm", type=float, default=20.0)
+    parser.add_argument("--wpm-spread", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.1, help="relative timing jitter (stddev)")
+    parser.add_argument("--text", default=DEFAULT_TEXT)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of keying")
+    parser.add_argument("--drain", type=float, default=3.0, help="seconds to wait for in-flight events")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--transport", choices=("loopback", "mqtt"), default="loopback")
+    parser.add_argument("--connect-timeout", type=float, default=10.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--tls", action="store_true")
+    parser.add_argument("--link-latency-ms", type=float, default=0.0)
+    parser.add_argument("--link-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--link-loss", type=float, default=0.0)
+    parser.add_argument("--link-reorder", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    if args.operators < 1:
+        parser.error("--operators must be at least 1")
+    return run(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
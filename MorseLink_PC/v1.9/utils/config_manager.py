@@ -1,10 +1,13 @@
 import json
 import logging
 import os
+import uuid
 from urllib.parse import urlparse
 
 from PySide6.QtCore import QLocale, QSettings
 
+from service.mqtt_publisher import OVERFLOW_DROP_OLDEST, normalize_overflow_policy
+
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +44,28 @@ class ConfigManager:
             "server/tls_ca_certs": "",
             "server/tls_insecure": True,
             "server/channel_name": 7000,
+            "Network/publish_queue_limit": 2000,
+            "Network/publish_overflow_policy": "drop_oldest",
+            "Network/subscribe_mode": "window",
+            "Network/rx_reorder_max_events": 8,
+            "Network/rx_reorder_hold_ms": 40,
+            "Network/endpoint_racing": True,
+            "Network/endpoint_stagger_ms": 250,
+            "Network/rx_rate_limit": 60,
+            "Network/rx_rate_burst": 120,
+            "Network/rx_mute_ms": 30000,
+            "Network/rx_pending_limit": 256,
+            "Network/rx_catchup_compress_ms": 1500,
+            "Network/rx_catchup_gap_cap_ms": 150,
+            "Network/rx_catchup_speedup": 1.25,
+            "Network/rx_catchup_skip_ms": 6000,
+            "Network/persistent_session": False,
+            "Network/late_compress_ms": 1000,
+            "Network/late_skip_ms": 5000,
+            "Network/mqtt_protocol": "3.1.1",
+            "Network/key_event_expiry_s": 2,
+            "Network/session_expiry_s": 300,
+            "Network/side_channel_range": 5,
             "Setting/language": default_language,
             "Setting/buzz_freq": 800,
             "Setting/autokey_status": False,
@@ -53,6 +78,7 @@ class ConfigManager:
             "Setting/receive_buzz_status": True,
             "Setting/translation_visibility": True,
             "Setting/visualizer_visibility": True,
+            "Setting/visualizer_fft_mode": False,
             "Setting/sender_font_size": 15,
             "Auth/type": "plain",
             "Auth/token": "",
@@ -500,6 +526,18 @@ class ConfigManager:
         self.set_value("server/customized_endpoints", normalized)
         self.set_value("server/customized_url", normalized)
 
+    def get_server_endpoint_list(self):
+        """(scheme, host, port) for every configured endpoint, current selection first."""
+        current = (self.get_server_scheme(), self.get_server_host(), self.get_server_active_port())
+        result = [current] if current[1] else []
+        for token in self.get_server_customized_endpoints().split(","):
+            if not token:
+                continue
+            endpoint = self._split_endpoint(token)
+            if endpoint[1] and endpoint not in result:
+                result.append(endpoint)
+        return result
+
     # Legacy server APIs kept for compatibility
     def get_server_url(self):
         return self.get_server_host()
@@ -572,6 +610,162 @@ class ConfigManager:
         self.set_value("server/tls_insecure", insecure)
         self.set_value("server/tls_use_cert", not insecure)
 
+    # Network tuning
+    def get_publish_queue_limit(self):
+        return max(1, self.get_value("Network/publish_queue_limit", 2000, int))
+
+    def set_publish_queue_limit(self, value):
+        self.set_value("Network/publish_queue_limit", max(1, self._safe_int(value, 2000)))
+
+    def get_publish_overflow_policy(self):
+        return normalize_overflow_policy(
+            self.get_value("Network/publish_overflow_policy", OVERFLOW_DROP_OLDEST, str)
+        )
+
+    def set_publish_overflow_policy(self, value):
+        self.set_value("Network/publish_overflow_policy", normalize_overflow_policy(value))
+
+    def get_subscribe_mode(self):
+        value = self.get_value("Network/subscribe_mode", "window", str).lower()
+        return value if value in ("window", "wildcard") else "window"
+
+    def set_subscribe_mode(self, value):
+        value = str(value or "window").lower()
+        if value not in ("window", "wildcard"):
+            value = "window"
+        self.set_value("Network/subscribe_mode", value)
+
+    def get_rx_reorder_max_events(self):
+        return max(0, self.get_value("Network/rx_reorder_max_events", 8, int))
+
+    def set_rx_reorder_max_events(self, value):
+        self.set_value("Network/rx_reorder_max_events", max(0, self._safe_int(value, 8)))
+
+    def get_rx_reorder_hold_ms(self):
+        return max(0, self.get_value("Network/rx_reorder_hold_ms", 40, int))
+
+    def set_rx_reorder_hold_ms(self, value):
+        self.set_value("Network/rx_reorder_hold_ms", max(0, self._safe_int(value, 40)))
+
+    def get_endpoint_racing(self):
+        return self.get_value("Network/endpoint_racing", True, bool)
+
+    def set_endpoint_racing(self, value):
+        self.set_value("Network/endpoint_racing", bool(value))
+
+    def get_endpoint_stagger_ms(self):
+        return max(0, self.get_value("Network/endpoint_stagger_ms", 250, int))
+
+    def set_endpoint_stagger_ms(self, value):
+        self.set_value("Network/endpoint_stagger_ms", max(0, self._safe_int(value, 250)))
+
+    def get_rx_rate_limit(self):
+        return max(0, self.get_value("Network/rx_rate_limit", 60, int))
+
+    def set_rx_rate_limit(self, value):
+        self.set_value("Network/rx_rate_limit", max(0, self._safe_int(value, 60)))
+
+    def get_rx_rate_burst(self):
+        return max(1, self.get_value("Network/rx_rate_burst", 120, int))
+
+    def set_rx_rate_burst(self, value):
+        self.set_value("Network/rx_rate_burst", max(1, self._safe_int(value, 120)))
+
+    def get_rx_mute_ms(self):
+        return max(0, self.get_value("Network/rx_mute_ms", 30000, int))
+
+    def set_rx_mute_ms(self, value):
+        self.set_value("Network/rx_mute_ms", max(0, self._safe_int(value, 30000)))
+
+    def get_rx_pending_limit(self):
+        return max(1, self.get_value("Network/rx_pending_limit", 256, int))
+
+    def set_rx_pending_limit(self, value):
+        self.set_value("Network/rx_pending_limit", max(1, self._safe_int(value, 256)))
+
+    def get_rx_catchup_compress_ms(self):
+        return max(0, self.get_value("Network/rx_catchup_compress_ms", 1500, int))
+
+    def set_rx_catchup_compress_ms(self, value):
+        self.set_value("Network/rx_catchup_compress_ms", max(0, self._safe_int(value, 1500)))
+
+    def get_rx_catchup_gap_cap_ms(self):
+        return max(0, self.get_value("Network/rx_catchup_gap_cap_ms", 150, int))
+
+    def set_rx_catchup_gap_cap_ms(self, value):
+        self.set_value("Network/rx_catchup_gap_cap_ms", max(0, self._safe_int(value, 150)))
+
+    def get_rx_catchup_speedup(self):
+        return min(4.0, max(1.0, self.get_value("Network/rx_catchup_speedup", 1.25, float)))
+
+    def set_rx_catchup_speedup(self, value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = 1.25
+        self.set_value("Network/rx_catchup_speedup", min(4.0, max(1.0, value)))
+
+    def get_rx_catchup_skip_ms(self):
+        return max(0, self.get_value("Network/rx_catchup_skip_ms", 6000, int))
+
+    def set_rx_catchup_skip_ms(self, value):
+        self.set_value("Network/rx_catchup_skip_ms", max(0, self._safe_int(value, 6000)))
+
+    def get_persistent_session(self):
+        return self.get_value("Network/persistent_session", False, bool)
+
+    def set_persistent_session(self, value):
+        self.set_value("Network/persistent_session", bool(value))
+
+    def get_client_instance_id(self):
+        """Stable per-install suffix for MQTT client ids (persistent sessions need one)."""
+        value = self.get_value("Network/client_instance_id", "", str)
+        if not value:
+            value = uuid.uuid4().hex[:8]
+            self.set_value("Network/client_instance_id", value)
+            self.settings.sync()
+        return value
+
+    def get_late_compress_ms(self):
+        return max(0, self.get_value("Network/late_compress_ms", 1000, int))
+
+    def set_late_compress_ms(self, value):
+        self.set_value("Network/late_compress_ms", max(0, self._safe_int(value, 1000)))
+
+    def get_late_skip_ms(self):
+        return max(0, self.get_value("Network/late_skip_ms", 5000, int))
+
+    def set_late_skip_ms(self, value):
+        self.set_value("Network/late_skip_ms", max(0, self._safe_int(value, 5000)))
+
+    def get_mqtt_protocol(self):
+        value = self.get_value("Network/mqtt_protocol", "3.1.1", str).lower()
+        return value if value in ("auto", "5", "3.1.1") else "3.1.1"
+
+    def set_mqtt_protocol(self, value):
+        value = str(value or "3.1.1").lower()
+        if value not in ("auto", "5", "3.1.1"):
+            value = "3.1.1"
+        self.set_value("Network/mqtt_protocol", value)
+
+    def get_key_event_expiry_s(self):
+        return max(0, self.get_value("Network/key_event_expiry_s", 2, int))
+
+    def set_key_event_expiry_s(self, value):
+        self.set_value("Network/key_event_expiry_s", max(0, self._safe_int(value, 2)))
+
+    def get_session_expiry_s(self):
+        return max(0, self.get_value("Network/session_expiry_s", 300, int))
+
+    def set_session_expiry_s(self, value):
+        self.set_value("Network/session_expiry_s", max(0, self._safe_int(value, 300)))
+
+    def get_side_channel_range(self):
+        return max(0, min(50, self.get_value("Network/side_channel_range", 5, int)))
+
+    def set_side_channel_range(self, value):
+        self.set_value("Network/side_channel_range", max(0, min(50, self._safe_int(value, 5))))
+
     # Auth extension
     def get_auth_type(self):
         value = self.get_value("Auth/type", "plain", str).lower()
@@ -663,6 +857,12 @@ class ConfigManager:
     def set_visualizer_visibility(self, value):
         self.set_value("Setting/visualizer_visibility", bool(value))
 
+    def get_visualizer_fft_mode(self):
+        return self.get_value("Setting/visualizer_fft_mode", False, bool)
+
+    def set_visualizer_fft_mode(self, value):
+        self.set_value("Setting/visualizer_fft_mode", bool(value))
+
     def get_sender_font_size(self):
         return self.get_value("Setting/sender_font_size", value_type=int)
 
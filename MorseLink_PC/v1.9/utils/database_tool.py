@@ -246,6 +246,10 @@ class DatabaseTool:
                 "CREATE INDEX IF NOT EXISTS idx_qso_direction ON QSOrecord(direction)"
             )
             conn.execute("CREATE INDEX IF NOT EXISTS idx_qso_sender ON QSOrecord(sender)")
+            # Keyset paging walks (created_at, id) in order.
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_qso_created_id ON QSOrecord(created_at, id)"
+            )
 
     @staticmethod
     def _to_float(value: Any, default: float = 0.0) -> float:
@@ -569,9 +573,15 @@ class DatabaseTool:
         if parse_failed:
             payload = {}
 
+        record = self._normalize_qso_summary_row(row)
+        record["json_data"] = row["json_data"]
+        record["data"] = payload if isinstance(payload, dict) else {}
+        return record
+
+    def _normalize_qso_summary_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Metadata columns only; json_data is left unparsed for list views."""
         return {
             "id": int(row["id"]),
-            "json_data": row["json_data"],
             "created_at": self._to_text(row["created_at"], ""),
             "time": self._to_text(row["created_at"], ""),
             "direction": self._to_text(row["direction"], ""),
@@ -580,7 +590,6 @@ class DatabaseTool:
             "message_text": self._to_text(row["message_text"], ""),
             "duration_sec": self._to_float(row["duration_sec"], 0.0),
             "has_timeline": self._to_int(row["has_timeline"], 0),
-            "data": payload if isinstance(payload, dict) else {},
         }
 
     @staticmethod
@@ -615,6 +624,42 @@ class DatabaseTool:
         page_size = max(1, int(page_size))
         offset = (page - 1) * page_size
 
+        where_sql, params = self._qso_filter_sql(keyword, direction, date_from, date_to)
+        order_sql = "DESC" if sort_desc else "ASC"
+
+        with self._connect() as conn:
+            total_count = conn.execute(
+                f"SELECT COUNT(1) FROM QSOrecord WHERE {where_sql}",
+                tuple(params),
+            ).fetchone()[0]
+
+            rows = conn.execute(
+                f"""
+                SELECT id, json_data, created_at, direction, sender,
+                       message_morse, message_text, duration_sec, has_timeline
+                FROM QSOrecord
+                WHERE {where_sql}
+                ORDER BY created_at {order_sql}, id {order_sql}
+                LIMIT ? OFFSET ?
+                """,
+                tuple(params + [page_size, offset]),
+            ).fetchall()
+
+            ignored_broken = conn.execute(
+                "SELECT COUNT(1) FROM QSOrecord WHERE direction = ?",
+                (BROKEN_QSO_DIRECTION,),
+            ).fetchone()[0]
+
+        records = [self._normalize_qso_row(row) for row in rows]
+        return records, int(total_count), int(ignored_broken)
+
+    def _qso_filter_sql(
+        self,
+        keyword: str = "",
+        direction: str = "",
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
         where_parts = ["(direction IS NULL OR direction <> ?)"]
         params: List[Any] = [BROKEN_QSO_DIRECTION]
 
@@ -639,33 +684,80 @@ class DatabaseTool:
             params.append(to_value)
 
         where_sql = " AND ".join(where_parts) if where_parts else "1=1"
-        order_sql = "DESC" if sort_desc else "ASC"
+        return where_sql, params
 
+    def count_qso_records(
+        self,
+        keyword: str = "",
+        direction: str = "",
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """Return ``(matching_count, ignored_broken_count)`` for the given filters."""
+        self._ensure_qso_backfill_once()
+        where_sql, params = self._qso_filter_sql(keyword, direction, date_from, date_to)
         with self._connect() as conn:
             total_count = conn.execute(
                 f"SELECT COUNT(1) FROM QSOrecord WHERE {where_sql}",
                 tuple(params),
             ).fetchone()[0]
+            ignored_broken = conn.execute(
+                "SELECT COUNT(1) FROM QSOrecord WHERE direction = ?",
+                (BROKEN_QSO_DIRECTION,),
+            ).fetchone()[0]
+        return int(total_count), int(ignored_broken)
+
+    def fetch_qso_record_chunk(
+        self,
+        keyword: str = "",
+        direction: str = "",
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        after: Optional[Tuple[str, int]] = None,
+        limit: int = 200,
+        sort_desc: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Keyset-paged QSO summaries ordered by ``(created_at, id)``.
 
+        Pass the ``(created_at, id)`` of the last row received as ``after`` to
+        continue; cost does not grow with the position in the log. Rows carry
+        metadata only, use :meth:`get_qso_record` for the full payload.
+        """
+        self._ensure_qso_backfill_once()
+        where_sql, params = self._qso_filter_sql(keyword, direction, date_from, date_to)
+        order_sql = "DESC" if sort_desc else "ASC"
+        if after is not None:
+            where_sql += f" AND (created_at, id) {'<' if sort_desc else '>'} (?, ?)"
+            params.extend([str(after[0]), int(after[1])])
+
+        with self._connect() as conn:
             rows = conn.execute(
                 f"""
-                SELECT id, json_data, created_at, direction, sender,
+                SELECT id, created_at, direction, sender,
                        message_morse, message_text, duration_sec, has_timeline
                 FROM QSOrecord
                 WHERE {where_sql}
                 ORDER BY created_at {order_sql}, id {order_sql}
-                LIMIT ? OFFSET ?
+                LIMIT ?
                 """,
-                tuple(params + [page_size, offset]),
+                tuple(params + [max(1, int(limit))]),
             ).fetchall()
+        return [self._normalize_qso_summary_row(row) for row in rows]
 
-            ignored_broken = conn.execute(
-                "SELECT COUNT(1) FROM QSOrecord WHERE direction = ?",
-                (BROKEN_QSO_DIRECTION,),
-            ).fetchone()[0]
-
-        records = [self._normalize_qso_row(row) for row in rows]
-        return records, int(total_count), int(ignored_broken)
+    def get_qso_record(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """Full QSO record including the parsed payload, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT id, json_data, created_at, direction, sender,
+                       message_morse, message_text, duration_sec, has_timeline
+                FROM QSOrecord
+                WHERE id = ?
+                """,
+                (int(record_id),),
+            ).fetchone()
+        return self._normalize_qso_row(row) if row is not None else None
 
     def delete_qso_records_by_ids(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
         """Batch delete by id and return deleted rows for undo."""
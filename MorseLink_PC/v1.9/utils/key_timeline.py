@@ -0,0 +1,133 @@
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def presentation_ms():
+    """
+    共享的呈现时钟（perf_counter 毫秒）。
+
+    接收调度、音频引擎的时钟映射、瀑布图与信号灯都以它为准，
+    同一时间戳在各输出上代表同一时刻。
+    """
+    return time.perf_counter() * 1000.0
+
+
+class KeyTimeline:
+    """
+    各通道共享的按键状态时间线。
+
+    每个通道保存按时间排列的 [t_on_ms, t_off_ms) 区间（可在未来），与上一段重叠时合并。
+    一个回放元素只登记一次；瀑布图按帧时间窗采样，信号灯按边沿采样，
+    读取不会消费数据，过期区间在 retain_ms 之后才被清理，供多个使用方各自采样。
+    登记时依次通知监听者 listener(channel, t_on_ms, t_off_ms)，用于唤醒降频中的界面或重新对准定时器。
+    """
+
+    def __init__(self, retain_ms=2000):
+        """
+        Args:
+            retain_ms (int): 已结束区间的保留时长，应大于最慢使用方的采样间隔
+        """
+        self.retain_ms = max(0, int(retain_ms))
+        self._channels = {}
+        self._listeners = []
+        # 每次 clear() 加一，自行缓存区间的使用方据此重新同步
+        self.generation = 0
+
+    now_ms = staticmethod(presentation_ms)
+
+    def add_listener(self, callback):
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add(self, channel, t_on_ms, t_off_ms):
+        """登记一次按键 [t_on_ms, t_off_ms)，无效区间忽略。"""
+        t_on_ms = float(t_on_ms)
+        t_off_ms = float(t_off_ms)
+        if t_off_ms <= t_on_ms:
+            return
+        q = self._channels.get(channel)
+        if q is None:
+            q = self._channels[channel] = deque()
+        else:
+            self._prune(q, self.now_ms() - self.retain_ms)
+        if q and t_on_ms <= q[-1][1]:
+            q[-1] = (q[-1][0], max(q[-1][1], t_off_ms))
+        else:
+            q.append((t_on_ms, t_off_ms))
+        for callback in list(self._listeners):
+            try:
+                callback(channel, t_on_ms, t_off_ms)
+            except Exception:
+                logger.exception("Key timeline listener failed")
+
+    def last_off(self, channel):
+        """通道最后一段的抬键时刻；没有区间时返回 None。"""
+        q = self._channels.get(channel)
+        return q[-1][1] if q else None
+
+    def channels(self):
+        return [ch for ch, q in self._channels.items() if q]
+
+    def intervals(self):
+        """当前保留的全部区间，依次给出 (channel, t_on_ms, t_off_ms)。"""
+        return [(ch, t_on, t_off) for ch, q in self._channels.items() for t_on, t_off in q]
+
+    def overlaps(self, channel, t0_ms, t1_ms):
+        """[t0_ms, t1_ms) 内通道是否有按键；短于窗口的按键同样算在内。"""
+        q = self._channels.get(channel)
+        if not q:
+            return False
+        self._prune(q, t0_ms - self.retain_ms)
+        for t_on, t_off in q:
+            if t_on >= t1_ms:
+                return False
+            if t_off > t0_ms:
+                return True
+        return False
+
+    def is_down(self, t_ms, channel=None):
+        """t_ms 时刻指定通道（None 表示任一通道）是否处于按下状态。"""
+        queues = self._channels.values() if channel is None else (self._channels.get(channel) or (),)
+        for q in queues:
+            for t_on, t_off in q:
+                if t_on > t_ms:
+                    break
+                if t_off > t_ms:
+                    return True
+        return False
+
+    def next_edge(self, after_ms, channel=None):
+        """after_ms 之后最近的按下/抬起时刻；没有时返回 None。"""
+        queues = self._channels.values() if channel is None else (self._channels.get(channel) or (),)
+        best = None
+        for q in queues:
+            for t_on, t_off in q:
+                edge = t_on if t_on > after_ms else (t_off if t_off > after_ms else None)
+                if edge is not None:
+                    if best is None or edge < best:
+                        best = edge
+                    break
+        return best
+
+    def has_pending(self, now_ms):
+        """是否还有尚未结束的区间。"""
+        return any(q and q[-1][1] > now_ms for q in self._channels.values())
+
+    def clear(self, channel=None):
+        self.generation += 1
+        if channel is None:
+            self._channels.clear()
+        else:
+            self._channels.pop(channel, None)
+
+    @staticmethod
+    def _prune(q, before_ms):
+        while q and q[0][1] <= before_ms:
+            q.popleft()
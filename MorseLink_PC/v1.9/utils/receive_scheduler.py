@@ -0,0 +1,92 @@
+import heapq
+import itertools
+import logging
+from PySide6.QtCore import QObject, QTimer, Qt
+
+from utils.key_timeline import presentation_ms
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledAction:
+    __slots__ = ("due_ms", "channel_id", "callback", "cancelled")
+
+    def __init__(self, due_ms, channel_id, callback):
+        self.due_ms = float(due_ms)
+        self.channel_id = channel_id
+        self.callback = callback
+        self.cancelled = False
+
+
+class ReceiveScheduler(QObject):
+    """
+    所有接收通道共用的单一调度器。
+
+    维护 (due_ms, order, action) 最小堆，只用一个 PreciseTimer 对准堆顶时刻；
+    到期时一次性执行所有已到期的动作，再重新对准下一个。取消采用惰性删除。
+    时间基准为共享呈现时钟（perf_counter 毫秒），与按键时间线、瀑布图一致。
+    """
+
+    # 提前这么多毫秒到期的动作也在本轮执行，避免为 1ms 再排一次定时器
+    SLACK_MS = 1.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._heap = []
+        self._order = itertools.count()
+        self._live = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._run_due)
+
+    now_ms = staticmethod(presentation_ms)
+
+    def schedule_at(self, due_ms, channel_id, callback):
+        """在绝对时刻 due_ms 执行 callback，返回可用于 cancel() 的句柄。"""
+        action = ScheduledAction(due_ms, channel_id, callback)
+        heapq.heappush(self._heap, (action.due_ms, next(self._order), action))
+        self._live += 1
+        if self._heap[0][2] is action:
+            self._rearm()
+        return action
+
+    def schedule_in(self, delay_ms, channel_id, callback):
+        return self.schedule_at(self.now_ms() + max(0.0, float(delay_ms)), channel_id, callback)
+
+    def cancel(self, action):
+        if action is None or action.cancelled:
+            return
+        action.cancelled = True
+        self._live -= 1
+
+    def cancel_channel(self, channel_id):
+        for _, _, action in self._heap:
+            if action.channel_id == channel_id:
+                self.cancel(action)
+
+    def pending_count(self):
+        return self._live
+
+    def _rearm(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            self._timer.stop()
+            return
+        delay_ms = self._heap[0][0] - self.now_ms()
+        self._timer.start(max(0, int(round(delay_ms))))
+
+    def _run_due(self):
+        deadline = self.now_ms() + self.SLACK_MS
+        while self._heap and self._heap[0][0] <= deadline:
+            _, _, action = heapq.heappop(self._heap)
+            if action.cancelled:
+                continue
+            action.cancelled = True
+            self._live -= 1
+            try:
+                action.callback()
+            except Exception:
+                logger.exception("Receive action failed on channel %s", action.channel_id)
+        self._rearm()
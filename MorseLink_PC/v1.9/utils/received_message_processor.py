@@ -1,36 +1,75 @@
 import logging
 import math
-import time
 from collections import deque
 from PySide6.QtCore import QObject, QTimer
 
+from utils.receive_scheduler import ReceiveScheduler
+
 logger = logging.getLogger(__name__)
 
 
+class CatchUpPolicy:
+    """
+    积压追赶策略，按通道回放滞后（lag）分级生效：
+
+    - lag > compress_ms：键间间隔压缩到 gap_cap_ms 以内，并按 speedup 倍速回放；
+    - lag > skip_ms：丢弃最旧的待回放元素直到 lag 回落到 compress_ms，
+      解码在入队前已完成，因此文本不受影响，只是不再回放。
+
+    阈值为 0 表示关闭对应级别。
+    """
+
+    __slots__ = ("compress_ms", "gap_cap_ms", "speedup", "skip_ms")
+
+    def __init__(self, compress_ms=1500, gap_cap_ms=150, speedup=1.25, skip_ms=6000):
+        self.compress_ms = max(0, int(compress_ms))
+        self.gap_cap_ms = max(0, int(gap_cap_ms))
+        self.speedup = max(1.0, float(speedup))
+        self.skip_ms = max(0, int(skip_ms))
+
+
 class ChannelProcessor(QObject):
-    def __init__(self, channel_id, buzzer, morsecode_visualizer, signal_light=None):
+    DEFAULT_MAX_PENDING = 256
+
+    def __init__(
+        self,
+        channel_id,
+        buzzer,
+        morsecode_visualizer,
+        signal_light=None,
+        max_pending=DEFAULT_MAX_PENDING,
+        scheduler=None,
+        catch_up=None,
+        key_timeline=None,
+    ):
         super().__init__()
         self.channel_id = channel_id
         self.buzz = buzzer
         self.morsecode_visualizer = morsecode_visualizer
         self.signal_light = signal_light
+        # 共享按键时间线：瀑布图与信号灯都从这里采样，每个元素只登记一次
+        self.key_timeline = key_timeline
 
-        # 待回放队列：元素为 (play_ms, gap_before_ms)
+        # 待回放队列：元素为 (play_ms, gap_before_ms, play_audio)；超过上限时丢弃最旧的元素
+        self.max_pending = max(1, int(max_pending))
         self._pending = deque()
-        # 当前正在排程/回放的元素：(play_ms, gap_before_ms, target_start_ms)
+        self._pending_ms = 0
+        self.dropped_count = 0
+        # 积压追赶：被跳过的元素数与压缩/加速回放的元素数
+        self.catch_up = catch_up if catch_up is not None else CatchUpPolicy()
+        self.skipped_count = 0
+        self.compressed_count = 0
+        # 当前正在排程/回放的元素：(play_ms, gap_before_ms, target_start_ms, play_audio, play_visual, play_light)；
+        # 已按时间戳提前提交的输出对应标志为 False
         self._current = None
         # 上一次“理论抬键时刻”（毫秒, perf_counter 基准）
         self._last_release_ms = None
         # fallback：当设备不支持按时长回放时，用 start/stop 兜底
         self._manual_buzz_hold = False
 
-        self._start_timer = QTimer(self)
-        self._start_timer.setSingleShot(True)
-        self._start_timer.timeout.connect(self._start_current)
-
-        self._finish_timer = QTimer(self)
-        self._finish_timer.setSingleShot(True)
-        self._finish_timer.timeout.connect(self._finish_current)
+        # 开始/结束动作交给共享调度器；单独使用时自建一个
+        self.scheduler = scheduler if scheduler is not None else ReceiveScheduler(self)
+        self._scheduled = None
 
     def receive_message(self, message, *, play_audio=True):
         """
@@ -38,12 +77,54 @@ class ChannelProcessor(QObject):
         message = [pressed_time_ms, pressed_interval_ms]
         """
         play_ms, gap_before_ms = self._parse_message(message)
+        if len(self._pending) >= self.max_pending:
+            self._pop_pending()
+            self.dropped_count += 1
+            if self.dropped_count == 1 or self.dropped_count % 100 == 0:
+                logger.warning("Channel %s pending queue full, dropped %s", self.channel_id, self.dropped_count)
         self._pending.append((play_ms, gap_before_ms, bool(play_audio)))
+        self._pending_ms += play_ms + gap_before_ms
         logger.debug("Channel %s received message: play=%s gap=%s", self.channel_id, play_ms, gap_before_ms)
         self._schedule_next()
 
     def _now_ms(self):
-        return time.perf_counter() * 1000.0
+        return self.scheduler.now_ms()
+
+    def _pop_pending(self):
+        item = self._pending.popleft()
+        self._pending_ms -= item[0] + item[1]
+        return item
+
+    def lag_ms(self, now_ms=None):
+        """当前积压回放完所需的时间，即本通道落后实时的毫秒数。"""
+        now_ms = self._now_ms() if now_ms is None else now_ms
+        lag = self._pending_ms
+        if self._current is not None:
+            play_ms, _, target_start_ms = self._current[:3]
+            lag += max(0.0, target_start_ms + play_ms - now_ms)
+        return max(0, int(round(lag)))
+
+    def _apply_catch_up(self, now_ms, play_ms, gap_before_ms, play_audio):
+        """返回实际回放的 (play_ms, gap_before_ms, play_audio)；跳过时换成幸存元素自己的标志。"""
+        policy = self.catch_up
+        # 当前元素本身也计入积压
+        lag = self._pending_ms + play_ms + gap_before_ms
+        if policy.skip_ms and lag > policy.skip_ms and self._pending:
+            target = policy.compress_ms
+            skipped = 0
+            while self._pending and lag > target:
+                lag -= play_ms + gap_before_ms
+                play_ms, gap_before_ms, play_audio = self._pop_pending()
+                skipped += 1
+            self.skipped_count += skipped
+            logger.warning("Channel %s behind by %s ms, skipped %s elements", self.channel_id, lag, skipped)
+        if policy.compress_ms and lag > policy.compress_ms:
+            gap_before_ms = min(gap_before_ms, policy.gap_cap_ms)
+            if policy.speedup > 1.0:
+                play_ms = max(1, int(round(play_ms / policy.speedup)))
+                gap_before_ms = int(round(gap_before_ms / policy.speedup))
+            self.compressed_count += 1
+        return play_ms, gap_before_ms, play_audio
 
     def _to_ms(self, value, default, minimum):
         try:
@@ -75,8 +156,9 @@ class ChannelProcessor(QObject):
         if self._current is not None or not self._pending:
             return
 
-        play_ms, gap_before_ms, play_audio = self._pending.popleft()
+        play_ms, gap_before_ms, play_audio = self._pop_pending()
         now_ms = self._now_ms()
+        play_ms, gap_before_ms, play_audio = self._apply_catch_up(now_ms, play_ms, gap_before_ms, play_audio)
 
         if self._last_release_ms is None:
             target_start_ms = now_ms + gap_before_ms
@@ -85,35 +167,57 @@ class ChannelProcessor(QObject):
             # 若网络延迟导致已过目标时刻，则立即播放，避免间隔被二次叠加。
             target_start_ms = max(now_ms, self._last_release_ms + gap_before_ms)
 
-        self._current = (play_ms, gap_before_ms, target_start_ms, play_audio)
+        if play_audio and self._schedule_audio(target_start_ms, play_ms):
+            # 声音已按时间戳写入音频时间线
+            play_audio = False
+        if self.key_timeline is not None:
+            # 瀑布图与信号灯都采样共享时间线
+            self.key_timeline.add(self.channel_id, target_start_ms, target_start_ms + play_ms)
+            play_visual = False
+            play_light = False
+        else:
+            play_visual = not self._schedule_visual(target_start_ms, play_ms)
+            play_light = bool(self.signal_light)
+        self._current = (play_ms, gap_before_ms, target_start_ms, play_audio, play_visual, play_light)
+
+        if not (play_audio or play_visual or play_light):
+            # 所有输出都已按时间戳提交：每个元素只需在抬键时刻排一次动作，推进到下一个元素
+            self._scheduled = self.scheduler.schedule_at(
+                target_start_ms + play_ms, self.channel_id, self._finish_current
+            )
+            return
 
         delay_ms = max(0, int(round(target_start_ms - now_ms)))
         if delay_ms <= 0:
             self._start_current()
             return
 
-        self._start_timer.start(delay_ms)
+        self._scheduled = self.scheduler.schedule_at(target_start_ms, self.channel_id, self._start_current)
         logger.debug("Channel %s scheduled in %s ms", self.channel_id, delay_ms)
 
     def _start_current(self):
+        self._scheduled = None
         if self._current is None:
             return
 
-        play_ms, _, _, play_audio = self._current
+        play_ms, _, _, play_audio, play_visual, play_light = self._current
 
         if play_audio:
             self._play_audio(play_ms)
-        self._play_visual(play_ms)
-        self._play_signal_light(play_ms)
+        if play_visual:
+            self._play_visual(play_ms)
+        if play_light:
+            self._play_signal_light(play_ms)
 
-        self._finish_timer.start(max(1, play_ms))
+        self._scheduled = self.scheduler.schedule_in(max(1, play_ms), self.channel_id, self._finish_current)
         logger.debug("Channel %s started playing for %s ms", self.channel_id, play_ms)
 
     def _finish_current(self):
+        self._scheduled = None
         if self._current is None:
             return
 
-        play_ms, _, target_start_ms, _ = self._current
+        play_ms, _, target_start_ms = self._current[:3]
         self._last_release_ms = target_start_ms + play_ms
 
         if self._manual_buzz_hold and self.buzz:
@@ -126,6 +230,59 @@ class ChannelProcessor(QObject):
         self._current = None
         self._schedule_next()
 
+    def clear(self, clear_audio=True):
+        """
+        丢弃待回放与正在回放的元素，并撤销已按时间戳提交的输出。
+        共用蜂鸣器时由 MultiChannelProcessor 统一清空音频时间线（clear_audio=False）。
+        """
+        if self._scheduled is not None:
+            self.scheduler.cancel(self._scheduled)
+            self._scheduled = None
+        self._pending.clear()
+        self._pending_ms = 0
+        self._current = None
+        self._last_release_ms = None
+        if self.key_timeline is not None:
+            self.key_timeline.clear(self.channel_id)
+        if self.buzz:
+            if clear_audio:
+                self._clear_scheduled_tones()
+            if self._manual_buzz_hold:
+                try:
+                    self.buzz.stop()
+                except Exception:
+                    pass
+        self._manual_buzz_hold = False
+
+    def _clear_scheduled_tones(self):
+        clear_scheduled_tones = getattr(self.buzz, "clear_scheduled_tones", None)
+        if clear_scheduled_tones is not None:
+            try:
+                clear_scheduled_tones()
+            except Exception:
+                logger.exception("Channel %s failed to clear scheduled tones", self.channel_id)
+
+    def _schedule_audio(self, target_start_ms, play_ms):
+        """
+        把音调直接提交到音频引擎时间线（采样级精度）；引擎不支持时返回 False，
+        退回到开始时刻调用 play_for_duration。
+        """
+        schedule_tone = getattr(self.buzz, "schedule_tone", None) if self.buzz else None
+        if schedule_tone is None:
+            return False
+        try:
+            return bool(schedule_tone(target_start_ms, play_ms))
+        except Exception:
+            logger.exception("Channel %s failed to schedule tone", self.channel_id)
+            return False
+
+    def _schedule_visual(self, target_start_ms, play_ms):
+        add_key_interval = getattr(self.morsecode_visualizer, "add_key_interval", None) if self.morsecode_visualizer else None
+        if add_key_interval is None:
+            return False
+        add_key_interval(self.channel_id, target_start_ms, target_start_ms + play_ms)
+        return True
+
     def _play_audio(self, play_ms):
         if not self.buzz:
             return
@@ -141,16 +298,12 @@ class ChannelProcessor(QObject):
         if not self.morsecode_visualizer:
             return
 
-        fps_ms = int(getattr(self.morsecode_visualizer, "fps_ms", 40) or 40)
-        fps_ms = max(1, fps_ms)
-        height_frames = max(1, int(math.ceil(float(play_ms) / float(fps_ms))))
-
         try:
             self.morsecode_visualizer.generate_blocks(
                 channel_idx=self.channel_id,
                 count=1,
-                height=height_frames,
                 gap_ms=0,
+                duration_ms=play_ms,
             )
         except Exception:
             self.morsecode_visualizer.start_generating(self.channel_id)
@@ -172,17 +325,37 @@ class ChannelProcessor(QObject):
 
 
 class MultiChannelProcessor(QObject):
-    def __init__(self, main_channel_buzzer, main_channel_morsecode_visualizer, main_channel_signal_light):
+    def __init__(
+        self,
+        main_channel_buzzer,
+        main_channel_morsecode_visualizer,
+        main_channel_signal_light,
+        max_pending=ChannelProcessor.DEFAULT_MAX_PENDING,
+        channel_count=11,
+        catch_up=None,
+        key_timeline=None,
+    ):
         super().__init__()
         self.channels = {}
-
-        # 初始化主通道（第 5 个通道，channel_id = 4）
-        self.channels[5] = ChannelProcessor(5, main_channel_buzzer, main_channel_morsecode_visualizer, main_channel_signal_light)
-
-        # 初始化其他通道
-        for i in range(11):
-            if i != 5:  # 跳过主通道
-                self.channels[i] = ChannelProcessor(i, main_channel_buzzer, main_channel_morsecode_visualizer, main_channel_signal_light)
+        # 所有通道共用一个调度器（一个定时器），通道数量可配置
+        self.scheduler = ReceiveScheduler(self)
+        self.key_timeline = key_timeline
+        self.channel_count = max(1, int(channel_count))
+        # 主通道位于窗口中央（默认 11 个通道时为 5）
+        self.main_channel_id = self.channel_count // 2
+        self.catch_up = catch_up if catch_up is not None else CatchUpPolicy()
+
+        for i in range(self.channel_count):
+            self.channels[i] = ChannelProcessor(
+                i,
+                main_channel_buzzer,
+                main_channel_morsecode_visualizer,
+                main_channel_signal_light,
+                max_pending,
+                scheduler=self.scheduler,
+                catch_up=self.catch_up,
+                key_timeline=self.key_timeline,
+            )
 
     def receive_message(self, channel_id, message, *, play_audio=True):
         """
@@ -194,6 +367,32 @@ class MultiChannelProcessor(QObject):
         else:
             logger.error("Channel %s does not exist.", channel_id)
 
+    def dropped_total(self):
+        """队列溢出丢弃的元素总数。"""
+        return sum(ch.dropped_count for ch in self.channels.values())
+
+    def skipped_total(self):
+        """积压追赶跳过的元素总数。"""
+        return sum(ch.skipped_count for ch in self.channels.values())
+
+    def lag_by_channel(self):
+        """各通道回放滞后（毫秒），只列出有积压的通道。"""
+        now_ms = self.scheduler.now_ms()
+        lags = {}
+        for channel_id, channel in self.channels.items():
+            lag = channel.lag_ms(now_ms)
+            if lag > 0:
+                lags[channel_id] = lag
+        return lags
+
+    def clear(self):
+        """停止所有通道的回放；已写入音频时间线的音调一并撤销。"""
+        for channel in self.channels.values():
+            channel.clear(clear_audio=False)
+        main = self.channels.get(self.main_channel_id)
+        if main is not None:
+            main._clear_scheduled_tones()
+
     def get_channel(self, channel_id):
         """
         获取指定通道的处理器实例。
@@ -13,6 +13,7 @@ except Exception:
     sd = None
 
 from .config_manager import ConfigManager
+from .key_timeline import presentation_ms
 
 
 logger = logging.getLogger(__name__)
@@ -70,8 +71,20 @@ class _SoundDeviceBuzzer:
         self._morse_state = "idle"  # idle | playing | finished
         self._morse_token = 0
 
+        # 接收回放时间线：按采样位置排序的 (start_sample, end_sample)，由音频回调逐采样消费
+        self._sample_clock = 0
+        self._timeline: Deque[tuple[int, int]] = deque()
+        self._timeline_on = False
+        self._timeline_remaining = 0
+        # perf_counter 毫秒与采样时钟的换算偏移，由音频回调维护
+        self._clock_offset_ms: Optional[float] = None
+        # 事件统一推后的提前量，吸收回调抖动，保证排程落在尚未渲染的采样上
+        self.timeline_lead_samples = self.block_size * 2
+
         self.playback_callback: Optional[Callable] = None
         self.sound_for_test_listen = None
+        # 可选的输出旁路（如 AudioRing），供真实频谱显示使用
+        self.audio_tap = None
 
         stream_kwargs = dict(
             samplerate=self.sample_rate,
@@ -102,6 +115,8 @@ class _SoundDeviceBuzzer:
                 or self._morse_state == "playing"
                 or self._morse_remaining > 0
                 or bool(self._morse_segments)
+                or self._timeline_remaining > 0
+                or bool(self._timeline)
             )
 
     def _ms_to_coeff(self, ms: float) -> float:
@@ -137,6 +152,8 @@ class _SoundDeviceBuzzer:
             and not self._pulse_segments
             and self._morse_remaining <= 0
             and not self._morse_segments
+            and self._timeline_remaining <= 0
+            and not self._timeline
         )
 
     def _normalized_tone_samples(self, duration_ms: float) -> int:
@@ -197,6 +214,22 @@ class _SoundDeviceBuzzer:
                 self._morse_state = "finished"
                 self.sound_for_test_listen = None
 
+    def _ensure_timeline_locked(self):
+        now = self._sample_clock
+        while self._timeline and self._timeline[0][1] <= now:
+            self._timeline.popleft()
+        if not self._timeline:
+            self._timeline_on = False
+            self._timeline_remaining = 0
+            return
+        start, end = self._timeline[0]
+        if start <= now:
+            self._timeline_on = True
+            self._timeline_remaining = end - now
+        else:
+            self._timeline_on = False
+            self._timeline_remaining = start - now
+
     def _advance_manual_hold_locked(self, frames: int):
         if self._manual_hold_remaining <= 0:
             return
@@ -205,9 +238,10 @@ class _SoundDeviceBuzzer:
     def _consume_scheduler_locked(self, max_frames: int) -> tuple[int, bool]:
         self._ensure_pulse_locked()
         self._ensure_morse_locked()
+        self._ensure_timeline_locked()
 
         manual_tone_on = self._loop_on or self._manual_hold_remaining > 0
-        tone_on = manual_tone_on or self._pulse_on or self._morse_on
+        tone_on = manual_tone_on or self._pulse_on or self._morse_on or self._timeline_on
 
         step = max_frames
         if self._manual_hold_remaining > 0:
@@ -216,6 +250,8 @@ class _SoundDeviceBuzzer:
             step = min(step, self._pulse_remaining)
         if self._morse_remaining > 0:
             step = min(step, self._morse_remaining)
+        if self._timeline_remaining > 0:
+            step = min(step, self._timeline_remaining)
 
         if step <= 0:
             step = max_frames
@@ -226,6 +262,7 @@ class _SoundDeviceBuzzer:
         self._advance_manual_hold_locked(step)
         self._advance_pulse_locked(step)
         self._advance_morse_locked(step)
+        self._sample_clock += step
         return step, tone_on
 
     def _render_block(self, frames: int, tone_on: bool) -> np.ndarray:
@@ -249,6 +286,15 @@ class _SoundDeviceBuzzer:
 
         mono = np.zeros(frames, dtype=np.float32)
         pos = 0
+        now_ms = presentation_ms()
+
+        with self._lock:
+            # 回调只会迟到不会早到：偏移取观测最小值，并缓慢上浮以跟随时钟漂移
+            observed = now_ms - self._samples_to_ms(self._sample_clock)
+            if self._clock_offset_ms is None or observed < self._clock_offset_ms:
+                self._clock_offset_ms = observed
+            else:
+                self._clock_offset_ms += (observed - self._clock_offset_ms) * 0.01
 
         while pos < frames:
             with self._lock:
@@ -257,6 +303,10 @@ class _SoundDeviceBuzzer:
             mono[pos : pos + step] = block
             pos += step
 
+        tap = self.audio_tap
+        if tap is not None:
+            tap.write(mono)
+
         if self.channels == 1:
             outdata[:frames, 0] = mono
         else:
@@ -391,6 +441,37 @@ class _SoundDeviceBuzzer:
             self._samples_to_ms(self._start_guard_samples),
         )
 
+    def schedule_tone(self, start_ms: float, duration_ms: float) -> bool:
+        """
+        按时间戳把一个音调写入回放时间线。
+
+        start_ms 为 perf_counter 毫秒（与 ReceiveScheduler 同一基准），换算为
+        (start_sample, length) 后由音频回调按采样精度起止，不受 GUI 线程负载影响。
+        时刻已过的事件从写入位置开始、保持原长度。音频时钟尚未建立时返回 False，
+        调用方应退回 play_for_duration。
+        """
+        length = self._normalized_tone_samples(duration_ms)
+        if length <= 0:
+            return True
+        with self._lock:
+            if self._clock_offset_ms is None:
+                return False
+            start = int(round((float(start_ms) - self._clock_offset_ms) * self.sample_rate / 1000.0))
+            start = max(start + self.timeline_lead_samples, self._sample_clock)
+            event = (start, start + length)
+            if not self._timeline or self._timeline[-1][0] <= start:
+                self._timeline.append(event)
+            else:
+                # 多通道交错提交时才会乱序，重排一次即可
+                self._timeline = deque(sorted((*self._timeline, event)))
+        return True
+
+    def clear_scheduled_tones(self):
+        with self._lock:
+            self._timeline.clear()
+            self._timeline_on = False
+            self._timeline_remaining = 0
+
     def stop_play_for_duration(self):
         with self._lock:
             self._pulse_segments.clear()
@@ -509,6 +590,9 @@ class _SoundDeviceBuzzer:
     def set_playback_callback(self, callback):
         self.playback_callback = callback
 
+    def set_audio_tap(self, tap):
+        self.audio_tap = tap
+
     def close(self):
         try:
             if self._stream is not None:
@@ -553,6 +637,12 @@ class BuzzerSimulator:
     def play_for_duration(self, duration, switch, interval=35):
         self._impl.play_for_duration(duration, switch, interval)
 
+    def schedule_tone(self, start_ms, duration_ms):
+        return self._impl.schedule_tone(start_ms, duration_ms)
+
+    def clear_scheduled_tones(self):
+        self._impl.clear_scheduled_tones()
+
     def stop_play_for_duration(self):
         self._impl.stop_play_for_duration()
 
@@ -565,6 +655,9 @@ class BuzzerSimulator:
     def set_playback_callback(self, callback):
         self._impl.set_playback_callback(callback)
 
+    def set_audio_tap(self, tap):
+        self._impl.set_audio_tap(tap)
+
     def close(self):
         if hasattr(self._impl, "close"):
             self._impl.close()
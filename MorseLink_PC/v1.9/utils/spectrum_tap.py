@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRing:
+    """
+    单生产者/单消费者的无锁音频环形缓冲。
+
+    生产者（音频回调）先写数据再推进 _written；消费者按 _written 取最近 n 个采样，
+    复制后再次核对，若期间已被覆盖则放弃本次读取。仅依赖 GIL 下整数赋值的原子性。
+    """
+
+    def __init__(self, capacity=16384):
+        self.capacity = max(256, int(capacity))
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._written = 0
+
+    @property
+    def written(self):
+        return self._written
+
+    def write(self, samples):
+        """音频回调中调用：不加锁、不分配（除切片视图外）。"""
+        n = len(samples)
+        if n <= 0:
+            return
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        start = self._written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:]
+        self._written += n
+
+    def latest(self, n) -> Optional[np.ndarray]:
+        """返回最近 n 个采样的副本；数据不足或读取期间被覆盖时返回 None。"""
+        n = min(int(n), self.capacity)
+        end = self._written
+        if end < n:
+            return None
+        start = (end - n) % self.capacity
+        if start + n <= self.capacity:
+            out = self._buf[start:start + n].copy()
+        else:
+            out = np.concatenate((self._buf[start:], self._buf[:start + n - self.capacity]))
+        if self._written - end > self.capacity - n:
+            return None
+        return out
+
+
+class SpectrumAnalyzer:
+    """
+    从 AudioRing 计算真实频谱的后台工作线程。
+
+    每 interval_ms 取最近一段音频：按 decimate 做块平均降采样，加 Hann 窗后 np.fft.rfft，
+    截取 [center_hz - span_hz/2, center_hz + span_hz/2] 频段并插值到显示宽度，
+    得到 0..1 的电平行与 uint8 RGB 瀑布行。UI 线程只需 take_row() 取现成结果。
+    没有新音频写入时跳过计算。
+    """
+
+    def __init__(
+        self,
+        ring,
+        sample_rate=48000,
+        center_hz=800.0,
+        span_hz=1200.0,
+        fft_size=1024,
+        decimate=4,
+        interval_ms=33,
+        dyn_range_db=60.0,
+        colormap=None,
+    ):
+        """
+        Args:
+            ring: AudioRing 实例
+            fft_size (int): 降采样后参与 FFT 的点数
+            decimate (int): 降采样倍数（块平均，兼作简单抗混叠）
+            colormap: 将 [0,1] 映射为 uint8 RGB 的函数
+        """
+        self.ring = ring
+        self.sample_rate = int(sample_rate)
+        self.center_hz = float(center_hz)
+        self.span_hz = float(span_hz)
+        self.fft_size = max(64, int(fft_size))
+        self.decimate = max(1, int(decimate))
+        self.interval_ms = max(5, int(interval_ms))
+        self.dyn_range_db = max(10.0, float(dyn_range_db))
+        self.colormap = colormap
+
+        self._window = np.hanning(self.fft_size).astype(np.float32)
+        # 满幅正弦在 Hann 窗下的峰值，用于归一化到 0 dBFS
+        self._ref = float(np.sum(self._window)) / 2.0
+        self._freqs = np.fft.rfftfreq(self.fft_size, d=self.decimate / float(self.sample_rate))
+
+        self._width = 0
+        self._result = None  # (seq, level_row, rgb_row)
+        self._seq = 0
+        self._taken = 0
+        self._last_written = -1
+        self._silent = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_sample_rate(self, sample_rate):
+        """音频设备重建后采样率可能变化，频率轴随之重算。"""
+        sample_rate = int(sample_rate)
+        if sample_rate <= 0 or sample_rate == self.sample_rate:
+            return
+        self.sample_rate = sample_rate
+        self._freqs = np.fft.rfftfreq(self.fft_size, d=self.decimate / float(self.sample_rate))
+        self._last_written = -1
+        self._silent = False
+
+    def set_width(self, width):
+        width = max(0, int(width))
+        if width != self._width:
+            self._width = width
+            self._last_written = -1
+            self._silent = False
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spectrum-analyzer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def take_row(self):
+        """返回 (level_row, rgb_row)；自上次取走后没有新结果时返回 None。"""
+        result = self._result
+        if result is None or result[0] == self._taken:
+            return None
+        self._taken = result[0]
+        return result[1], result[2]
+
+    def _run(self):
+        period = self.interval_ms / 1000.0
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                self._compute()
+            except Exception:
+                logger.exception("Spectrum analysis failed")
+            self._stop.wait(max(0.0, period - (time.perf_counter() - started)))
+
+    def _compute(self):
+        width = self._width
+        written = self.ring.written
+        if width <= 0 or written == self._last_written:
+            return
+        raw = self.ring.latest(self.fft_size * self.decimate)
+        if raw is None:
+            return
+        self._last_written = written
+        # 静音期间音频回调仍在写入零值，只需发布一次全零结果
+        silent = not raw.any()
+        if silent and self._silent:
+            return
+        self._silent = silent
+
+        x = raw.reshape(self.fft_size, self.decimate).mean(axis=1) if self.decimate > 1 else raw
+        mag = np.abs(np.fft.rfft(x * self._window)) / self._ref
+        db = 20.0 * np.log10(mag + 1e-9)
+
+        lo = self.center_hz - self.span_hz / 2.0
+        hi = self.center_hz + self.span_hz / 2.0
+        display_hz = np.linspace(lo, hi, width, dtype=np.float32)
+        row_db = np.interp(display_hz, self._freqs, db)
+        level = np.clip((row_db + self.dyn_range_db) / self.dyn_range_db, 0.0, 1.0).astype(np.float32)
+
+        rgb = self.colormap(level) if self.colormap is not None else None
+        self._seq += 1
+        self._result = (self._seq, level, rgb)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import bisect
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+class TimelineLod:
+    """
+    Element spans of one timeline in layout units, plus a min/max pyramid.
+
+    One layout unit is one pixel at zoom 1. Level 0 holds one bucket per
+    unit: max is 1 if any tone touches the bucket, min is 1 if a tone
+    covers it completely. Each higher level halves the bucket count, so
+    any zoom can be drawn by sampling one bucket per pixel column.
+    """
+
+    # Same compression as the original scene layout: long tones and gaps
+    # are capped so a single stuck key does not dominate the view.
+    TONE_SCALE = 0.12
+    GAP_SCALE = 0.08
+    TONE_CAP = 420.0
+    GAP_CAP = 220.0
+
+    def __init__(self, lengths: Sequence[float], gaps: Sequence[float]):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        x = 0.0
+        for idx, length in enumerate(lengths):
+            if idx > 0:
+                gap = max(0.0, float(gaps[idx]) if idx < len(gaps) else 80.0)
+                x += max(2.0, min(gap * self.GAP_SCALE, self.GAP_CAP))
+            width = max(1.0, min(float(length) * self.TONE_SCALE, self.TONE_CAP))
+            self.starts.append(x)
+            self.ends.append(x + width)
+            x += width
+        self.total = x
+        self.levels: List[Tuple[bytes, bytes]] = self._build_levels()
+
+    def _build_levels(self) -> List[Tuple[bytes, bytes]]:
+        size = max(1, int(math.ceil(self.total)))
+        starts = np.asarray(self.starts, dtype=np.float64)
+        ends = np.asarray(self.ends, dtype=np.float64)
+        # max: buckets a tone touches; min: buckets a tone covers completely.
+        maxs = self._cover(size, np.floor(starts), np.ceil(ends))
+        mins = self._cover(size, np.ceil(starts), np.floor(ends))
+
+        levels = [(mins.tobytes(), maxs.tobytes())]
+        while len(maxs) > 1:
+            if len(maxs) % 2:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            mins = mins.reshape(-1, 2).min(axis=1)
+            maxs = maxs.reshape(-1, 2).max(axis=1)
+            levels.append((mins.tobytes(), maxs.tobytes()))
+        return levels
+
+    @staticmethod
+    def _cover(size: int, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """uint8 mask of length size, 1 inside any [lo, hi) span."""
+        lo = np.clip(lo, 0, size).astype(np.intp)
+        hi = np.clip(hi, 0, size).astype(np.intp)
+        keep = hi > lo
+        edges = np.zeros(size + 1, dtype=np.int32)
+        np.add.at(edges, lo[keep], 1)
+        np.add.at(edges, hi[keep], -1)
+        return (np.cumsum(edges[:-1]) > 0).astype(np.uint8)
+
+    def level_for(self, units_per_px: float) -> int:
+        """Finest level whose buckets are at least one pixel wide."""
+        if units_per_px <= 1.0:
+            return 0
+        return min(len(self.levels) - 1, int(math.ceil(math.log2(units_per_px))))
+
+    def visible_range(self, u0: float, u1: float) -> Tuple[int, int]:
+        """Index range of elements overlapping [u0, u1)."""
+        return bisect.bisect_right(self.ends, u0), bisect.bisect_left(self.starts, u1)
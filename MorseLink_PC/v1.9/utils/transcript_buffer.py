@@ -0,0 +1,98 @@
+from collections import deque
+
+
+class TranscriptBuffer:
+    """
+    分块环形文本缓冲，用于长时间运行的收发文本面板。
+
+    追加为 O(1)（写入未封口的尾块，满 chunk_chars 后封口）；超过 max_chars 时
+    整块丢弃最旧的内容，因此界面只需每丢弃一块重设一次文本，而不是每次追加都重建。
+    tail(n) 只遍历末尾若干块，代价与总长度无关；delta_since() 给出某个标记之后
+    新追加的文本，供下游视图增量更新。
+    """
+
+    def __init__(self, max_chars=4096, chunk_chars=256):
+        """
+        Args:
+            max_chars (int): 至少保留的字符数，实际长度不超过 max_chars + 一块
+            chunk_chars (int): 封口块大小，即一次裁剪的粒度
+        """
+        self.max_chars = max(1, int(max_chars))
+        self.chunk_chars = max(1, int(chunk_chars))
+        self._chunks = deque()
+        self._open = []
+        self._open_len = 0
+        self._length = 0
+        self.trimmed_chars = 0
+        # 累计追加字符数与清空代数，组合成增量标记
+        self.appended_chars = 0
+        self.generation = 0
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def append(self, text):
+        """追加文本；若因此裁剪掉了旧块返回 True（界面需整体重设）。"""
+        if not text:
+            return False
+        self._open.append(text)
+        self._open_len += len(text)
+        self._length += len(text)
+        self.appended_chars += len(text)
+        if self._open_len >= self.chunk_chars:
+            self._chunks.append("".join(self._open))
+            self._open = []
+            self._open_len = 0
+
+        trimmed = False
+        while self._chunks and self._length - len(self._chunks[0]) >= self.max_chars:
+            dropped = self._chunks.popleft()
+            self._length -= len(dropped)
+            self.trimmed_chars += len(dropped)
+            trimmed = True
+        return trimmed
+
+    def tail(self, n):
+        """最后 n 个字符。"""
+        n = int(n)
+        if n <= 0:
+            return ""
+        parts = []
+        got = 0
+        for piece in reversed(self._open):
+            parts.append(piece)
+            got += len(piece)
+            if got >= n:
+                break
+        else:
+            for chunk in reversed(self._chunks):
+                parts.append(chunk)
+                got += len(chunk)
+                if got >= n:
+                    break
+        return "".join(reversed(parts))[-n:]
+
+    def mark(self):
+        return (self.generation, self.appended_chars)
+
+    def delta_since(self, mark):
+        """mark 之后追加的文本；mark 已失效（清空过或已被裁剪）时返回 None。"""
+        if mark is None or mark[0] != self.generation:
+            return None
+        n = self.appended_chars - mark[1]
+        if n < 0 or n > self._length:
+            return None
+        return self.tail(n)
+
+    def text(self):
+        return "".join(self._chunks) + "".join(self._open)
+
+    def clear(self):
+        self._chunks.clear()
+        self._open = []
+        self._open_len = 0
+        self._length = 0
+        self.generation += 1